@@ -0,0 +1,15 @@
+"""Shared JSON serialization helpers."""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+
+def dumps_json_bytes(obj) -> bytes:
+    """Serialize to indented UTF-8 JSON bytes, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
@@ -24,14 +24,21 @@ class NativePipeline:
         self.output_dir = output_dir
 
         # Bounded queues for backpressure between stages.
+        # Post-enrich items carry full content + extra_content, so the queues
+        # around the organizer are sized to O(workers) in-flight items: slow
+        # LLM calls or a slow writer block producers instead of growing memory.
+        organize_workers = config.getint('crawler', 'organize_workers', fallback=5)
         self.fetch_queue = queue.Queue(maxsize=1000)
-        self.enrich_queue = queue.Queue(maxsize=1000)
-        self.organize_queue = queue.Queue(maxsize=1000)
+        self.enrich_queue = queue.Queue(maxsize=2 * organize_workers)
+        self.organize_queue = queue.Queue(maxsize=2 * organize_workers)
 
         self.fetcher = FetcherStage(self.fetch_queue, config, batch_timestamp)
         self.enricher = EnricherStage(self.fetch_queue, self.enrich_queue, config, batch_timestamp)
         self.organizer = OrganizerStage(self.enrich_queue, self.organize_queue, config)
-        self.writer = WriterStage(self.organize_queue, output_dir, batch_timestamp)
+        self.writer = WriterStage(
+            self.organize_queue, output_dir, batch_timestamp,
+            writer_workers=config.getint('crawler', 'writer_workers', fallback=4),
+        )
 
     def run(self, rss_sources):
         start_time = time.time()
@@ -29,8 +29,6 @@ def organize_single_post(post, prompt_template, llm_client, llm_config, entity_l
         logger.error(f"❌ [Prompt-Missing] No prompt template provided for {post.get('link', 'unknown')}")
         return None
 
-    content = post['content']
-    
     # 2. Prepare Context
     context = {
         'title': post.get('title', ''),
@@ -115,6 +113,7 @@ def organize_single_post(post, prompt_template, llm_client, llm_config, entity_l
     result['date'] = post.get('date', '')
     result['link'] = post.get('link', '')
     result['source_name'] = post.get('source_name', '')
+    result['source_name_lc'] = post.get('source_name_lc') or result['source_name'].lower()
     result['source_type'] = post.get('source_type', '')
     
     # 添加 extra_content 和 extra_urls
@@ -128,6 +127,9 @@ def organize_single_post(post, prompt_template, llm_client, llm_config, entity_l
 
 class OrganizerStage:
     def __init__(self, enrich_queue: Queue, organize_queue: Queue, config):
+        # organize_queue must be bounded so put() blocks when the writer falls behind.
+        if organize_queue.maxsize <= 0:
+            raise ValueError("organize_queue must be bounded (maxsize > 0) for backpressure")
         self.enrich_queue = enrich_queue
         self.organize_queue = organize_queue
         self.config = config
@@ -193,8 +195,12 @@ class OrganizerStage:
                     llm_config=self.config,
                     entity_list=self.entity_list,
                 )
-                
+                # Release the raw post (content can be 10-50KB) before a possibly
+                # blocking put; result only carries the fields the writer needs.
+                post = None
+
                 if result:
+                    # Blocks while the writer is behind (bounded queue backpressure).
                     self.organize_queue.put(result)
                 else:
                     # Logic: if None returned, it means skip (ad or empty)
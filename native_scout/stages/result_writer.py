@@ -2,20 +2,73 @@
 result_writer.py - WriterStage for Native Python Pipeline.
 """
 import os
+import re
+import sys
 import json
+import heapq
+import operator
 import time
 import threading
-import hashlib
-import shutil
+import zlib
+import functools
 from queue import Queue
 from datetime import datetime
 
 from common.config import load_project_ini
+from common.json_io import dumps_json_bytes
 from common.logging import setup_logger
 
 logger = setup_logger("result_writer")
 
 
+class _FsNameTable(dict):
+    """str.translate table: keep alphanumerics and allowed chars, map the rest to '_'."""
+
+    def __init__(self, allowed):
+        super().__init__()
+        self.allowed = allowed
+
+    def __missing__(self, code):
+        ch = chr(code)
+        value = ch if ch.isalnum() or ch in self.allowed else '_'
+        self[code] = value
+        return value
+
+
+_FS_NAME_TABLES = {'-_': _FsNameTable('-_'), '-_ ': _FsNameTable('-_ ')}
+
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+
+def _write_bytes(path, data):
+    """Write bytes with raw fd syscalls, bypassing the buffered/text file layers."""
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _mkdir(path):
+    """Create one directory level; parents are normally pre-created in WriterStage.start()."""
+    try:
+        os.mkdir(path)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        # Parent missing (e.g. stage used without start()): fall back to the full walk.
+        os.makedirs(path, exist_ok=True)
+
+
+@functools.lru_cache(maxsize=512)
+def _safe_fs_name(name, allowed='-_'):
+    """Sanitize a domain/entity name for use as a directory name (memoized)."""
+    return name.translate(_FS_NAME_TABLES[allowed])
+
+
 def save_batch_manifest(output_dir, batch_id, domain_reports, stats=None):
     """Save the native_scout batch manifest file."""
     manifest = {
@@ -36,12 +89,22 @@ def save_batch_manifest(output_dir, batch_id, domain_reports, stats=None):
     return manifest_path
 
 class WriterStage:
-    def __init__(self, organize_queue: Queue, output_dir, batch_timestamp):
+    # Static lookup tables: scores are 0-5, so stars/tiers are precomputed once.
+    _TIERS = ('high', 'pending', 'excluded')
+    _ENTITY_TIERS = frozenset(('high', 'pending'))
+    _STARS = {s: '⭐' * s + '☆' * (5 - s) for s in range(6)}
+    _TIER_FOR_SCORE = {5: 'high', 4: 'high', 3: 'pending', 2: 'pending', 1: 'excluded', 0: 'excluded'}
+
+    def __init__(self, organize_queue: Queue, output_dir, batch_timestamp, writer_workers=4):
         self.organize_queue = organize_queue
         self.output_dir = output_dir
         self.batch_timestamp = batch_timestamp
         
-        self.thread = None
+        # Posts touch independent files, so N writers share the queue; only the
+        # shared stats below are guarded by the lock, file I/O runs outside it.
+        self.writer_workers = max(1, writer_workers)
+        self.threads = []
+        self._lock = threading.Lock()
         
         # Stats tracking
         # {domain: {'path': ..., 'name': ..., 'high': 0, ...}}
@@ -51,7 +114,10 @@ class WriterStage:
         # Entity Mapping
         self.entity_mapping = self._load_entity_mapping()
         self.source_to_entity = self._build_source_index()
+        self._alias_scanner = self._build_alias_scanner()
+        self._fuzzy_entity_cache = {}  # {source_key: entity or None}
         self.entity_stats = {}  # {entity_name: count}
+        self._entity_dirs = {}  # {entity_name: dir path with trailing sep}, created this batch
 
     def _load_entity_mapping(self):
         """
@@ -68,9 +134,8 @@ class WriterStage:
 
             if 'entity_mapping' in config:
                 for entity, aliases_str in config['entity_mapping'].items():
-                    aliases = [a.strip() for a in aliases_str.split(',') if a.strip()]
-                    if entity not in aliases:
-                        aliases.append(entity)
+                    aliases = {a.strip() for a in aliases_str.split(',') if a.strip()}
+                    aliases.add(entity)
                     mapping[entity] = aliases
                     
             return mapping
@@ -87,15 +152,54 @@ class WriterStage:
                 index[source.lower()] = entity_name
         return index
 
+    def _build_alias_scanner(self):
+        """
+        Compile all aliases into one alternation so a source_name can be scanned
+        for contained aliases in a single pass (e.g. "OpenAI Blog" -> OpenAI).
+        Longest aliases come first so the most specific alias wins; very short
+        aliases are left to exact matching to avoid accidental substring hits.
+        """
+        aliases = sorted((a for a in self.source_to_entity if len(a) >= 3), key=len, reverse=True)
+        if not aliases:
+            return None
+        return re.compile("|".join(re.escape(a) for a in aliases))
+
+    def _resolve_source_entity(self, source_key):
+        """Exact alias match first, then the longest alias contained in source_key."""
+        entity = self.source_to_entity.get(source_key)
+        if entity or self._alias_scanner is None:
+            return entity
+        if source_key in self._fuzzy_entity_cache:
+            return self._fuzzy_entity_cache[source_key]
+        best = None
+        for match in self._alias_scanner.finditer(source_key):
+            if best is None or len(match.group()) > len(best):
+                best = match.group()
+        entity = self.source_to_entity[best] if best else None
+        # Memoize (including misses) so each source name is scanned once per batch.
+        self._fuzzy_entity_cache[source_key] = entity
+        return entity
+
     def start(self):
-        logger.info("Starting WriterStage...")
-        self.thread = threading.Thread(target=self._worker_loop, name="WriterThread")
-        self.thread.start()
+        logger.info(f"Starting WriterStage with {self.writer_workers} workers...")
+        # Create the view roots once so per-domain/entity dirs need a single mkdir each.
+        for root in ("By-Domain", "By-Entity"):
+            os.makedirs(os.path.join(self.output_dir, root), exist_ok=True)
+        self.threads = [
+            threading.Thread(target=self._worker_loop, name=f"Writer-{i}")
+            for i in range(self.writer_workers)
+        ]
+        for thread in self.threads:
+            thread.start()
 
     def stop(self):
-        logger.info("Stopping WriterStage... Sending poison pill.")
-        self.organize_queue.put(None)
-        self.thread.join()
+        logger.info("Stopping WriterStage... Sending poison pills.")
+        for _ in self.threads:
+            self.organize_queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        # All writers have exited, so stats are final.
+        self._finalize_batch()
         logger.info("WriterStage stopped.")
 
     def _worker_loop(self):
@@ -103,45 +207,53 @@ class WriterStage:
             result = self.organize_queue.get()
             
             if result is None:
-                self._finalize_batch()
                 self.organize_queue.task_done()
                 break
             
             try:
                 self._write_post_file(result)
-                self.total_posts += 1
+                with self._lock:
+                    self.total_posts += 1
             except Exception as e:
                 logger.error(f"Writer error: {e}")
             finally:
                 self.organize_queue.task_done()
 
     def _get_quality_tier(self, score):
+        tier = self._TIER_FOR_SCORE.get(score)
+        if tier is not None: return tier
+        # Out-of-range scores from the LLM fall back to threshold comparison.
         if score >= 4: return "high"
         elif score >= 2: return "pending"
         else: return "excluded"
 
     def _get_domain_info(self, domain):
         if domain not in self.domain_info_map:
-            safe_domain = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in domain)
+            safe_domain = _safe_fs_name(domain)
             
             # New Structure: 1-By-Domain/{Domain}
             dir_name = safe_domain
             dir_path = os.path.join(self.output_dir, "By-Domain", dir_name)
             
-            for tier in ['high', 'pending', 'excluded']:
-                os.makedirs(os.path.join(dir_path, tier), exist_ok=True)
+            # Tier dirs are joined once here; per-post paths are plain concatenation.
+            tier_paths = {tier: os.path.join(dir_path, tier) + os.sep for tier in self._TIERS}
+            _mkdir(dir_path)
+            for tier_path in tier_paths.values():
+                _mkdir(tier_path)
             
             self.domain_info_map[domain] = {
                 'path': dir_path,
                 'name': dir_name,
+                'tier_paths': tier_paths,
                 'high': 0, 'pending': 0, 'excluded': 0,
                 'posts': []
             }
         return self.domain_info_map[domain]
 
     def _generate_post_markdown(self, post, domain):
+        """Render the post markdown as UTF-8 bytes (encoded once, ready for os.write)."""
         score = post.get('quality_score', 3)
-        stars = '⭐' * score + '☆' * (5 - score)
+        stars = self._STARS.get(score) or ('⭐' * score + '☆' * (5 - score))
         
         lines = [
             f"# {post.get('event', 'Untitled')}",
@@ -171,7 +283,7 @@ class WriterStage:
             lines.extend([f"- {url}" for url in post['extra_urls']])
             lines.append("")
         
-        return "\n".join(lines)
+        return "\n".join(lines).encode('utf-8')
 
     def _write_post_file(self, result):
         domain = result.get('domain', 'Other')
@@ -181,18 +293,21 @@ class WriterStage:
         source_name = result.get('source_name', 'Unknown')
         
         # 1. Write to Domain View (Master Copy)
-        domain_info = self._get_domain_info(domain)
+        with self._lock:
+            # First sight of a domain also creates its directories, so keep it locked.
+            domain_info = self._get_domain_info(domain)
         tier = self._get_quality_tier(quality_score)
         
         link = result.get('link', '')
-        unique_suffix = hashlib.md5(link.encode('utf-8')).hexdigest()[:6] if link else "nolink"
+        # Non-cryptographic, deterministic suffix: crc32 is enough to tell links apart.
+        unique_suffix = f"{zlib.crc32(link.encode('utf-8')):08x}"[:6] if link else "nolink"
         filename = f"{source_name}_{date_str}_{unique_suffix}.md"
         
-        domain_filepath = os.path.join(domain_info['path'], tier, filename)
+        domain_filepath = domain_info['tier_paths'][tier] + filename
         
-        md_content = self._generate_post_markdown(result, domain)
-        with open(domain_filepath, 'w', encoding='utf-8') as f:
-            f.write(md_content)
+        # Rendered once; the buffer is reused if the entity view cannot be hardlinked.
+        md_bytes = self._generate_post_markdown(result, domain)
+        _write_bytes(domain_filepath, md_bytes)
 
         # Collect for JSON
         post_json = {
@@ -207,48 +322,63 @@ class WriterStage:
             "source_name": source_name,
             "source_type": result.get('source_type', 'Unknown')
         }
-        domain_info['posts'].append(post_json)
-        domain_info[tier] += 1
+        with self._lock:
+            domain_info['posts'].append(post_json)
+            domain_info[tier] += 1
         
         # 2. Write to Entity View
         # Priority: Source Mapping > LLM primary_entity (already constrained by prompt)
         canonical_entity = None
         
         # A. Source Mapping (High Confidence)
-        if source_name:
-            canonical_entity = self.source_to_entity.get(source_name.lower())
+        # source_name_lc is normalized once upstream; lower() only for producers that omit it.
+        source_key = result.get('source_name_lc') or (source_name.lower() if source_name else '')
+        if source_key:
+            canonical_entity = self._resolve_source_entity(source_key)
         
         # B. Fallback to LLM primary_entity (constrained to entity list + "Others")
         if not canonical_entity:
             canonical_entity = result.get('primary_entity', 'Others')
         
-        if tier in ['high', 'pending']:
-            self._write_to_entity_view(canonical_entity, domain_filepath, filename)
+        if tier in self._ENTITY_TIERS:
+            self._write_to_entity_view(canonical_entity, domain_filepath, md_bytes, filename)
 
         logger.info(f"💾 [Saved] [{tier.upper()}] {filename}") # Reduce log noise
         return tier
 
-    def _write_to_entity_view(self, entity_name, original_path, filename):
+    def _write_to_entity_view(self, entity_name, original_path, md_bytes, filename):
         """
-        Link/Copy file to 3-By-Entity/{EntityName}/
+        Link file to 3-By-Entity/{EntityName}/.
+        Uses a hardlink (metadata-only, no data copied); falls back to writing the
+        rendered buffer when linking is not possible (cross-device, FS without links).
         """
         if not entity_name:
             return
 
         # Sanitize entity name for filesystem
-        safe_entity = "".join(c if c.isalnum() or c in ('-', '_', ' ') else '_' for c in entity_name).strip()
+        safe_entity = _safe_fs_name(entity_name, '-_ ').strip()
         
-        entity_dir = os.path.join(self.output_dir, "By-Entity", safe_entity)
-        os.makedirs(entity_dir, exist_ok=True)
+        entity_dir = self._entity_dirs.get(safe_entity)
+        if entity_dir is None:
+            entity_dir = os.path.join(self.output_dir, "By-Entity", safe_entity) + os.sep
+            _mkdir(entity_dir)
+            self._entity_dirs[safe_entity] = entity_dir
         
-        target_path = os.path.join(entity_dir, filename)
+        target_path = entity_dir + filename
         
         try:
-            shutil.copy2(original_path, target_path)
+            try:
+                os.link(original_path, target_path)
+            except FileExistsError:
+                os.remove(target_path)
+                os.link(original_path, target_path)
+            except OSError:
+                _write_bytes(target_path, md_bytes)
             # Update stats
-            self.entity_stats[safe_entity] = self.entity_stats.get(safe_entity, 0) + 1
+            with self._lock:
+                self.entity_stats[safe_entity] = self.entity_stats.get(safe_entity, 0) + 1
         except Exception as e:
-            logger.error(f"Failed to copy to entity view {safe_entity}: {e}")
+            logger.error(f"Failed to link to entity view {safe_entity}: {e}")
 
     def _finalize_batch(self):
         """Save stats and manifest."""
@@ -256,8 +386,9 @@ class WriterStage:
         for domain, info in self.domain_info_map.items():
             json_path = os.path.join(info['path'], 'posts.json')
             try:
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(info['posts'], f, ensure_ascii=False, indent=2)
+                data = dumps_json_bytes(info['posts'])
+                with open(json_path, 'wb') as f:
+                    f.write(data)
             except Exception as e:
                 logger.error(f"Failed to save posts.json for {domain}: {e}")
 
@@ -287,20 +418,26 @@ class WriterStage:
         self._print_summary(total_high, total_pending, total_excluded)
 
     def _print_summary(self, high, pending, excluded):
-        print("\n" + "="*60)
-        print("Execution Summary")
-        print("="*60)
-        print(f"Total Valid Posts: {self.total_posts}")
-        print(f"Quality Distribution: H:{high} / P:{pending} / E:{excluded}")
-        
-        print(f"\nDomains:")
+        lines = [
+            "",
+            "=" * 60,
+            "Execution Summary",
+            "=" * 60,
+            f"Total Valid Posts: {self.total_posts}",
+            f"Quality Distribution: H:{high} / P:{pending} / E:{excluded}",
+            "",
+            "Domains:",
+        ]
         for domain, info in self.domain_info_map.items():
-            print(f"  - {domain}: {info['high']} H / {info['pending']} P")
-            
-        print(f"\nEntities (Auto-Grouped):")
-        sorted_entities = sorted(self.entity_stats.items(), key=lambda x: x[1], reverse=True)[:10]
-        if not sorted_entities:
-            print("  (None detected)")
-        for ent, count in sorted_entities:
-            print(f"  - {ent}: {count} posts")
-        print("="*60)
+            lines.append(f"  - {domain}: {info['high']} H / {info['pending']} P")
+
+        lines.append("")
+        lines.append("Entities (Auto-Grouped):")
+        top_entities = heapq.nlargest(10, self.entity_stats.items(), key=operator.itemgetter(1))
+        if not top_entities:
+            lines.append("  (None detected)")
+        for ent, count in top_entities:
+            lines.append(f"  - {ent}: {count} posts")
+        lines.append("=" * 60)
+        # One write keeps the summary contiguous even if other threads are logging.
+        sys.stdout.write("\n".join(lines) + "\n")
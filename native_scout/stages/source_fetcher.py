@@ -2,21 +2,148 @@
 source_fetcher.py - FetcherStage for Native Python Pipeline.
 """
 import time
+import calendar
 import random
 import os
 import sys
-import json
+import threading
+import functools
 import requests
 import feedparser
+from requests.adapters import HTTPAdapter
+from io import BytesIO
 from datetime import datetime, timezone
+from email.utils import parsedate_tz
 from dateutil import parser as date_parser
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from queue import Queue
+from queue import Queue, Empty
 
+from common.json_io import dumps_json_bytes
 from common.logging import setup_logger
 
+try:
+    from lxml import etree
+except ImportError:  # optional fast path; feedparser handles everything otherwise
+    etree = None
+
 logger = setup_logger("source_fetcher")
 
+_FEED_ENTRY_TAGS = ('{*}item', '{*}entry')
+
+
+def _inner_markup(elem):
+    """Return element text, serializing child nodes for inline (x)html content."""
+    if len(elem) == 0:
+        return elem.text or ""
+    parts = [elem.text or ""]
+    parts.extend(etree.tostring(child, encoding="unicode") for child in elem)
+    return "".join(parts)
+
+
+def _parse_feed_lxml(content):
+    """
+    Single iterparse pass over RSS/Atom, keeping only the fields the fetcher uses.
+    Returns a list of entry dicts shaped like _feedparser_entries() output.
+    """
+    entries = []
+    context = etree.iterparse(
+        BytesIO(content), events=('end',), tag=_FEED_ENTRY_TAGS,
+        resolve_entities=False, no_network=True, huge_tree=True,
+    )
+    for _, elem in context:
+        entry = {"title": "", "link": "", "published": None, "published_parsed": None,
+                 "content": "", "description": ""}
+        for child in elem:
+            if not isinstance(child.tag, str):
+                continue  # comments / processing instructions
+            name = etree.QName(child).localname
+            if name == "title":
+                entry["title"] = (child.text or "").strip()
+            elif name == "link":
+                href = child.get("href")
+                if href is None:
+                    entry["link"] = entry["link"] or (child.text or "").strip()
+                elif not entry["link"] and child.get("rel", "alternate") == "alternate":
+                    entry["link"] = href
+            elif name in ("pubDate", "published", "issued"):
+                entry["published"] = (child.text or "").strip() or None
+            elif name in ("encoded", "content"):
+                entry["content"] = entry["content"] or _inner_markup(child)
+            elif name in ("description", "summary"):
+                entry["description"] = entry["description"] or _inner_markup(child)
+            elif name == "group":
+                # YouTube: <media:group><media:description> carries the video text.
+                for sub in child:
+                    if isinstance(sub.tag, str) and etree.QName(sub).localname == "description":
+                        entry["description"] = entry["description"] or (sub.text or "")
+        entries.append(entry)
+        elem.clear()
+    return entries
+
+
+def _feedparser_entries(content):
+    """Parse with feedparser and normalize entries to the same dict shape."""
+    feed = feedparser.parse(content)
+    if feed.bozo and not feed.entries:
+        raise ValueError(f"RSS parse failed: {feed.bozo_exception}")
+    entries = []
+    for entry in feed.entries:
+        # content is usually a list of dicts like [{'type': 'text/html', 'value': '...'}]
+        entry_content = entry.get("content")
+        entries.append({
+            "title": entry.get("title", ""),
+            "link": entry.get("link", ""),
+            "published": entry.get("published"),
+            "published_parsed": entry.get("published_parsed"),
+            "content": entry_content[0].value if entry_content else "",
+            "description": entry.get("description", ""),
+        })
+    return entries
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_date_string(value):
+    """
+    dateutil parse of a raw date string (memoized; feeds repeat timestamps).
+    Returns (UTC epoch, YYYY-MM-DD in the string's own offset).
+    """
+    dt = date_parser.parse(value)
+    date_str = dt.strftime("%Y-%m-%d")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp(), date_str
+
+
+@functools.lru_cache(maxsize=1024)
+def _local_date_string(value):
+    """
+    YYYY-MM-DD of a raw date string in its own offset, without dateutil for the
+    common RFC 822 (RSS) and ISO 8601 (Atom) forms; anything else goes through dateutil.
+    """
+    parts = parsedate_tz(value)
+    if parts is not None:
+        return f"{parts[0]:04d}-{parts[1]:02d}-{parts[2]:02d}"
+    try:
+        return datetime.fromisoformat(value).strftime("%Y-%m-%d")
+    except ValueError:
+        return _parse_date_string(value)[1]
+
+
+def parse_feed(content):
+    """
+    Parse RSS/Atom bytes into lightweight entry dicts.
+    Uses a single lxml pass when available, falling back to feedparser for
+    anything lxml rejects (malformed XML, undeclared HTML entities, ...).
+    """
+    if etree is not None:
+        try:
+            entries = _parse_feed_lxml(content)
+            if entries:
+                return entries
+        except etree.LxmlError:
+            pass
+    return _feedparser_entries(content)
+
 
 def _bridge_x_scraper_loggers():
     """Route x_scraper loggers to the same output as source_fetcher."""
@@ -42,7 +169,9 @@ class FetcherStage:
         self.batch_timestamp = batch_timestamp
         
         # Pool for Weixin/YouTube (Parallel)
-        self.general_workers = 5
+        # Feed fetches are I/O bound and share the keep-alive session below,
+        # so widening this pool is the cheap way to overlap more requests.
+        self.general_workers = config.getint('crawler', 'fetch_workers', fallback=5)
         self.general_pool = ThreadPoolExecutor(max_workers=self.general_workers, thread_name_prefix="Weixin+YouTubeFetcher")
         
         # Pool for X/Twitter (Restricted Serial)
@@ -50,6 +179,27 @@ class FetcherStage:
         self.restricted_workers = 1 
         self.restricted_pool = ThreadPoolExecutor(max_workers=self.restricted_workers, thread_name_prefix="XFetcher")
         
+        # Shared keep-alive session: feeds on the same host reuse TCP/TLS connections.
+        pool_size = self.general_workers + self.restricted_workers
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        
+        # Raw backups are forensic only: a background writer keeps them off the fetch path.
+        self.backup_queue = Queue()
+        self.backup_batch_size = 16
+        self.backup_thread = threading.Thread(target=self._backup_loop, name="RawBackupWriter", daemon=True)
+        # stages/.. -> crawler/.. -> root
+        self.raw_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data', batch_timestamp, 'raw')
+        
+        # Cross-feed dedup: the same link (reposts, cross-posted articles) only
+        # enters the pipeline once. An exact set is small at batch scale and has
+        # no false positives, unlike a Bloom filter.
+        self._seen_links = set()
+        self._seen_lock = threading.Lock()
+        
         self.futures = []
 
     def start(self, rss_sources):
@@ -58,6 +208,7 @@ class FetcherStage:
         rss_sources: dict like {"weixin": {...}, "X": {...}, "YouTube": {...}}
         """
         logger.info("Starting FetcherStage...")
+        self.backup_thread.start()
         
         # Flatten sources into a list of tasks
         # Task format: (category, name, url)
@@ -108,8 +259,24 @@ class FetcherStage:
         
         self.general_pool.shutdown(wait=True)
         self.restricted_pool.shutdown(wait=True)
+        self.session.close()
+        
+        # Flush pending raw backups.
+        if self.backup_thread.is_alive():
+            self.backup_queue.put(None)
+            self.backup_thread.join()
         logger.info("FetcherStage finished.")
 
+    def _claim_link(self, link):
+        """Return True the first time a link is seen in this batch (links missing are always kept)."""
+        if not link:
+            return True
+        with self._seen_lock:
+            if link in self._seen_links:
+                return False
+            self._seen_links.add(link)
+            return True
+
     def _fetch_x_task(self, rss_url, source_type, name):
         """Wrapper for X tasks to add random delay."""
         # Get delay config
@@ -157,7 +324,12 @@ class FetcherStage:
 
             from x_scraper.scraper import XScraper
             scraper = XScraper.from_config(self.config)
-            def on_user_done(source_name, posts):
+            # Stream per user: posts are queued as soon as each user finishes, nothing accumulates.
+            for source_name, posts in scraper.iter_all_configured_users(
+                x_accounts,
+                days_lookback=days_lookback,
+            ):
+                posts = [p for p in posts if self._claim_link(p.get('link'))]
                 if posts:
                     logger.info(f"✅ [Fetched] [X/x_scraper] {source_name}: {len(posts)} new posts")
                     self._save_raw_backup(posts, "X", source_name)
@@ -165,12 +337,6 @@ class FetcherStage:
                         self.fetch_queue.put(post)
                 else:
                     logger.info(f"ℹ️ [Fetched] [X/x_scraper] {source_name}: 0 new posts")
-
-            scraper.fetch_all_configured_users(
-                x_accounts,
-                days_lookback=days_lookback,
-                on_user_done=on_user_done,
-            )
         except Exception as e:
             logger.exception(f"x_scraper fetch failed: {e}")
             raise
@@ -193,9 +359,8 @@ class FetcherStage:
         logger.info(f"🔄 [Fetching] [{source_type}] {name} ...")
         try:
             try:
-                response = requests.get(rss_url, timeout=30)
+                response = self.session.get(rss_url, timeout=30)
                 response.raise_for_status()
-                feed = feedparser.parse(response.content)
             except requests.exceptions.Timeout:
                 logger.info(f"Timeout (30s): {rss_url}")
                 return []
@@ -203,36 +368,38 @@ class FetcherStage:
                 logger.info(f"Request failed: {e}")
                 return []
 
-            if feed.bozo and not feed.entries:
-                logger.info(f"RSS parse failed: {feed.bozo_exception}")
+            try:
+                entries = parse_feed(response.content)
+            except ValueError as e:
+                logger.info(str(e))
                 return []
 
             recent_posts = []
-            now = datetime.now(timezone.utc)
+            # Equivalent to the old `(now - post_date).days > days` check, as one float compare.
+            cutoff_ts = time.time() - (days + 1) * 86400
+            name_lc = name.lower()
 
-            for entry in feed.entries:
+            for entry in entries:
                 # 1. Date Check
-                post_date = self._parse_date(entry)
-                if not post_date or (now - post_date).days > days:
+                post_ts = self._parse_timestamp(entry)
+                if post_ts is None or post_ts <= cutoff_ts:
+                    continue
+                if not self._claim_link(entry["link"]):
                     continue
 
-                # 2. Extract Content. Parse content (handle list format from feedparser)
-                content = ""
-                if hasattr(entry, "content") and entry.content:
-                    # Usually a list of dicts like [{'type': 'text/html', 'value': '...'}]
-                    # for weixin, the content is valid, for twitter and youtube, the content is invalid
-                    content = entry.content[0].value
-                else:
-                    content = entry.get("description", "")
+                # 2. Extract Content.
+                # for weixin, the content is valid, for twitter and youtube, the content is invalid
+                content = entry["content"] or entry["description"]
 
                 # 3. Create Dict (Lightweight)
                 recent_posts.append({
-                    "title": entry.title,
-                    "date": post_date.strftime("%Y-%m-%d"),
-                    "link": entry.link,
+                    "title": entry["title"],
+                    "date": self._post_date(entry, post_ts),
+                    "link": entry["link"],
                     "rss_url": rss_url,
                     "source_type": source_type,
                     "source_name": name,
+                    "source_name_lc": name_lc,
                     "content": content,
                     # Fields to be filled by Enricher
                     "extra_content": "",   
@@ -247,24 +414,58 @@ class FetcherStage:
             logger.info(f"Fetch loop failed: {e}")
             return []
 
-    def _parse_date(self, entry):
-        if not hasattr(entry, 'published'): return None
+    def _parse_timestamp(self, entry):
+        """Return the entry's publish time as a UTC epoch float (None if missing/invalid)."""
+        # feedparser already provides a UTC struct_time; skip dateutil then (_post_date also
+        # avoids it for RFC 822 / ISO 8601 strings, so only unusual formats reach dateutil).
+        parsed = entry.get('published_parsed')
+        if parsed:
+            return float(calendar.timegm(parsed))
+        if not entry.get('published'): return None
         try:
-            dt = date_parser.parse(entry.published)
-            return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+            return _parse_date_string(entry['published'])[0]
         except:
             return None
 
+    def _post_date(self, entry, post_ts):
+        """
+        The post's calendar date in the feed's own timezone (e.g. +0800 for CN feeds),
+        not the UTC date; only falls back to UTC when the raw string is unusable.
+        """
+        try:
+            return _local_date_string(entry['published'])
+        except:
+            return time.strftime("%Y-%m-%d", time.gmtime(post_ts))
+
     def _save_raw_backup(self, posts, source_type, name):
-        """Save raw data backup."""
+        """Queue a raw data backup for the background writer."""
         if not posts: return
+        # Shallow-copy now: downstream stages fill extra_* fields on the same dicts.
+        self.backup_queue.put(([dict(p) for p in posts], source_type, name))
+
+    def _backup_loop(self):
+        """Drain queued backups in batches until the sentinel arrives."""
+        while True:
+            batch = [self.backup_queue.get()]
+            while len(batch) < self.backup_batch_size:
+                try:
+                    batch.append(self.backup_queue.get_nowait())
+                except Empty:
+                    break
+
+            for item in batch:
+                if item is not None:
+                    self._write_raw_backup(*item)
+            if None in batch:
+                break
+
+    def _write_raw_backup(self, posts, source_type, name):
+        """Save raw data backup."""
         try:
-            # stages/.. -> crawler/.. -> root
-            raw_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data', self.batch_timestamp, 'raw')
-            os.makedirs(raw_dir, exist_ok=True)
+            os.makedirs(self.raw_dir, exist_ok=True)
             filename = f"{name}.json"
-            
-            with open(os.path.join(raw_dir, filename), 'w', encoding='utf-8') as f:
-                json.dump(posts, f, ensure_ascii=False, indent=2)
+            data = dumps_json_bytes(posts)
+            with open(os.path.join(self.raw_dir, filename), 'wb') as f:
+                f.write(data)
         except Exception as e:
             logger.info(f"Backup failed: {e}")
@@ -2,14 +2,21 @@
 web_crawler.py - Web 页面抓取工具
 
 功能：
-- 使用 Selenium 抓取普通网页内容
+- 抓取普通网页内容 (优先直接 HTTP 请求，JS 渲染页面回退到 Selenium)
 - 生成网页长截图 (PNG) 和高保真 PDF 存档
 - 调用 LLM 对抓取内容进行结构化整理
 
-依赖：selenium, beautifulsoup4, openai, webdriver-manager
+依赖：requests, selenium, beautifulsoup4, openai, webdriver-manager
+可选：lxml (作为 BeautifulSoup 的 C 解析后端，显著加快大页面解析)
+可选：selectolax (lexbor 引擎，C 实现的 DOM 清洗/CSS 选择，安装后替代 BeautifulSoup 提取正文)
 """
+import atexit
 import base64
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -24,6 +31,19 @@ from common.logging import setup_logger
 
 logger = setup_logger("web_crawler")
 
+# BeautifulSoup 解析后端：优先使用 lxml (libxml2, C 实现)，未安装时回退到纯 Python 的 html.parser
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
+
+# 正文提取的 C 实现：优先使用 selectolax (lexbor)，未安装时使用 BeautifulSoup
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
 # ================= 配置区域 =================
 # 设置普通 Web URL 抓取源
 # 适用于没有 RSS 的单页面，如具体的一篇博文或静态页面
@@ -36,6 +56,29 @@ web_sources = {
 }
 # ===========================================
 
+# 定义一些绝对不想看到的噪音关键词 (大小写不敏感，统一对小写行匹配)
+# 注意：只针对短行生效，避免误删正文
+# a) 整行字面量：哈希查找
+_NOISE_LITERALS = frozenset((
+    'share this post',
+    'contents in this story',
+    'keep up with us',
+))
+# b) 行首字面量前缀：str.startswith(tuple)
+_NOISE_PREFIXES = (
+    'all rights reserved',
+    'click to share',
+    'subscribe to',
+    'share on',
+)
+# c) 真正需要正则的模式，合并为单个锚定行首的交替正则
+_NOISE_RE = re.compile(
+    r'(?:read time:?\s*\d+'
+    r'|\d+\s*min read$'
+    r'|sign up for.*newsletter'
+    r'|©\s*\d+)'
+)
+
 def _clean_text_content(text):
     """
     [Optional] 后处理清洗文本内容
@@ -44,29 +87,10 @@ def _clean_text_content(text):
     if not text:
         return ""
     
-    # 1. 移除多余空行 (保留段落结构，但去除大片空白)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    lines = text.split('\n')
     cleaned_lines = []
     
-    # 定义一些绝对不想看到的噪音关键词 (大小写不敏感)
-    # 注意：只针对短行生效，避免误删正文
-    noise_patterns = [
-        r'^share this post$',
-        r'^contents in this story$',
-        r'^read time:?\s*\d+',
-        r'^\d+\s*min read$',
-        r'^keep up with us$',
-        r'^sign up for.*newsletter',
-        r'^all rights reserved',
-        r'^©\s*\d+',
-        r'^click to share',
-        r'^subscribe to',
-        r'^share on',
-    ]
-    
-    for line in lines:
+    # 1. 逐行处理 (str.split 是单次 C 扫描；空行在此直接跳过，无需预先压缩多余空行)
+    for line in text.split('\n'):
         stripped = line.strip()
         
         # 跳过空行（后面统一 join）
@@ -74,17 +98,14 @@ def _clean_text_content(text):
             continue
             
         # 2. 检查短行噪音 (< 60 chars)
+        lower_line = stripped.lower()
         if len(stripped) < 60:
-            is_noise = False
-            for pattern in noise_patterns:
-                if re.search(pattern, stripped, re.IGNORECASE):
-                    is_noise = True
-                    break
-            if is_noise:
+            if (lower_line in _NOISE_LITERALS
+                    or lower_line.startswith(_NOISE_PREFIXES)
+                    or _NOISE_RE.match(lower_line)):
                 continue
         
         # 3. 针对特定的 Cookie/Privacy 声明段落 (长文本特征)
-        lower_line = stripped.lower()
         if "cookies" in lower_line and "browser" in lower_line and "experience" in lower_line:
             continue
         if lower_line.startswith("by submitting") and "privacy policy" in lower_line:
@@ -94,6 +115,300 @@ def _clean_text_content(text):
         
     return '\n'.join(cleaned_lines)
 
+# ================= 页面等待 =================
+# 滚动后等待 DOM 稳定：无变动 idle_ms 即返回，最长等待 timeout_ms；返回稳定后的 body 高度
+# scrollFirst 为真时先滚动到底部，使“滚动 + 等待 + 量高度”只需一次浏览器往返
+_DOM_SETTLE_SCRIPT = """
+    const done = arguments[arguments.length - 1];
+    const idleMs = arguments[0], timeoutMs = arguments[1], scrollFirst = arguments[2];
+    if (scrollFirst && document.body) window.scrollTo(0, document.body.scrollHeight);
+    const root = document.body || document.documentElement;
+    let observer = null;
+    const finish = () => {
+        clearTimeout(idle); clearTimeout(ceiling); if (observer) observer.disconnect();
+        done(document.body ? document.body.scrollHeight : 0);
+    };
+    let idle = setTimeout(finish, idleMs);
+    const ceiling = setTimeout(finish, timeoutMs);
+    if (root) {
+        observer = new MutationObserver(() => { clearTimeout(idle); idle = setTimeout(finish, idleMs); });
+        observer.observe(root, {childList: true, subtree: true, characterData: true});
+    }
+"""
+
+
+def _wait_for_dom_settle(driver, idle_ms=300, timeout_ms=1500, scroll_first=False):
+    """
+    等待懒加载内容渲染完成 (替代固定 sleep)，返回稳定后的 document.body.scrollHeight。
+    脚本执行失败时退回固定等待并返回 None
+    """
+    try:
+        return driver.execute_async_script(_DOM_SETTLE_SCRIPT, idle_ms, timeout_ms, scroll_first)
+    except Exception:
+        time.sleep(timeout_ms / 1000)
+        return None
+
+
+# ================= 浏览器复用 =================
+# 启动 Chrome 需要数秒，fetch_web_content 复用已启动的实例 (每个并发调用方一个)，
+# 而不是每个 URL 启动/退出一次。进程退出时统一 quit。
+_DRIVER_POOL_LOCK = threading.Lock()
+_IDLE_DRIVERS = []
+_ALL_DRIVERS = []
+
+# ChromeDriverManager().install() 每次都会检查版本/缓存 (可能走网络)，进程内只解析一次
+_DRIVER_PATH = None
+_DRIVER_PATH_LOCK = threading.Lock()
+
+
+def _get_chromedriver_path():
+    """返回 chromedriver 可执行文件路径 (进程内缓存)"""
+    global _DRIVER_PATH
+    with _DRIVER_PATH_LOCK:
+        if _DRIVER_PATH is None:
+            _DRIVER_PATH = ChromeDriverManager().install()
+        return _DRIVER_PATH
+
+
+def _create_content_driver():
+    """按 fetch_web_content 的配置启动一个无头 Chrome"""
+    # 配置无头浏览器
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+    
+    # 伪装 User-Agent
+    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    
+    # 规避检测
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+
+    # 只需要文本：不加载图片、屏蔽通知弹窗，减少带宽与渲染时间
+    # (截图/PDF 使用 _prepare_page_for_capture 单独建的浏览器，不受影响)
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+
+    service = Service(_get_chromedriver_path())
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    
+    # 进一步规避：移除 navigator.webdriver 标记
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": """
+        Object.defineProperty(navigator, 'webdriver', {
+          get: () => undefined
+        })
+        """
+    })
+    return driver
+
+
+def _acquire_driver():
+    """取一个空闲的 driver，没有则新建"""
+    with _DRIVER_POOL_LOCK:
+        if _IDLE_DRIVERS:
+            return _IDLE_DRIVERS.pop()
+    driver = _create_content_driver()
+    with _DRIVER_POOL_LOCK:
+        _ALL_DRIVERS.append(driver)
+    return driver
+
+
+def _release_driver(driver, healthy=True):
+    """归还 driver：清理会话状态后放回空闲池；异常过的 driver 直接退出"""
+    if healthy:
+        try:
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+        except Exception:
+            healthy = False
+
+    with _DRIVER_POOL_LOCK:
+        if healthy:
+            _IDLE_DRIVERS.append(driver)
+            return
+        if driver in _ALL_DRIVERS:
+            _ALL_DRIVERS.remove(driver)
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+@atexit.register
+def _shutdown_drivers():
+    """进程退出时关闭所有复用的浏览器"""
+    with _DRIVER_POOL_LOCK:
+        drivers = list(_ALL_DRIVERS)
+        _ALL_DRIVERS.clear()
+        _IDLE_DRIVERS.clear()
+    for driver in drivers:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+# 正文提取配置
+# 干扰元素 (连同内容整体移除)
+_NOISE_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'noscript', 'meta', 'iframe', 'svg', 'select', 'button']
+# 常见的广告/侧边栏 class/id
+_BAD_SELECTORS = [
+    '.sidebar', '#sidebar', '.ads', '.advertisement', '.social-share', 
+    '.comment-list', '.related-posts', '.menu', '#menu', '.nav', '.navigation'
+]
+# 合并为一个选择器组，一次 DOM 遍历匹配全部
+_BAD_SELECTORS_CSS = ', '.join(_BAD_SELECTORS)
+# 常见的文章容器 ID/Class (按优先级)
+_ARTICLE_SELECTORS = [
+    'article', 
+    'main',
+    '[role="main"]',
+    '.post-content', 
+    '.entry-content', 
+    '.article-content',
+    '#content',
+    '.container' 
+]
+
+
+def _extract_article(html_content, url):
+    """
+    从 HTML 中提取 (标题, 正文文本)。
+    静态抓取与 Selenium 渲染两条路径共用同一套清洗/提取逻辑。
+    """
+    if LexborHTMLParser is not None:
+        return _extract_article_lexbor(html_content, url)
+    return _extract_article_bs4(html_content, url)
+
+
+def _extract_article_lexbor(html_content, url):
+    """_extract_article 的 selectolax 实现：DOM 删除与 CSS 匹配都在 C 中完成"""
+    tree = LexborHTMLParser(html_content)
+    
+    # 内容清洗
+    tree.strip_tags(_NOISE_TAGS)
+    for node in tree.css(_BAD_SELECTORS_CSS):
+        node.decompose()
+
+    # 提取标题
+    title_node = tree.css_first('title')
+    title = title_node.text(strip=True) if title_node else ""
+    title = title or url
+    
+    content_text = ""
+    
+    # 策略A: 查找常见的文章容器
+    target_element = None
+    for selector in _ARTICLE_SELECTORS:
+        found = tree.css(selector)
+        if found:
+            # 如果找到多个，取字数最多的一个 (唯一命中时无需逐个计算文本)
+            target_element = found[0] if len(found) == 1 else max(found, key=lambda n: len(n.text()))
+            logger.info(f"-> 命中选择器提取: {selector}")
+            break
+            
+    if target_element:
+        content_text = target_element.text(separator='\n', strip=True)
+    else:
+        # 策略B: 兜底 - 提取所有P标签，但进行密度过滤
+        logger.info("-> 使用段落密度回退策略")
+        content_text = "\n".join(t for t in (p.text().strip() for p in tree.css('p')) if len(t) > 5)
+        
+    # 策略C: 如果还是没东西，Last Resort
+    if len(content_text) < 50 and tree.body:
+        content_text = tree.body.text(separator='\n', strip=True)
+
+    return title, content_text
+
+
+def _extract_article_bs4(html_content, url):
+    """_extract_article 的 BeautifulSoup 实现 (selectolax 未安装时使用)"""
+    soup = BeautifulSoup(html_content, _HTML_PARSER)
+    
+    # 内容清洗
+    # 移除干扰元素
+    for tag in soup(_NOISE_TAGS):
+        tag.decompose()
+        
+    for tag in soup.select(_BAD_SELECTORS_CSS):
+        tag.decompose()
+
+    # 提取标题
+    title = soup.title.string.strip() if soup.title and soup.title.string else url
+    
+    # 优化的提取策略
+    content_text = ""
+    
+    # 策略A: 查找常见的文章容器 ID/Class
+    target_element = None
+    for selector in _ARTICLE_SELECTORS:
+        found = soup.select(selector)
+        if found:
+            # 如果找到多个，取字数最多的一个 (唯一命中时无需逐个计算文本)
+            target_element = found[0] if len(found) == 1 else max(found, key=lambda t: len(t.get_text()))
+            logger.info(f"-> 命中选择器提取: {selector}")
+            break
+            
+    if target_element:
+        content_text = target_element.get_text(separator='\n', strip=True)
+    else:
+        # 策略B: 兜底 - 提取所有P标签，但进行密度过滤
+        logger.info("-> 使用段落密度回退策略")
+        # 过滤掉过短的导航性文字 (例如少于 5 个字)；每个段落只取一次文本
+        content_text = "\n".join(t for t in (p.get_text().strip() for p in soup.find_all('p')) if len(t) > 5)
+        
+    # 策略C: 如果还是没东西，Last Resort
+    if len(content_text) < 50 and soup.body:
+        content_text = soup.body.get_text(separator='\n', strip=True)
+
+    return title, content_text
+
+
+# 静态抓取：服务端渲染的页面无需启动浏览器，正文足够长即视为成功
+_STATIC_MIN_CHARS = 500
+_STATIC_TIMEOUT = 10
+_STATIC_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+
+def _fetch_static(url):
+    """
+    直接 HTTP 请求页面并提取正文。
+    返回 (title, content_text)；非 HTML、请求失败或正文过短 (疑似 JS 渲染) 时返回 None。
+    """
+    try:
+        resp = requests.get(url, headers=_STATIC_HEADERS, timeout=_STATIC_TIMEOUT)
+        resp.raise_for_status()
+    except requests.RequestException as e:
+        logger.info(f"-> 静态抓取失败，回退 Selenium: {e}")
+        return None
+
+    if "html" not in resp.headers.get("Content-Type", "text/html"):
+        return None
+
+    title, content_text = _extract_article(resp.content, url)
+    content_text = _clean_text_content(content_text)
+    if len(content_text) < _STATIC_MIN_CHARS:
+        logger.info(f"-> 静态内容过短 ({len(content_text)} 字符)，回退 Selenium")
+        return None
+    return title, content_text
+
+
+# 同一批次内被多条帖子引用的 URL 只抓取/清洗一次 (只缓存成功结果，LRU 淘汰)
+_CONTENT_CACHE_SIZE = 256
+_CONTENT_CACHE = OrderedDict()
+_CONTENT_CACHE_LOCK = threading.Lock()
+
+
 def fetch_web_content(url):
     """
     [Optimized] 抓取普通网页内容
@@ -103,38 +418,45 @@ def fetch_web_content(url):
     2. 模拟滚动 (Lazy Load支持)
     3. 内容清洗 (移除干扰标签)
     4. 反爬虫规避优化
+    5. 复用浏览器实例 (避免每个 URL 冷启动 Chrome)
+    6. 静态快速路径 (服务端渲染页面直接 HTTP 抓取，跳过浏览器)
+    7. 按 URL 缓存结果 (重复引用的链接不再重复抓取与清洗)
     """
+    with _CONTENT_CACHE_LOCK:
+        cached = _CONTENT_CACHE.get(url)
+        if cached is not None:
+            _CONTENT_CACHE.move_to_end(url)
+    if cached is not None:
+        logger.info(f"-> 命中网页缓存: {url}")
+        return dict(cached)
+
+    post = _fetch_web_content_uncached(url)
+    if post:
+        with _CONTENT_CACHE_LOCK:
+            _CONTENT_CACHE[url] = dict(post)
+            if len(_CONTENT_CACHE) > _CONTENT_CACHE_SIZE:
+                _CONTENT_CACHE.popitem(last=False)
+    return post
+
+
+def _fetch_web_content_uncached(url):
+    """fetch_web_content 的实际抓取逻辑 (静态快速路径 -> Selenium 回退)"""
+    static = _fetch_static(url)
+    if static:
+        title, content_text = static
+        logger.info(f"-> 静态抓取成功: {url} ({len(content_text)} 字符)")
+        return {
+            "title": title,
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "link": url,
+            "content": content_text
+        }
+
     logger.info(f"正在抓取网页(Selenium Optimized): {url} ...")
     driver = None
+    healthy = True
     try:
-        # 配置无头浏览器
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        # 伪装 User-Agent
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # 规避检测
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # 进一步规避：移除 navigator.webdriver 标记
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-            Object.defineProperty(navigator, 'webdriver', {
-              get: () => undefined
-            })
-            """
-        })
-        
+        driver = _acquire_driver()
         driver.get(url)
         
         # 1. 智能等待：等待 body 可见，最长 15秒
@@ -148,72 +470,17 @@ def fetch_web_content(url):
         logger.info("-> 触发滚动加载...")
         last_height = driver.execute_script("return document.body.scrollHeight")
         for _ in range(3): # 尝试滚动3次，不像截图那样需要特别精细，只要加载出大部分正文即可
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1.5)
-            new_height = driver.execute_script("return document.body.scrollHeight")
+            # 滚动、等待、量高度合并为一次调用
+            new_height = _wait_for_dom_settle(driver, scroll_first=True)
+            if new_height is None:
+                new_height = driver.execute_script("return document.body.scrollHeight")
             if new_height == last_height:
                 break
             last_height = new_height
         
         # 获取渲染后的 HTML
-        html_content = driver.page_source
-        soup = BeautifulSoup(html_content, 'html.parser')
+        title, content_text = _extract_article(driver.page_source, url)
         
-        # 3. 内容清洗
-        # 移除干扰元素
-        for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'noscript', 'meta', 'iframe', 'svg', 'select', 'button']):
-            tag.decompose()
-            
-        # 移除常见的广告/侧边栏 class/id
-        bad_selectors = [
-            '.sidebar', '#sidebar', '.ads', '.advertisement', '.social-share', 
-            '.comment-list', '.related-posts', '.menu', '#menu', '.nav', '.navigation'
-        ]
-        for selector in bad_selectors:
-            for tag in soup.select(selector):
-                tag.decompose()
-
-        # 提取标题
-        title = soup.title.string.strip() if soup.title else url
-        
-        # 4. 优化的提取策略
-        content_text = ""
-        
-        # 策略A: 查找常见的文章容器 ID/Class
-        article_selectors = [
-            'article', 
-            'main',
-            '[role="main"]',
-            '.post-content', 
-            '.entry-content', 
-            '.article-content',
-            '#content',
-            '.container' 
-        ]
-        
-        target_element = None
-        for selector in article_selectors:
-            found = soup.select(selector)
-            if found:
-                # 如果找到多个，取字数最多的一个
-                target_element = max(found, key=lambda t: len(t.get_text()))
-                logger.info(f"-> 命中选择器提取: {selector}")
-                break
-                
-        if target_element:
-            content_text = target_element.get_text(separator='\n', strip=True)
-        else:
-            # 策略B: 兜底 - 提取所有P标签，但进行密度过滤
-            logger.info("-> 使用段落密度回退策略")
-            paragraphs = soup.find_all('p')
-            # 过滤掉过短的导航性文字 (例如少于 5 个字)
-            valid_paragraphs = [p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 5]
-            content_text = "\n".join(valid_paragraphs)
-            
-            # 策略C: 如果还是没东西，Last Resort
-        if len(content_text) < 50 and soup.body:
-                content_text = soup.body.get_text(separator='\n', strip=True)
-
         logger.info(f"-> 原始内容长度: {len(content_text)} 字符")
         
         # [Optional] 后处理清洗
@@ -230,10 +497,33 @@ def fetch_web_content(url):
         }
     except Exception as e:
         logger.info(f"网页抓取失败: {e}")
+        healthy = False
         return None
     finally:
         if driver:
-            driver.quit()
+            _release_driver(driver, healthy)
+
+
+# 滚动容器只在首次 (或容器被移出 DOM 后) 扫描一次所有 div 来定位，之后缓存在 window 上
+_LOCATE_SCROLL_EL_JS = """
+    let el = window.__scoutScrollEl;
+    if (!el || !el.isConnected) {
+        let maxS = 0; el = document.documentElement;
+        [document.documentElement, document.body, ...document.querySelectorAll('div')].forEach(e => {
+            if(e.scrollHeight > maxS && e.offsetParent !== null) { maxS = e.scrollHeight; el = e; }
+        });
+        window.__scoutScrollEl = el;
+    }
+"""
+_SCROLL_CONTAINER_SCRIPT = _LOCATE_SCROLL_EL_JS + """
+    el.scrollTop = el.scrollHeight; 
+    window.scrollTo(0, document.body.scrollHeight);
+"""
+_SCROLL_HEIGHT_SCRIPT = _LOCATE_SCROLL_EL_JS + """
+    return Math.max(document.body.scrollHeight, document.documentElement.scrollHeight, el.scrollHeight);
+"""
+# 初始视口高度 (与 --window-size 一致)：内容不超过一屏时没有可滚动触发的懒加载
+_VIEWPORT_HEIGHT = 1080
 
 
 def _prepare_page_for_capture(url):
@@ -254,7 +544,7 @@ def _prepare_page_for_capture(url):
         chrome_options.add_argument("--window-size=1920,1080") # 设置初始窗口大小
         chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
 
-        service = Service(ChromeDriverManager().install())
+        service = Service(_get_chromedriver_path())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         
         driver.get(url)
@@ -262,35 +552,26 @@ def _prepare_page_for_capture(url):
         # 智能寻找滚动容器并触发懒加载
         logger.info("-> 正在分析页面结构并加载内容...")
         
+        # 0. 内容不超过一屏时无需滚动
+        initial_height = driver.execute_script(_SCROLL_HEIGHT_SCRIPT)
+        if initial_height <= _VIEWPORT_HEIGHT:
+            logger.info(f"-> 页面不足一屏 ({initial_height}px)，跳过滚动加载")
+            return driver, initial_height
+        
         # 1. 模拟滚动 (针对找到的元素)
         # 我们分段滚动，确保触发 Lazy Load
-        last_height = 0
+        last_height = initial_height
         
         # 最多尝试滚动 20 次，每次滚 1000px，直到滚不动
         for i in range(20):
-            driver.execute_script("""
-                let el = (function() { 
-                    let maxS = 0; let target = document.documentElement;
-                    [document.documentElement, document.body, ...document.querySelectorAll('div')].forEach(e => {
-                        if(e.scrollHeight > maxS && e.offsetParent !== null) { maxS = e.scrollHeight; target = e; }
-                    });
-                    return target;
-                })();
-                el.scrollTop = el.scrollHeight; 
-                window.scrollTo(0, document.body.scrollHeight);
-            """)
+            driver.execute_script(_SCROLL_CONTAINER_SCRIPT)
             
-            time.sleep(1.5) # 等待加载
+            _wait_for_dom_settle(driver) # 等待加载
             
-            # 检查高度是否还在增长
-            new_height = driver.execute_script("""
-                let maxS = Math.max(document.body.scrollHeight, document.documentElement.scrollHeight);
-                let divs = document.querySelectorAll('div');
-                for(let d of divs) { if(d.scrollHeight > maxS) maxS = d.scrollHeight; }
-                return maxS;
-            """)
+            # 检查高度是否还在增长 (只读文档与已定位的滚动容器，不再逐个扫描 div)
+            new_height = driver.execute_script(_SCROLL_HEIGHT_SCRIPT)
             
-            if new_height == last_height and i > 2: # 至少滚两次确认
+            if new_height == last_height: # 滚动后高度不再增长即视为加载完毕
                 logger.info(f"-> 内容加载完毕，检测到高度: {new_height}px")
                 break
             
@@ -421,11 +702,14 @@ if __name__ == "__main__":
     #     pdf_path = f"data/{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     #     capture_web_pdf(url, pdf_path)
 
-    for name, url in web_sources.items():
-        post = fetch_web_content(url)
-        if post: # 只有抓取成功才处理
-            logger.info(f"-> 成功获取网页内容")
-            final_report += f"## 来源：{name} (Web)\n{post}\n\n---\n\n"
+    # 各 URL 相互独立，并发抓取 (每个线程从浏览器池取一个 driver)；
+    # executor.map 按提交顺序返回，报告顺序与 web_sources 一致
+    with ThreadPoolExecutor(max_workers=max(1, min(4, len(web_sources)))) as executor:
+        posts = executor.map(fetch_web_content, web_sources.values())
+        for name, post in zip(web_sources, posts):
+            if post: # 只有抓取成功才处理
+                logger.info(f"-> 成功获取网页内容")
+                final_report += f"## 来源：{name} (Web)\n{post}\n\n---\n\n"
     
     # 打印最终报告
     logger.info("\n" + "="*30 + " 最终报告 " + "="*30)
@@ -3,7 +3,7 @@ import os
 import sys
 import unittest
 from urllib.parse import urlparse
-from unittest.mock import mock_open, patch
+from unittest.mock import Mock, patch
 
 # Ensure project modules are importable.
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -11,12 +11,33 @@ sys.path.insert(0, ROOT_DIR)
 
 from native_scout import pipeline
 from native_scout.utils.content_fetcher import GenericVideoFetcher
-from native_scout.stages.llm_organizer import organize_single_post
+from native_scout.stages.llm_organizer import OrganizerStage, organize_single_post
 from native_scout.stages.result_writer import WriterStage
+from native_scout.stages import source_fetcher
+from native_scout.utils import web_crawler
+from native_scout.utils.web_crawler import _clean_text_content
 from common.prompt_loader import load_prompt_template
 from common.source_loader import load_sources
 
 
+_SAMPLE_RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel><title>Feed</title>
+<item><title>Post A</title><link>https://example.com/a</link>
+<pubDate>Tue, 10 Feb 2026 08:00:00 GMT</pubDate>
+<description>&lt;p&gt;Desc A&lt;/p&gt;</description>
+<content:encoded><![CDATA[<p>Full <b>A</b></p>]]></content:encoded></item>
+</channel></rss>"""
+
+_SAMPLE_YOUTUBE_ATOM = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:media="http://search.yahoo.com/mrss/" xmlns="http://www.w3.org/2005/Atom">
+<entry><title>Video 1</title>
+<link rel="alternate" href="https://www.youtube.com/watch?v=abc"/>
+<published>2026-02-10T08:00:00+00:00</published>
+<media:group><media:description>Video desc</media:description></media:group>
+</entry></feed>"""
+
+
 class _DummyStage:
     def __init__(self, name, events):
         self.name = name
@@ -110,6 +131,12 @@ class TestPipelineFixes(unittest.TestCase):
             ],
         )
 
+    def test_organizer_rejects_unbounded_output_queue(self):
+        import queue
+
+        with self.assertRaises(ValueError):
+            OrganizerStage(queue.Queue(maxsize=10), queue.Queue(), configparser.ConfigParser())
+
     def test_writer_uses_unique_filename_suffix_for_same_event_and_date(self):
         writer = WriterStage(organize_queue=None, output_dir="D:\\virtual-output", batch_timestamp="20260207_000000")
 
@@ -130,17 +157,249 @@ class TestPipelineFixes(unittest.TestCase):
         r2 = dict(base)
         r2["link"] = "https://example.com/b"
 
-        open_mock = mock_open()
         with patch("native_scout.stages.result_writer.os.makedirs"), patch(
-            "native_scout.stages.result_writer.shutil.copy2"
-        ), patch("builtins.open", open_mock):
+            "native_scout.stages.result_writer._write_bytes"
+        ) as write_mock:
             writer._write_post_file(r1)
             writer._write_post_file(r2)
 
-        written = [call.args[0] for call in open_mock.call_args_list]
+        written = [call.args[0] for call in write_mock.call_args_list if "By-Domain" in call.args[0]]
         self.assertEqual(len(written), 2)
         self.assertNotEqual(os.path.basename(written[0]), os.path.basename(written[1]))
 
+    def test_writer_hardlinks_entity_view_to_domain_file(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = WriterStage(organize_queue=None, output_dir=tmp, batch_timestamp="20260207_000000")
+            result = {
+                "domain": "AI",
+                "event": "evt",
+                "date": "2026-02-07",
+                "quality_score": 5,
+                "source_name": "src",
+                "primary_entity": "OpenAI",
+                "link": "https://example.com/a",
+            }
+
+            writer._write_post_file(result)
+
+            domain_dir = os.path.join(tmp, "By-Domain", "AI", "high")
+            (filename,) = os.listdir(domain_dir)
+            domain_path = os.path.join(domain_dir, filename)
+            entity_path = os.path.join(tmp, "By-Entity", "OpenAI", filename)
+            self.assertTrue(os.path.samefile(domain_path, entity_path))
+            self.assertEqual(writer.entity_stats, {"OpenAI": 1})
+
+    def test_writer_resolves_entity_from_alias_contained_in_source_name(self):
+        writer = WriterStage(organize_queue=None, output_dir="unused", batch_timestamp="20260207_000000")
+        writer.source_to_entity = {"openai": "OpenAI", "openai research": "OpenAI-Research", "ai": "AI"}
+        writer._alias_scanner = writer._build_alias_scanner()
+
+        self.assertEqual(writer._resolve_source_entity("openai"), "OpenAI")
+        self.assertEqual(writer._resolve_source_entity("openai blog"), "OpenAI")
+        self.assertEqual(writer._resolve_source_entity("x_openai research team"), "OpenAI-Research")
+        # Short aliases only match exactly.
+        self.assertIsNone(writer._resolve_source_entity("daily ai news"))
+
+    def test_writer_pool_drains_queue_and_finalizes_once(self):
+        import json
+        import queue
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            q = queue.Queue(maxsize=4)
+            writer = WriterStage(q, tmp, "20260207_000000", writer_workers=3)
+            writer.start()
+            for i in range(20):
+                q.put({
+                    "domain": "AI",
+                    "event": f"evt-{i}",
+                    "date": "2026-02-07",
+                    "quality_score": i % 6,
+                    "source_name": "src",
+                    "link": f"https://example.com/{i}",
+                })
+            q.join()
+            with patch("native_scout.stages.result_writer.sys.stdout"):
+                writer.stop()
+
+            self.assertEqual(writer.total_posts, 20)
+            with open(os.path.join(tmp, "By-Domain", "AI", "posts.json"), encoding="utf-8") as f:
+                self.assertEqual(len(json.load(f)), 20)
+            with open(os.path.join(tmp, "latest_batch.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["stats"]["total_posts"], 20)
+
+    @unittest.skipIf(source_fetcher.etree is None, "lxml not installed")
+    def test_lxml_feed_parser_matches_feedparser_fields(self):
+        for sample in (_SAMPLE_RSS, _SAMPLE_YOUTUBE_ATOM):
+            fast = source_fetcher._parse_feed_lxml(sample)
+            reference = source_fetcher._feedparser_entries(sample)
+            self.assertEqual(len(fast), len(reference))
+            for got, expected in zip(fast, reference):
+                for key in ("title", "link", "published", "content", "description"):
+                    self.assertEqual(got[key], expected[key], key)
+
+    def test_parse_feed_falls_back_to_feedparser_on_undeclared_entities(self):
+        sample = b"<rss><channel><item><title>a&nbsp;b</title></item></channel></rss>"
+        entries = source_fetcher.parse_feed(sample)
+        self.assertEqual(entries[0]["title"], "a\xa0b")
+
+    def test_fetcher_raw_backups_are_flushed_on_join(self):
+        import json
+        import queue
+        import tempfile
+
+        config = configparser.ConfigParser()
+        config.add_section("x_scraper")
+        config.set("x_scraper", "enabled", "false")
+        fetcher = source_fetcher.FetcherStage(queue.Queue(), config, "20260207_000000")
+        with tempfile.TemporaryDirectory() as tmp:
+            fetcher.raw_dir = tmp
+            fetcher.start({})
+            post = {"title": "t", "extra_content": ""}
+            fetcher._save_raw_backup([post], "weixin", "WX_A")
+            post["extra_content"] = "enriched later"
+            fetcher.join()
+
+            with open(os.path.join(tmp, "WX_A.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f), [{"title": "t", "extra_content": ""}])
+
+    def test_fetch_recent_posts_keeps_entries_within_lookback_days(self):
+        import queue
+        import time
+        from email.utils import formatdate
+
+        now = time.time()
+        items = "".join(
+            f"<item><title>{title}</title><link>https://example.com/{title}</link>"
+            f"<pubDate>{formatdate(now - age_days * 86400, usegmt=True)}</pubDate></item>"
+            for title, age_days in (("fresh", 0.2), ("edge", 1.9), ("stale", 2.1))
+        )
+        feed = f"<rss><channel>{items}</channel></rss>".encode("utf-8")
+
+        config = configparser.ConfigParser()
+        fetcher = source_fetcher.FetcherStage(queue.Queue(), config, "20260207_000000")
+        response = Mock(content=feed)
+        with patch.object(fetcher.session, "get", return_value=response), patch.object(fetcher, "_save_raw_backup"):
+            posts = fetcher._fetch_recent_posts("https://example.com/feed", 1, "weixin", "WX_A")
+
+        self.assertEqual([p["title"] for p in posts], ["fresh", "edge"])
+        self.assertEqual(posts[0]["date"], time.strftime("%Y-%m-%d", time.gmtime(now - 0.2 * 86400)))
+
+        # The same links seen again (e.g. cross-posted feed) are not re-enqueued.
+        with patch.object(fetcher.session, "get", return_value=response), patch.object(fetcher, "_save_raw_backup"):
+            again = fetcher._fetch_recent_posts("https://example.com/mirror", 1, "weixin", "WX_B")
+        self.assertEqual(again, [])
+
+    def test_fetch_recent_posts_date_uses_feed_timezone(self):
+        import queue
+        import calendar
+        import time
+
+        # 07:00 +0800 on Jan 2 is still Jan 1 in UTC; the post date must follow the feed.
+        published = "Fri, 02 Jan 2026 07:00:00 +0800"
+        feed = (
+            "<rss><channel><item><title>cn</title><link>https://example.com/cn</link>"
+            f"<pubDate>{published}</pubDate></item></channel></rss>"
+        ).encode("utf-8")
+        post_ts = calendar.timegm((2026, 1, 1, 23, 0, 0))
+
+        config = configparser.ConfigParser()
+        fetcher = source_fetcher.FetcherStage(queue.Queue(), config, "20260207_000000")
+        response = Mock(content=feed)
+        with patch.object(fetcher.session, "get", return_value=response), \
+                patch.object(fetcher, "_save_raw_backup"), \
+                patch.object(source_fetcher.time, "time", return_value=post_ts + 3600):
+            posts = fetcher._fetch_recent_posts("https://example.com/cn-feed", 1, "weixin", "WX_CN")
+
+        self.assertEqual([p["date"] for p in posts], ["2026-01-02"])
+        # feedparser entries carry a UTC published_parsed; the date still comes from the raw string.
+        entry = {"published": published, "published_parsed": time.gmtime(post_ts)}
+        self.assertEqual(fetcher._parse_timestamp(entry), float(post_ts))
+        self.assertEqual(fetcher._post_date(entry, post_ts), "2026-01-02")
+
+        # RFC 822 / ISO 8601 strings get their local date without dateutil.
+        source_fetcher._local_date_string.cache_clear()
+        with patch.object(source_fetcher.date_parser, "parse") as mock_parse:
+            self.assertEqual(source_fetcher._local_date_string(published), "2026-01-02")
+            self.assertEqual(source_fetcher._local_date_string("2026-01-02T07:00:00+08:00"), "2026-01-02")
+        mock_parse.assert_not_called()
+        self.assertEqual(source_fetcher._local_date_string("January 2, 2026 7:00 AM"), "2026-01-02")
+
+    def test_clean_text_content_drops_noise_lines_only(self):
+        text = "\n".join([
+            "  Title of the post  ",
+            "",
+            "",
+            "",
+            "Share this post",
+            "5 min read",
+            "READ TIME: 3 minutes",
+            "© 2026 Example Inc.",
+            "Sign up for our weekly newsletter",
+            "Subscribe to updates",
+            "Share on X",
+            "We use cookies to give you the best browser experience on our site.",
+            "By submitting this form you agree to our Privacy Policy.",
+            "Share this post with everyone you know because this line is long enough to be body text.",
+            "Body paragraph.",
+        ])
+        self.assertEqual(
+            _clean_text_content(text),
+            "Title of the post\n"
+            "Share this post with everyone you know because this line is long enough to be body text.\n"
+            "Body paragraph.",
+        )
+        self.assertEqual(_clean_text_content(""), "")
+
+    def test_fetch_web_content_uses_static_path_for_server_rendered_pages(self):
+        body = "".join(f"<p>Paragraph {i} of the server rendered article body text.</p>" for i in range(20))
+        response = Mock(content=f"<html><head><title>Static</title></head><body><article>{body}</article></body></html>".encode(),
+                        headers={"Content-Type": "text/html; charset=utf-8"})
+        with patch.object(web_crawler.requests, "get", return_value=response), \
+                patch.object(web_crawler, "_acquire_driver") as acquire:
+            post = web_crawler.fetch_web_content("https://example.com/static")
+        acquire.assert_not_called()
+        self.assertEqual(post["title"], "Static")
+        self.assertIn("Paragraph 19", post["content"])
+
+        response.content = b"<html><body><div id='root'></div></body></html>"
+        with patch.object(web_crawler.requests, "get", return_value=response), \
+                patch.object(web_crawler, "_acquire_driver", side_effect=RuntimeError("no browser")) as acquire:
+            self.assertIsNone(web_crawler.fetch_web_content("https://example.com/spa"))
+        acquire.assert_called_once()
+
+    def test_fetch_web_content_caches_successful_results_per_url(self):
+        web_crawler._CONTENT_CACHE.clear()
+        body = "".join(f"<p>Cached paragraph {i} of the server rendered article body.</p>" for i in range(20))
+        response = Mock(content=f"<html><body><article>{body}</article></body></html>".encode(),
+                        headers={"Content-Type": "text/html"})
+        with patch.object(web_crawler.requests, "get", return_value=response) as get:
+            first = web_crawler.fetch_web_content("https://example.com/cached")
+            first["content"] = "mutated by caller"
+            second = web_crawler.fetch_web_content("https://example.com/cached")
+        get.assert_called_once()
+        self.assertIn("Cached paragraph 0", second["content"])
+
+    @unittest.skipIf(web_crawler.LexborHTMLParser is None, "selectolax not installed")
+    def test_lexbor_article_extraction_matches_beautifulsoup(self):
+        samples = [
+            "<html><head><title> Post </title><script>var x;</script></head><body><nav>Home</nav>"
+            "<div class='sidebar'>Ads here</div><main><p>Short</p></main>"
+            "<article><h1>Heading</h1><p>First <b>bold</b> paragraph of the article.</p>\n"
+            "<div class='social-share'>Share</div><p>Second paragraph.</p></article>"
+            "<article><p>Tiny</p></article></body></html>",
+            "<html><body><div><p>ok</p><p>Fallback paragraph one is long.</p><p>Another <i>one</i> here.</p>"
+            "<footer><p>Footer text paragraph</p></footer></div></body></html>",
+            "<html><head><title>Only body</title></head><body><div>Just some text in a div.</div></body></html>",
+        ]
+        for html in samples:
+            fast_title, fast_text = web_crawler._extract_article_lexbor(html, "https://example.com")
+            ref_title, ref_text = web_crawler._extract_article_bs4(html, "https://example.com")
+            self.assertEqual(fast_title, ref_title)
+            self.assertEqual(_clean_text_content(fast_text), _clean_text_content(ref_text))
+
     def test_organize_single_post_uses_injected_client_and_config(self):
         fake_client = _FakeClient()
 
@@ -171,6 +430,7 @@ class TestPipelineFixes(unittest.TestCase):
         self.assertEqual(fake_client.kwargs["model"], "unit-test-model")
         self.assertEqual(result["source_name"], "source")
         self.assertEqual(result["link"], "https://example.com")
+        self.assertNotIn("content", result)
 
     def test_extract_youtube_id_non_youtube_and_non_video_paths_do_not_crash(self):
         fetcher = GenericVideoFetcher()
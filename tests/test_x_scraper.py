@@ -16,6 +16,7 @@ test_x_scraper.py - x_scraper 模块自动化测试
 import os
 import sys
 import json
+import time
 import pytest
 from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
@@ -93,6 +94,17 @@ SAMPLE_TWEET_RESULT = {
     "source": '<a href="https://mobile.twitter.com" rel="nofollow">Twitter Web App</a>',
 }
 
+SAMPLE_TWEET_RESULT_2 = {
+    **SAMPLE_TWEET_RESULT,
+    "rest_id": "1234567891",
+    "legacy": {
+        **SAMPLE_TWEET_LEGACY,
+        "id_str": "1234567891",
+        "full_text": "Second test tweet about #DeepSeek",
+        "created_at": "Mon Feb 10 10:00:00 +0000 2026",
+    },
+}
+
 SAMPLE_TIMELINE_RESPONSE = {
     "data": {
         "user": {
@@ -120,16 +132,7 @@ SAMPLE_TIMELINE_RESPONSE = {
                                             "entryType": "TimelineTimelineItem",
                                             "itemContent": {
                                                 "tweet_results": {
-                                                    "result": {
-                                                        **SAMPLE_TWEET_RESULT,
-                                                        "rest_id": "1234567891",
-                                                        "legacy": {
-                                                            **SAMPLE_TWEET_LEGACY,
-                                                            "id_str": "1234567891",
-                                                            "full_text": "Second test tweet about #DeepSeek",
-                                                            "created_at": "Mon Feb 10 10:00:00 +0000 2026",
-                                                        },
-                                                    },
+                                                    "result": SAMPLE_TWEET_RESULT_2,
                                                 },
                                             },
                                         },
@@ -222,7 +225,8 @@ class TestTweetModel:
         assert "Test tweet" in post["title"]
         assert "extra_content" in post
         assert "extra_urls" in post
-        assert isinstance(post["extra_urls"], list)
+        assert type(post["extra_urls"]) is tuple
+        assert post["extra_urls"] == ("https://example.com/article",)
 
     def test_to_post_dict_retweet(self):
         """测试转推的 post dict 标题格式"""
@@ -391,6 +395,26 @@ class TestTweetParser:
         assert tweet.media[0].width == 1200
         assert tweet.media[0].alt_text == "A test image"
 
+    def test_extract_media_video_picks_highest_mp4_bitrate(self):
+        """测试视频取码率最高的 mp4 变体 (忽略 m3u8，缺失 bitrate 视为 0)"""
+        legacy = {"extended_entities": {"media": [{
+            "type": "video",
+            "media_url_https": "https://pbs.twimg.com/thumb.jpg",
+            "video_info": {
+                "duration_millis": 1500,
+                "variants": [
+                    {"content_type": "application/x-mpegURL", "url": "https://v/pl.m3u8"},
+                    {"content_type": "video/mp4", "url": "https://v/low.mp4"},
+                    {"content_type": "video/mp4", "bitrate": 2176000, "url": "https://v/high.mp4"},
+                    {"content_type": "video/mp4", "bitrate": 832000, "url": "https://v/mid.mp4"},
+                ],
+            },
+        }]}}
+        media = self.parser._extract_media(legacy)[0]
+        assert media.url == "https://v/high.mp4"
+        assert media.preview_url == "https://pbs.twimg.com/thumb.jpg"
+        assert media.duration_ms == 1500
+
     def test_parse_timeline_source(self):
         """测试发布客户端解析"""
         tweets, _ = self.parser.parse_timeline(SAMPLE_TIMELINE_RESPONSE)
@@ -407,6 +431,26 @@ class TestTweetParser:
         assert tweet.created_at.month == 2
         assert tweet.created_at.day == 10
 
+    def test_parse_timeline_from_raw_bytes(self):
+        """测试直接解析原始响应体 (bytes) 与解析 dict 结果一致"""
+        raw = json.dumps(SAMPLE_TIMELINE_RESPONSE).encode()
+        from_bytes, cursor_bytes = self.parser.parse_timeline(raw)
+        from_dict, cursor_dict = self.parser.parse_timeline(SAMPLE_TIMELINE_RESPONSE)
+        assert [t.id for t in from_bytes] == [t.id for t in from_dict]
+        assert [t.text for t in from_bytes] == [t.text for t in from_dict]
+        assert cursor_bytes == cursor_dict
+        assert TweetParser.parse_user_id(json.dumps(SAMPLE_USER_BY_SCREEN_NAME_RESPONSE).encode()) == "999888777"
+        assert TweetParser.parse_user_id(b"not json") is None
+
+    def test_parse_date_matches_strptime(self):
+        """测试定位解析与 strptime 结果一致，且非 UTC 偏移仍可解析"""
+        from x_scraper.parser import TWITTER_DATE_FORMAT
+        for s in ("Mon Feb 10 12:34:56 +0000 2026", "Sun Dec 31 23:59:59 +0000 2023",
+                  "Tue Mar 03 01:02:03 +0530 2026"):
+            assert self.parser._parse_date(s) == datetime.strptime(s, TWITTER_DATE_FORMAT)
+        assert self.parser._parse_date("Mon Foo 10 12:34:56 +0000 2026") is None
+        assert self.parser._parse_date("") is None
+
     def test_parse_empty_timeline(self):
         """测试空 timeline"""
         response = {"data": {"user": {"result": {"timeline_v2": {"timeline": {"instructions": []}}}}}}
@@ -527,6 +571,61 @@ class TestTweetParser:
         assert tweet.quoted_tweet is not None
         assert tweet.quoted_tweet.text == "Quoted tweet content"
 
+    def test_parse_retweet_of_quote_tweet(self):
+        """测试转推的原推文本身是引用推文 (嵌套两层)"""
+        quoted = {
+            **SAMPLE_TWEET_RESULT,
+            "rest_id": "8888",
+            "legacy": {**SAMPLE_TWEET_LEGACY, "id_str": "8888"},
+        }
+        original = {
+            **SAMPLE_TWEET_RESULT,
+            "rest_id": "9999",
+            "legacy": {**SAMPLE_TWEET_LEGACY, "id_str": "9999"},
+            "quoted_status_result": {"result": quoted},
+        }
+        rt_result = {
+            **SAMPLE_TWEET_RESULT,
+            "legacy": {**SAMPLE_TWEET_LEGACY, "retweeted_status_result": {"result": original}},
+        }
+        tweet = self.parser._parse_tweet_result(rt_result)
+        assert tweet.is_retweet is True and tweet.is_quote is False
+        assert tweet.retweeted_tweet.id == "9999"
+        assert tweet.retweeted_tweet.is_quote is True
+        assert tweet.retweeted_tweet.quoted_tweet.id == "8888"
+
+    def test_parse_tweet_with_null_interned_fields(self):
+        """lang / source / media type 为显式 null 时推文仍被解析 (取空字符串)"""
+        result = {
+            **SAMPLE_TWEET_RESULT,
+            "source": None,
+            "legacy": {
+                **SAMPLE_TWEET_LEGACY,
+                "lang": None,
+                "extended_entities": {"media": [{"type": None, "media_url_https": "https://pbs.twimg.com/x.jpg"}]},
+            },
+        }
+        tweet = self.parser._parse_tweet_result(result)
+        assert tweet is not None
+        assert tweet.lang == ""
+        assert tweet.source == ""
+        assert tweet.media[0].type == ""
+
+    def test_parse_tweet_with_null_user_names(self):
+        """用户 screen_name / name 为显式 null 时推文仍被解析"""
+        result = {
+            **SAMPLE_TWEET_RESULT,
+            "core": {"user_results": {"result": {
+                "rest_id": "999888777",
+                "legacy": {"screen_name": None, "name": None},
+            }}},
+        }
+        tweet = self.parser._parse_tweet_result(result)
+        assert tweet is not None
+        assert tweet.username == ""
+        assert tweet.display_name == ""
+        assert tweet.user_id == "999888777"
+
 
 # ============================================================
 # 单元测试: AccountPool
@@ -601,6 +700,29 @@ class TestAccountPool:
         assert not a1.is_available
         assert pool.available_count == 1
 
+    def test_dead_accounts_leave_rotation(self):
+        """测试失效账号移出轮换，其余账号保持轮换顺序"""
+        pool = AccountPool([("t1", "c1"), ("t2", "c2"), ("t3", "c3")])
+        pool.mark_dead(pool.accounts[1])
+
+        tokens = [pool.get_next().auth_token for _ in range(4)]
+        assert tokens == ["t1", "t3", "t1", "t3"]
+        assert pool.accounts[1] not in pool._rotation
+        assert pool.total_count == 3
+
+    def test_get_next_batch(self):
+        """测试批量获取: 按轮换顺序返回，跳过不可用账号"""
+        pool = AccountPool([("t1", "c1"), ("t2", "c2"), ("t3", "c3")])
+        pool.mark_rate_limited(pool.accounts[1], cooldown_seconds=60)
+
+        batch = pool.get_next_batch(3)
+        assert [a.auth_token for a in batch] == ["t1", "t3", "t1"]
+        assert pool.accounts[0].request_count == 2
+
+        for a in pool.accounts:
+            pool.mark_dead(a)
+        assert pool.get_next_batch(2) == []
+
     def test_all_unavailable_returns_none(self):
         """测试所有账号不可用时返回 None"""
         pool = AccountPool([("t1", "c1")])
@@ -631,6 +753,28 @@ class TestAccountPool:
         a = pool.get_next()
         assert a.request_count == 2
 
+    def test_wait_for_available_wakes_on_state_change(self):
+        """测试等待中的线程在账号状态变化时被提前唤醒"""
+        import threading
+
+        pool = AccountPool([("t1", "c1"), ("t2", "c2")])
+        a1, a2 = pool.accounts
+        pool.mark_rate_limited(a1, cooldown_seconds=120)
+        pool.mark_rate_limited(a2, cooldown_seconds=120)
+
+        result = {}
+        waiter = threading.Thread(target=lambda: result.setdefault("acct", pool.wait_for_available(timeout=30)))
+        start = time.monotonic()
+        waiter.start()
+        time.sleep(0.1)
+        pool.mark_dead(a1)
+        pool.mark_rate_limited(a2, cooldown_seconds=0)  # 冷却提前结束
+        waiter.join(timeout=5)
+
+        assert not waiter.is_alive()
+        assert result["acct"] is a2
+        assert time.monotonic() - start < 5
+
     def test_from_env_file(self, tmp_path):
         """测试从 .env 文件加载"""
         env_file = tmp_path / "test.env"
@@ -645,6 +789,17 @@ class TestAccountPool:
         assert a.auth_token == "test_auth_token_here"
         assert a.ct0 == "test_ct0_value_here"
 
+    def test_from_env_file_reparses_after_edit(self, tmp_path):
+        """测试 .env 解析缓存: 文件修改后应读到新凭证"""
+        env_file = tmp_path / "test.env"
+        env_file.write_text('TWITTER_AUTH_TOKEN="old_token"\nTWITTER_CT0="old_ct0"\n')
+        assert AccountPool.from_env_file(str(env_file)).accounts[0].auth_token == "old_token"
+
+        env_file.write_text('TWITTER_AUTH_TOKEN="new_token_value"\nTWITTER_CT0="new_ct0"\n')
+        pool = AccountPool.from_env_file(str(env_file))
+        assert pool.accounts[0].auth_token == "new_token_value"
+        assert pool.accounts[0].ct0 == "new_ct0"
+
     def test_from_env_file_not_found(self):
         """测试文件不存在报错"""
         with pytest.raises(FileNotFoundError):
@@ -669,13 +824,19 @@ class TestXClient:
         """测试请求头构建"""
         client = self._make_client()
         account = client.account_pool.get_next()
-        headers = client._build_headers(account)
+        headers = client._build_headers(account, user_agent="test-ua")
 
+        assert headers["user-agent"] == "test-ua"
         assert "authorization" in headers
         assert "Bearer" in headers["authorization"]
         assert headers["x-csrf-token"] == "test_ct0"
         assert headers["x-twitter-auth-type"] == "OAuth2Session"
 
+        # 固定头部模板不应被单次请求修改，且头部顺序保持不变
+        from x_scraper.client import _STATIC_HEADERS
+        assert _STATIC_HEADERS["user-agent"] == ""
+        assert list(headers) == list(_STATIC_HEADERS)
+
     def test_build_cookies(self):
         """测试 Cookie 构建"""
         client = self._make_client()
@@ -689,12 +850,119 @@ class TestXClient:
         """测试 user_id 缓存机制"""
         client = self._make_client()
         # 预填缓存
-        client._user_id_cache["testuser"] = "12345"
+        client._cache_user_id("testuser", "12345")
 
         # 不应该发出网络请求
         user_id = client.get_user_id("testuser")
         assert user_id == "12345"
 
+    def test_get_user_tweets_all_uses_page_size(self):
+        """分页大小可配置 (上限 100)，最后一页只请求剩余数量"""
+        from x_scraper.client import XClient
+
+        pool = AccountPool([("tok", "ct0")])
+        assert XClient(account_pool=pool).default_page_size == 100
+        assert XClient(account_pool=pool, page_size=500).default_page_size == 100
+
+        client = XClient(account_pool=pool, page_size=50)
+        with patch.object(client, "get_user_tweets", return_value=([], None)) as mock_get:
+            client.get_user_tweets_all("12345", limit=200)
+            assert mock_get.call_args.kwargs["count"] == 50
+            client.get_user_tweets_all("12345", limit=30)
+            assert mock_get.call_args.kwargs["count"] == 30
+
+    def test_user_id_cache_expires_and_evicts(self):
+        """user_id 缓存: 过期条目失效，超出容量时淘汰最久未使用的"""
+        from x_scraper import client as client_module
+
+        client = self._make_client()
+        client._cache_user_id("old", "1")
+        client._user_id_cache["old"] = ("1", time.monotonic() - client_module.USER_ID_CACHE_TTL - 1)
+        assert client._get_cached_user_id("old") is None
+        assert "old" not in client._user_id_cache
+
+        with patch.object(client_module, "USER_ID_CACHE_SIZE", 2):
+            client._cache_user_id("a", "1")
+            client._cache_user_id("b", "2")
+            assert client._get_cached_user_id("a") == "1"  # a 变为最近使用
+            client._cache_user_id("c", "3")
+        assert list(client._user_id_cache) == ["a", "c"]
+
+    def test_user_id_hint_skips_lookup(self):
+        """提供 user_id_hint 时直接采用，不发请求；纯数字用户名仍正常查询"""
+        client = self._make_client()
+        client._request_with_retry = MagicMock(return_value=SAMPLE_USER_BY_SCREEN_NAME_RESPONSE)
+
+        assert client.get_user_id("KarPathy", user_id_hint="33836629") == "33836629"
+        assert client.get_user_id("karpathy") == "33836629"
+        client._request_with_retry.assert_not_called()
+
+        client.get_user_id("123456")  # 纯数字的用户名
+        assert client._request_with_retry.call_count == 1
+
+    def test_user_id_cache_persists_to_disk(self, tmp_path):
+        """user_id_cache_path: 新缓存在 flush/close 时写入磁盘，新实例加载后无需再请求；过期条目不加载"""
+        from x_scraper.client import XClient, USER_ID_CACHE_TTL
+
+        cache_file = tmp_path / "user_ids.json"
+        pool = AccountPool([("test_token", "test_ct0")])
+        client = XClient(account_pool=pool, user_id_cache_path=str(cache_file))
+        client._cache_user_id("karpathy", "33836629")
+        assert not cache_file.exists()  # 写入缓存时不做文件 IO
+        with patch("x_scraper.client.os.replace", wraps=os.replace) as mock_replace:
+            client.close()
+            client.flush_user_id_cache()  # 没有新条目时不重复写
+        assert mock_replace.call_count == 1
+        assert json.loads(cache_file.read_text())["karpathy"][0] == "33836629"
+
+        data = json.loads(cache_file.read_text())
+        data["stale"] = ["1", time.time() - USER_ID_CACHE_TTL - 10]
+        cache_file.write_text(json.dumps(data))
+
+        reloaded = XClient(account_pool=pool, user_id_cache_path=str(cache_file))
+        reloaded._request_with_retry = MagicMock()
+        assert reloaded.get_user_id("karpathy") == "33836629"
+        reloaded._request_with_retry.assert_not_called()
+        assert "stale" not in reloaded._user_id_cache
+
+        cache_file.write_text("not json")
+        assert len(XClient(account_pool=pool, user_id_cache_path=str(cache_file))._user_id_cache) == 0
+
+    def test_get_user_tweets_endpoint_by_include_replies(self):
+        """include_replies 且配置了 UserTweetsAndReplies 时请求该 endpoint，否则使用 UserTweets；withReplies 随之下发"""
+        from urllib.parse import parse_qs, urlparse
+        from x_scraper.client import XClient
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool, query_ids={"UserTweetsAndReplies": "replies_qid"})
+        client._request_with_retry = MagicMock(return_value=SAMPLE_TIMELINE_RESPONSE)
+
+        def sent_variables():
+            qs = parse_qs(urlparse(client._request_with_retry.call_args[0][0]).query)
+            return json.loads(qs["variables"][0])
+
+        client.get_user_tweets("44196397", include_replies=True)
+        assert "/replies_qid/UserTweetsAndReplies?" in client._request_with_retry.call_args[0][0]
+        assert sent_variables()["withReplies"] is True
+        client.get_user_tweets("44196397")
+        assert "/UserTweets?" in client._request_with_retry.call_args[0][0]
+        assert sent_variables()["withReplies"] is False
+
+        default_client = self._make_client()
+        default_client._request_with_retry = MagicMock(return_value=SAMPLE_TIMELINE_RESPONSE)
+        default_client.get_user_tweets("44196397", include_replies=True)
+        assert "/UserTweets?" in default_client._request_with_retry.call_args[0][0]
+
+    def test_user_id_cache_ignores_case(self):
+        """用户名大小写不同也应命中同一缓存"""
+        client = self._make_client()
+        client._request_with_retry = MagicMock(return_value=SAMPLE_USER_BY_SCREEN_NAME_RESPONSE)
+
+        first = client.get_user_id("OpenAI")
+        second = client.get_user_id("openai")
+
+        assert first == second
+        assert client._request_with_retry.call_count == 1
+
 
 # ============================================================
 # 单元测试: XScraper (高层编排)
@@ -742,6 +1010,98 @@ class TestXScraper:
         assert scraper.include_retweets is True
         assert scraper.account_pool.total_count == 2
 
+    def test_from_config_value_types(self):
+        """from_config 的类型转换与 configparser 一致 (浮点、yes/no 布尔)；缺失项取默认值"""
+        import configparser
+
+        config = configparser.ConfigParser()
+        config.optionxform = str
+        config.add_section('x_scraper')
+        config.set('x_scraper', 'auth_credentials', 'tok1:ct01')
+        config.set('x_scraper', 'request_delay_min', '1.5')
+        config.set('x_scraper', 'include_replies', 'yes')
+        config.set('x_scraper', 'max_workers', '3')
+
+        scraper = __import__('x_scraper').XScraper.from_config(config)
+        assert scraper.request_delay == (1.5, 25.0)
+        assert scraper.include_replies is True
+        assert scraper.include_retweets is False
+        assert scraper.max_workers == 3
+        assert scraper.max_tweets_per_user == 20
+
+        config.set('x_scraper', 'include_replies', 'maybe')
+        with pytest.raises(ValueError):
+            __import__('x_scraper').XScraper.from_config(config)
+
+    def test_iter_all_configured_users_streams_per_user(self):
+        """逐个产出每个用户的结果；抓取失败的用户产出空列表，不中断后续用户"""
+        from x_scraper import XScraper
+
+        scraper = XScraper(account_pool=AccountPool([("tok", "ct0")]), user_switch_delay=(0, 0))
+        fetched = []
+
+        def fake_fetch(username, source_name, days_lookback):
+            fetched.append(username)
+            if username == "bad":
+                raise RuntimeError("boom")
+            return [{"link": f"https://x.com/{username}/status/1"}]
+
+        with patch.object(scraper, "fetch_user_tweets_as_posts", side_effect=fake_fetch), \
+                patch("x_scraper.scraper.time.sleep"):
+            stream = scraper.iter_all_configured_users({"A": "a", "B": "bad", "C": "c"})
+            assert next(stream) == ("A", [{"link": "https://x.com/a/status/1"}])
+            assert fetched == ["a"]  # 后续用户尚未抓取
+            with patch.object(scraper.client, "flush_user_id_cache") as mock_flush:
+                assert list(stream) == [("B", []), ("C", [{"link": "https://x.com/c/status/1"}])]
+            mock_flush.assert_called_once()  # 整批结束后写回一次 user_id 缓存
+
+            done = []
+            results = scraper.fetch_all_configured_users(
+                {"A": "a"}, on_user_done=lambda name, posts: done.append(name)
+            )
+        assert results == {"A": [{"link": "https://x.com/a/status/1"}]}
+        assert done == ["A"]
+
+    def test_iter_all_configured_users_concurrent(self):
+        """max_workers > 1 且有多个账号时并发抓取: 用户同时在途，且不插入用户切换延迟"""
+        import threading
+        from x_scraper import XScraper
+
+        pool = AccountPool([("tok1", "ct01"), ("tok2", "ct02")])
+        scraper = XScraper(account_pool=pool, max_workers=4)
+        barrier = threading.Barrier(2, timeout=5)  # 并发数被账号数限制为 2
+
+        def fake_fetch(username, source_name, days_lookback):
+            barrier.wait()
+            if username == "bad":
+                raise RuntimeError("boom")
+            return [{"link": f"https://x.com/{username}/status/1"}]
+
+        with patch.object(scraper, "fetch_user_tweets_as_posts", side_effect=fake_fetch), \
+                patch("x_scraper.scraper.time.sleep") as mock_sleep:
+            results = scraper.fetch_all_configured_users({"A": "a", "B": "bad", "C": "c", "D": "d"})
+
+        assert results == {
+            "A": [{"link": "https://x.com/a/status/1"}],
+            "B": [],
+            "C": [{"link": "https://x.com/c/status/1"}],
+            "D": [{"link": "https://x.com/d/status/1"}],
+        }
+        mock_sleep.assert_not_called()
+
+    def test_dump_posts_matches_stdlib_output(self):
+        """输出文件: orjson 快速路径与标准库回退的字节完全一致 (UTF-8 原文；默认紧凑，pretty 缩进 2)"""
+        from x_scraper import scraper as scraper_module
+
+        posts = [{"title": "中文 标题", "extra_urls": ("https://a.com",), "count": 3, "none": None}]
+        compact = json.dumps(posts, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        pretty = json.dumps(posts, ensure_ascii=False, indent=2).encode('utf-8')
+        assert scraper_module._dump_posts(posts) == compact
+        assert scraper_module._dump_posts(posts, pretty=True) == pretty
+        with patch.object(scraper_module, "orjson", None):
+            assert scraper_module._dump_posts(posts) == compact
+            assert scraper_module._dump_posts(posts, pretty=True) == pretty
+
 
 # ============================================================
 # 单元测试: Code Review 修复验证
@@ -751,8 +1111,8 @@ class TestReviewFixes:
     """验证 Code Review 发现的 Bug 修复"""
 
     def test_retry_after_non_integer(self):
-        """Task 2: retry-after 为 HTTP-date 时不应崩溃"""
-        from x_scraper.client import XClient, RateLimitError
+        """Task 2: retry-after 为 HTTP-date 时按日期计算，并受上限约束"""
+        from x_scraper.client import XClient, RateLimitError, MAX_RETRY_AFTER_SECONDS
 
         pool = AccountPool([("test_token", "test_ct0")])
         client = XClient(account_pool=pool, max_retries=1)
@@ -762,13 +1122,28 @@ class TestReviewFixes:
         mock_response.status_code = 429
         mock_response.headers = {"retry-after": "Thu, 01 Jan 2099 00:00:00 GMT"}
 
-        with patch.object(client, '_curl_requests' if client._use_curl_cffi else '_requests') as mock_req:
-            mock_req.get.return_value = mock_response
-            # 应该抛出 RateLimitError（使用默认 900s），而不是 ValueError
+        with patch.object(client, '_get_session') as mock_get_session:
+            mock_get_session.return_value.get.return_value = mock_response
+            # 应该抛出 RateLimitError（远期日期截断到上限），而不是 ValueError
             with pytest.raises(RateLimitError) as exc_info:
                 account = pool.get_next()
                 client._make_request("https://x.com/test", {}, account)
-            assert exc_info.value.retry_after == 900
+            assert exc_info.value.retry_after == MAX_RETRY_AFTER_SECONDS
+
+    def test_parse_retry_after_formats(self):
+        """Task 2: retry-after 支持秒数 / HTTP-date，异常值回退默认"""
+        from email.utils import format_datetime
+        from datetime import timedelta
+        from x_scraper.client import _parse_retry_after, DEFAULT_RETRY_AFTER_SECONDS
+
+        assert _parse_retry_after("120") == 120
+        assert _parse_retry_after("-5") == 0
+        assert _parse_retry_after("") == DEFAULT_RETRY_AFTER_SECONDS
+        assert _parse_retry_after("not a date") == DEFAULT_RETRY_AFTER_SECONDS
+
+        soon = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=90), usegmt=True)
+        assert 85 <= _parse_retry_after(soon) <= 90
+        assert _parse_retry_after("Thu, 01 Jan 1970 00:00:00 GMT") == 0
 
     def test_graphql_error_detected(self):
         """Task 3: HTTP 200 + GraphQL errors 应被检测"""
@@ -784,8 +1159,8 @@ class TestReviewFixes:
             "errors": [{"message": "Rate limit exceeded", "code": 88}]
         }
 
-        with patch.object(client, '_curl_requests' if client._use_curl_cffi else '_requests') as mock_req:
-            mock_req.get.return_value = mock_response
+        with patch.object(client, '_get_session') as mock_get_session:
+            mock_get_session.return_value.get.return_value = mock_response
             with pytest.raises(RateLimitError):
                 account = pool.get_next()
                 client._make_request("https://x.com/test", {}, account)
@@ -804,12 +1179,56 @@ class TestReviewFixes:
             "data": {"user": {"result": {"rest_id": "123"}}}
         }
 
-        with patch.object(client, '_curl_requests' if client._use_curl_cffi else '_requests') as mock_req:
-            mock_req.get.return_value = mock_response
+        with patch.object(client, '_get_session') as mock_get_session:
+            mock_get_session.return_value.get.return_value = mock_response
             account = pool.get_next()
             result = client._make_request("https://x.com/test", {}, account)
             assert "data" in result  # 有 data 时应正常返回
 
+    def test_make_request_decodes_raw_content(self):
+        """HTTP 200 时直接解码 response.content，而不是依赖 response.json()"""
+        from x_scraper.client import XClient
+
+        pool = AccountPool([("test_token", "test_ct0")])
+        client = XClient(account_pool=pool)
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps(SAMPLE_USER_BY_SCREEN_NAME_RESPONSE).encode()
+
+        with patch.object(client, '_get_session') as mock_get_session:
+            mock_get_session.return_value.get.return_value = mock_response
+            account = pool.get_next()
+            result = client._make_request("https://x.com/test", {}, account)
+        assert result == SAMPLE_USER_BY_SCREEN_NAME_RESPONSE
+        mock_response.json.assert_not_called()
+
+    def test_session_reused_per_impersonate(self):
+        """同一 impersonate 复用 Session，且每次请求后清空 Session Cookie"""
+        from x_scraper.client import XClient, UA_PROFILES
+
+        pool = AccountPool([("test_token", "test_ct0")])
+        client = XClient(account_pool=pool)
+        client._use_curl_cffi = True
+        client._curl_requests = MagicMock()
+        session = client._curl_requests.Session.return_value
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = b'{"data": {}}'
+        session.get.return_value = mock_response
+
+        with patch.object(client, '_pick_client_profile', return_value=UA_PROFILES[0]):
+            for _ in range(3):
+                client._make_request("https://x.com/test", {}, pool.get_next())
+
+        client._curl_requests.Session.assert_called_once_with(impersonate=UA_PROFILES[0]["impersonate"])
+        assert session.get.call_count == 3
+        assert session.cookies.clear.call_count == 3
+
+        client.close()
+        session.close.assert_called_once()
+        assert all(not table.sessions for table in client._session_tables)
+
     def test_graphql_auth_error_detected(self):
         """Task 3: HTTP 200 + GraphQL auth 错误应映射为 AuthError"""
         from x_scraper.client import XClient, AuthError
@@ -823,12 +1242,31 @@ class TestReviewFixes:
             "errors": [{"message": "Could not authenticate you", "code": 89}]
         }
 
-        with patch.object(client, '_curl_requests' if client._use_curl_cffi else '_requests') as mock_req:
-            mock_req.get.return_value = mock_response
+        with patch.object(client, '_get_session') as mock_get_session:
+            mock_get_session.return_value.get.return_value = mock_response
             with pytest.raises(AuthError):
                 account = pool.get_next()
                 client._make_request("https://x.com/test", {}, account)
 
+    def test_self_status_url_filter(self):
+        """自身 status 链接 (含 ?s=、/photo/ 后缀) 被识别；其他推文/站点的链接保留"""
+        from x_scraper.parser import _is_self_status
+
+        tid = "1888888888888888888"
+        assert _is_self_status(f"https://x.com/u/status/{tid}", tid)
+        assert _is_self_status(f"https://x.com/u/status/{tid}?s=20", tid)
+        assert _is_self_status(f"https://twitter.com/u/status/{tid}/photo/1", tid)
+        assert not _is_self_status("https://x.com/u/status/1999", tid)
+        assert not _is_self_status(f"https://x.com/u/status/{tid}5", tid)
+        assert not _is_self_status(f"https://example.com/status/{tid}", tid)
+        assert not _is_self_status(f"https://x.com/u/status/{tid}", "")
+
+    def test_raw_result_kept_only_on_request(self):
+        """Tweet._raw 默认为空，keep_raw=True 时保留原始 result"""
+        assert TweetParser()._parse_tweet_result(SAMPLE_TWEET_RESULT)._raw == {}
+        tweet = TweetParser(keep_raw=True)._parse_tweet_result(SAMPLE_TWEET_RESULT)
+        assert tweet._raw is SAMPLE_TWEET_RESULT
+
     def test_pinned_tweet_dedup(self):
         """Task 4: 置顶推文与时间线推文重复时应去重"""
         parser = TweetParser()
@@ -877,10 +1315,29 @@ class TestReviewFixes:
                 }
             }
         }
-        tweets, _ = parser.parse_timeline(response)
-        # 应该只有 1 条，不是 2 条
+        with patch.object(parser, "_parse_tweet_result", wraps=parser._parse_tweet_result) as mock_parse:
+            tweets, _ = parser.parse_timeline(response)
+        # 应该只有 1 条，不是 2 条；重复条目在构造 Tweet 之前就被跳过
         assert len(tweets) == 1
         assert tweets[0].id == "1234567890"
+        assert mock_parse.call_count == 1
+
+        # 跨页已获取过的 ID: 按 entryId 跳过，不构造 Tweet，并回传被跳过的 ID
+        skipped = []
+        with patch.object(parser, "_parse_tweet_result") as mock_parse:
+            tweets, _ = parser.parse_timeline(response, skip_ids={"1234567890"}, skipped_ids=skipped)
+        assert tweets == []
+        mock_parse.assert_not_called()
+        assert skipped == ["1234567890", "1234567890"]
+
+    def test_peek_tweet_id(self):
+        """不构造 Tweet 读取 ID: 解包 TweetWithVisibilityResults，结构不完整时返回 None"""
+        peek = TweetParser._peek_tweet_id
+        wrapped = {"__typename": "TweetWithVisibilityResults", "tweet": SAMPLE_TWEET_RESULT}
+        assert peek({"tweet_results": {"result": SAMPLE_TWEET_RESULT}}) == "1234567890"
+        assert peek({"tweet_results": {"result": wrapped}}) == "1234567890"
+        assert peek({"tweet_results": {}}) is None
+        assert peek(None) is None
 
     def test_env_exact_key_match(self, tmp_path):
         """Task 5: .env 应精确匹配 key，不匹配带后缀的键"""
@@ -895,6 +1352,21 @@ class TestReviewFixes:
         assert a.auth_token == "correct_token"
         assert a.ct0 == "correct_ct0"
 
+    def test_env_comments_and_quotes(self, tmp_path):
+        """.env 注释行应忽略，值两侧的空白与引号应去除"""
+        env_file = tmp_path / "test.env"
+        env_file.write_text(
+            '# TWITTER_AUTH_TOKEN="commented"\n'
+            '  TWITTER_AUTH_TOKEN = \'single_quoted\'  \r\n'
+            '\n'
+            'OTHER=1\n'
+            'TWITTER_CT0=bare_ct0\n'
+        )
+        pool = AccountPool.from_env_file(str(env_file))
+        a = pool.get_next()
+        assert a.auth_token == "single_quoted"
+        assert a.ct0 == "bare_ct0"
+
     def test_env_xcsrf_token_fallback(self, tmp_path):
         """Task 5: 支持 XCSRF_TOKEN 作为 ct0 的替代键"""
         env_file = tmp_path / "test.env"
@@ -938,7 +1410,7 @@ class TestRiskEnhancements:
             client._record_failure()
 
         assert client._cb_consecutive_failures == 3
-        assert client._cb_open_until > 0, "断路器应已打开"
+        assert client._cb_open_until_ns > 0, "断路器应已打开"
 
     def test_circuit_breaker_resets_on_success(self):
         """P1: 成功后断路器应重置"""
@@ -954,7 +1426,7 @@ class TestRiskEnhancements:
 
         client._record_success()
         assert client._cb_consecutive_failures == 0
-        assert client._cb_open_until == 0
+        assert client._cb_open_until_ns == 0
 
     def test_circuit_breaker_stops_retry_loop_when_opened(self):
         """P1: 本轮重试中触发断路器后不应继续尝试后续 attempt"""
@@ -973,6 +1445,267 @@ class TestRiskEnhancements:
             assert result is None
             assert mock_make.call_count == 1
 
+    def test_circuit_breaker_half_open_probe_backoff(self):
+        """P1: 半开试探失败时冷却时间翻倍 (有上限)，试探成功后恢复基础冷却"""
+        from x_scraper.client import XClient, CB_MAX_BACKOFF_FACTOR
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(
+            account_pool=pool,
+            circuit_breaker_threshold=2,
+            circuit_breaker_cooldown=10,
+        )
+        client._record_failure()
+        assert client._record_failure() is True
+        assert client._cb_current_cooldown == 10
+
+        for expected in (20, 40, 80, 80):
+            # 冷却未结束: 立即失败，不睡眠
+            with patch("x_scraper.client.time.sleep") as mock_sleep:
+                assert client._check_circuit_breaker() is False
+            mock_sleep.assert_not_called()
+            client._cb_open_until_ns = time.monotonic_ns()  # 模拟冷却结束
+            assert client._check_circuit_breaker() is True
+            assert client._cb_half_open is True
+            assert client._cb_open_until_ns == 0
+            assert client._record_failure() is True
+            assert client._cb_current_cooldown == expected
+        assert client._cb_current_cooldown == 10 * CB_MAX_BACKOFF_FACTOR
+
+        client._cb_open_until_ns = time.monotonic_ns()
+        client._check_circuit_breaker()
+        client._record_success()
+        assert client._cb_half_open is False
+        assert client._cb_current_cooldown == 10
+        assert client._cb_open_until_ns == 0
+
+    def test_make_request_wraps_only_transport_errors(self):
+        """网络层异常/非 JSON 响应包装为 server 类 XClientError，其他异常原样抛出"""
+        from x_scraper.client import XClient, XClientError
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool)
+        account = pool.get_next()
+        transport_error = client._transport_errors[0]("connection reset")
+
+        with patch.object(client, '_get_session') as mock_get_session:
+            get = mock_get_session.return_value.get
+            get.side_effect = transport_error
+            with pytest.raises(XClientError) as exc_info:
+                client._make_request("https://x.com/test", {}, account)
+            assert exc_info.value.kind == "server"
+            assert exc_info.value.__cause__ is transport_error
+
+            get.side_effect = None
+            get.return_value = MagicMock(status_code=200, content=b"<html>challenge</html>")
+            with pytest.raises(XClientError) as exc_info:
+                client._make_request("https://x.com/test", {}, account)
+            assert exc_info.value.kind == "server"
+
+            get.side_effect = TypeError("bug")
+            with pytest.raises(TypeError):
+                client._make_request("https://x.com/test", {}, account)
+
+    def test_client_errors_do_not_trip_circuit_breaker(self):
+        """P1: 4xx/GraphQL 业务错误标记为 client，不计入断路器且不重试；5xx 计入"""
+        from x_scraper.client import XClient
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool, max_retries=3, circuit_breaker_threshold=1)
+
+        def response(status, body=None):
+            mock_response = MagicMock()
+            mock_response.status_code = status
+            mock_response.text = "error"
+            mock_response.json.return_value = body
+            return mock_response
+
+        with patch("x_scraper.client.time.sleep"), \
+                patch.object(client, '_get_session') as mock_get_session:
+            get = mock_get_session.return_value.get
+            get.return_value = response(404)
+            assert client._request_with_retry("https://x.com/test", {}) is None
+            assert get.call_count == 1
+
+            get.return_value = response(200, {"errors": [{"message": "User not found", "code": 50}]})
+            assert client._request_with_retry("https://x.com/test", {}) is None
+            assert client._cb_consecutive_failures == 0
+            assert client._cb_open_until_ns == 0
+
+            get.return_value = response(503)
+            assert client._request_with_retry("https://x.com/test", {}) is None
+        assert client._cb_consecutive_failures == 1
+        assert client._cb_open_until_ns > 0
+
+    def test_global_rate_limit_stops_account_rotation(self):
+        """不同账号接连被限速时停止本次重试，不再消耗第三个账号"""
+        from x_scraper.client import XClient, RateLimitError
+
+        pool = AccountPool([("tok1", "ct1"), ("tok2", "ct2"), ("tok3", "ct3")])
+        client = XClient(account_pool=pool, max_retries=3, circuit_breaker_threshold=100)
+
+        with patch("x_scraper.client.time.sleep"), \
+                patch.object(client, "_make_request", side_effect=RateLimitError(60)) as mock_make:
+            assert client._request_with_retry("https://x.com/test", {}) is None
+        assert mock_make.call_count == 2
+        assert pool.available_count == 1
+
+    def test_all_accounts_failing_trips_breaker_early(self):
+        """多账号池中每个账号都失败过 (上游故障)，不必等到阈值即触发断路器"""
+        from x_scraper.client import XClient
+
+        pool = AccountPool([("tok1", "ct1"), ("tok2", "ct2")])
+        client = XClient(account_pool=pool, circuit_breaker_threshold=5)
+
+        assert client._record_failure(pool.accounts[0]) is False
+        assert client._record_failure(pool.accounts[0]) is False
+        assert client._record_failure(pool.accounts[1]) is True
+
+        client._record_success()
+        assert client._cb_failed_accounts == set()
+
+    def test_half_open_allows_single_probe(self):
+        """P1: 半开时只放行一个试探；试探无结果时交还试探机会"""
+        from x_scraper.client import XClient
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool, circuit_breaker_threshold=1)
+        client._record_failure()
+        client._cb_open_until_ns = time.monotonic_ns()  # 模拟冷却结束
+
+        assert client._check_circuit_breaker() is True
+        assert client._check_circuit_breaker() is False  # 试探进行中
+
+        client._release_probe()
+        assert client._cb_half_open is False
+        assert client._check_circuit_breaker() is True
+
+    def test_shared_client_state_is_thread_safe(self):
+        """多线程共享 XClient: 断路器计数不丢失，Session 按线程隔离"""
+        import threading
+        from x_scraper.client import XClient
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool, circuit_breaker_threshold=10**9)
+        client._requests = MagicMock()
+        client._requests.Session.side_effect = lambda: MagicMock()
+        client._use_curl_cffi = False
+        sessions = []
+        barrier = threading.Barrier(8)  # 保证各线程同时存活 (线程 ID 不被复用)
+
+        def worker():
+            for _ in range(1000):
+                client._record_failure()
+            session = client._get_session(None)
+            assert client._get_session(None) is session
+            sessions.append(session)
+            barrier.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert client._cb_consecutive_failures == 8000
+        assert len({id(s) for s in sessions}) == 8
+
+    def test_thread_sessions_closed_when_thread_exits(self):
+        """线程结束后其 Session 被关闭并释放；新线程 (即使复用线程 ID) 不会拿到旧 Session"""
+        import gc
+        import threading
+        from x_scraper.client import XClient
+
+        client = XClient(account_pool=AccountPool([("tok", "ct0")]))
+        client._use_curl_cffi = False
+        client._requests = MagicMock()
+        client._requests.Session.side_effect = lambda: MagicMock()
+        sessions = []
+
+        for _ in range(3):
+            t = threading.Thread(target=lambda: sessions.append(client._get_session(None)))
+            t.start()
+            t.join()
+        gc.collect()
+
+        assert len({id(s) for s in sessions}) == 3
+        for session in sessions:
+            session.close.assert_called_once()
+        assert len(client._session_tables) == 0
+
+    def test_open_circuit_fails_fast_unless_waiting(self):
+        """P1: 断路器打开时默认立即返回 None；wait_for_circuit=True 时等待冷却后试探"""
+        from x_scraper.client import XClient
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool, circuit_breaker_threshold=1, circuit_breaker_cooldown=30)
+        client._record_failure()
+
+        with patch("x_scraper.client.time.sleep") as mock_sleep, \
+                patch.object(client, "_make_request", return_value={"data": {}}) as mock_make:
+            assert client._request_with_retry("https://x.com/test", {}) is None
+            mock_make.assert_not_called()
+            mock_sleep.assert_not_called()
+
+        def expire_cooldown(_seconds):
+            client._cb_open_until_ns = time.monotonic_ns()
+
+        with patch("x_scraper.client.time.sleep", side_effect=expire_cooldown) as mock_sleep, \
+                patch.object(client, "_make_request", return_value={"data": {}}) as mock_make:
+            result = client._request_with_retry("https://x.com/test", {}, wait_for_circuit=True)
+        assert result == {"data": {}}
+        assert 0 < mock_sleep.call_args_list[0][0][0] <= 30
+        assert client._cb_half_open is False
+        assert client._cb_open_until_ns == 0
+
+    def test_aimd_pacing_adapts_to_rate_limits(self):
+        """AIMD: 成功加性提速 (有上限)，限速乘性降速 (有下限)"""
+        from x_scraper.client import XClient, RateLimitError, AIMD_INITIAL_RATE, AIMD_INCREASE
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool, max_retries=1, circuit_breaker_threshold=100)
+
+        with patch("x_scraper.client.time.sleep"), \
+                patch.object(client, "_make_request", return_value={"data": {}}):
+            client._request_with_retry("https://x.com/test", {})
+        assert client._aimd_rate == pytest.approx(AIMD_INITIAL_RATE + AIMD_INCREASE)
+
+        client._aimd_rate = client._max_rate
+        with patch("x_scraper.client.time.sleep"), \
+                patch.object(client, "_make_request", return_value={"data": {}}):
+            client._request_with_retry("https://x.com/test", {})
+        assert client._aimd_rate == client._max_rate
+
+        with patch("x_scraper.client.time.sleep"), \
+                patch.object(client, "_make_request", side_effect=RateLimitError(0)):
+            client._request_with_retry("https://x.com/test", {})
+        assert client._aimd_rate == client._max_rate / 2
+
+        client._aimd_rate = client._min_rate
+        with patch("x_scraper.client.time.sleep"), \
+                patch.object(client, "_make_request", side_effect=RateLimitError(0)):
+            client._request_with_retry("https://x.com/test", {})
+        assert client._aimd_rate == client._min_rate
+
+    def test_pace_token_bucket(self):
+        """令牌桶: 桶内令牌用完后按当前速率睡眠，后续预约依次顺延"""
+        from x_scraper.client import XClient, REQUEST_BURST
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool)
+        client._aimd_rate = 1.0
+
+        with patch("x_scraper.client.time.sleep") as mock_sleep:
+            for _ in range(REQUEST_BURST):
+                client._pace()
+            mock_sleep.assert_not_called()
+            client._pace()
+            client._pace()
+        assert mock_sleep.call_count == 2
+        first, second = (c[0][0] for c in mock_sleep.call_args_list)
+        assert 0 < first <= 1.0
+        assert 1.0 < second <= 2.0
+
     def test_custom_query_ids(self):
         """P2: 自定义 Query IDs 应覆盖默认值"""
         from x_scraper.client import XClient, QUERY_IDS
@@ -1000,26 +1733,76 @@ class TestRiskEnhancements:
         assert client._features["rweb_tipjar_consumption_enabled"] is False
         # 其他默认 flag 应保留
         assert "view_counts_everywhere_api_enabled" in client._features
+        # 预序列化的 JSON 应与当前 features 一致
+        assert json.loads(client._features_json) == client._features
+
+        client.set_features({"new_feature_flag": False})
+        assert json.loads(client._features_json)["new_feature_flag"] is False
+
+    def test_dumps_json_compact_with_and_without_orjson(self):
+        """查询参数 JSON 应为紧凑格式，orjson 与标准库回退结果一致"""
+        from x_scraper import parser as parser_module
+
+        variables = {"userId": "12345", "count": 20, "withVoice": True}
+        expected = '{"userId":"12345","count":20,"withVoice":true}'
+        assert parser_module.dumps_json(variables) == expected
+        with patch.object(parser_module, "orjson", None):
+            assert parser_module.dumps_json(variables) == expected
+
+    def test_graphql_url_prebuilt_query_string(self):
+        """查询串一次拼好: 解码后与 variables/features/fieldToggles 一致"""
+        from urllib.parse import urlsplit, parse_qs
+        from x_scraper.client import XClient, DEFAULT_FIELD_TOGGLES
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool, features={"new_feature_flag": True})
+        variables = {"userId": "12345", "cursor": "DAAB+/=&x"}
+
+        parts = urlsplit(client._build_graphql_url("https://x.com/i/api/graphql/Q/UserTweets", variables))
+        assert parts.path == "/i/api/graphql/Q/UserTweets"
+        query = {k: json.loads(v[0]) for k, v in parse_qs(parts.query).items()}
+        assert query == {
+            "variables": variables,
+            "features": client._features,
+            "fieldToggles": DEFAULT_FIELD_TOGGLES,
+        }
 
     def test_ua_rotation(self):
-        """P3: 每次构建请求头应使用不同 UA（概率性）"""
-        from x_scraper.client import XClient, UA_POOL
+        """P3: 每次请求应轮换 profile（概率性），且 UA 与 impersonate 来自同一 profile"""
+        from x_scraper.client import XClient, UA_PROFILES
 
         pool = AccountPool([("tok", "ct0")])
         client = XClient(account_pool=pool)
-        account = pool.accounts[0]
 
-        # 多次构建请求头，收集 UA
+        # 多次选取 profile，收集 UA
         uas = set()
         for _ in range(30):
-            headers = client._build_headers(account)
-            uas.add(headers["user-agent"])
+            profile = client._pick_client_profile()
+            assert profile in UA_PROFILES
+            uas.add(profile["user_agent"])
 
         # 应该看到多个不同的 UA (概率性测试，30 次中至少应有 2 个不同)
         assert len(uas) >= 2, f"UA 应有变化，但只看到: {uas}"
-        # 所有 UA 应来自 UA_POOL
-        for ua in uas:
-            assert ua in UA_POOL, f"UA '{ua}' 不在 UA_POOL 中"
+
+    def test_request_uses_profile_user_agent(self):
+        """P3: 请求头中的 UA 必须来自本次请求选中的 profile"""
+        from x_scraper.client import XClient, UA_PROFILES
+
+        pool = AccountPool([("tok", "ct0")])
+        client = XClient(account_pool=pool)
+        profile = UA_PROFILES[-1]
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = b'{"data": {}}'
+
+        with patch.object(client, '_pick_client_profile', return_value=profile), \
+             patch.object(client, '_get_session') as mock_get_session:
+            mock_get_session.return_value.get.return_value = mock_response
+            client._make_request("https://x.com/test", {}, pool.get_next())
+
+        mock_get_session.assert_called_once_with(profile["impersonate"])
+        headers = mock_get_session.return_value.get.call_args.kwargs["headers"]
+        assert headers["user-agent"] == profile["user_agent"]
 
 
 # ============================================================
@@ -1039,22 +1822,24 @@ class TestIntegration:
         python -m pytest tests/test_x_scraper.py -v --run-integration -k TestIntegration
     """
 
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        """加载真实配置"""
+    @pytest.fixture(autouse=True, scope="class")
+    def setup(self, request):
+        """加载真实配置 (每个测试类只解析一次)"""
         import configparser
         project_root = os.path.join(os.path.dirname(__file__), '..')
-        config_path = os.path.join(project_root, 'config.ini')
-
-        self.config = configparser.ConfigParser()
-        self.config.optionxform = str
-        self.config.read(config_path, encoding='utf-8')
 
-        # 确保 env 文件存在
-        self.env_file = os.path.join(project_root, 'rsshub-docker.env')
-        if not os.path.exists(self.env_file):
+        # 确保 env 文件存在 (先检查，缺失时不必再读配置)
+        env_file = os.path.join(project_root, 'rsshub-docker.env')
+        if not os.path.exists(env_file):
             pytest.skip("rsshub-docker.env 不存在，跳过集成测试")
 
+        config = configparser.ConfigParser()
+        config.optionxform = str
+        config.read(os.path.join(project_root, 'config.ini'), encoding='utf-8')
+
+        request.cls.config = config
+        request.cls.env_file = env_file
+
     def test_e2e_get_user_id(self):
         """端到端: 获取用户 ID"""
         from x_scraper import AccountPool, XClient
@@ -97,6 +97,20 @@ class TestASRData(unittest.TestCase):
             
             self.assertEqual(content["2"]["text"], "World")
 
+    def test_save_all_matches_individual_saves(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            base = os.path.join(tmp_dir, "all")
+            self.data.save_all(base)
+
+            for ext in (".srt", ".txt", ".json"):
+                single_path = os.path.join(tmp_dir, "single" + ext)
+                self.data.save(single_path)
+                with open(base + ext, "r", encoding="utf-8") as f:
+                    combined = f.read()
+                with open(single_path, "r", encoding="utf-8") as f:
+                    single = f.read()
+                self.assertEqual(combined, single)
+
     def test_save_unsupported_format(self):
         with tempfile.TemporaryDirectory() as tmp_dir:
             save_path = os.path.join(tmp_dir, "output.xyz")
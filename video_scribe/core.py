@@ -1,59 +1,95 @@
+import functools
 import os
+import re
 from typing import Optional, Union
 
+import yt_dlp
+
 from .data import ASRData
 from .config import TranscribeConfig, DEFAULT_MODEL_NAME
 from .downloader import download_audio
 from .asr.factory import create_asr
 from .utils import setup_logger
 from .resource_manager import ensure_executable, ensure_model
-import glob
 import json
 
 logger = setup_logger("video-scribe")
 
+# Matches watch?v=<id>, youtu.be/<id> and /shorts/<id>
+_YT_ID_RE = re.compile(r"(?:v=|youtu\.be/|/shorts/)([A-Za-z0-9_-]{11})")
+
+_YTSUB_PREFIX = "ytsub_temp."
+
+
+# Resolved resource paths don't change within a process; failures raise and are not cached
+@functools.lru_cache(maxsize=8)
+def _cached_executable(program_path: Optional[str]) -> str:
+    return ensure_executable(program_path)
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_model(model_name: str) -> str:
+    return ensure_model(model_name)
+
+
+def _scan_temp_subs(output_dir: str, remove: bool = False) -> Optional[str]:
+    """
+    Single scandir pass over output_dir for ytsub_temp.* files.
+    Deletes them when remove=True, otherwise returns the first ytsub_temp.*.srt.
+    """
+    try:
+        with os.scandir(output_dir) as it:
+            for entry in it:
+                name = entry.name
+                if not name.startswith(_YTSUB_PREFIX):
+                    continue
+                if remove:
+                    try: os.unlink(entry.path)
+                    except OSError: pass
+                elif name.endswith(".srt") and len(name) >= len(_YTSUB_PREFIX) + len(".srt"):
+                    return entry.path
+    except OSError:
+        pass
+    return None
+
 def try_download_youtube_subtitles(url: str, output_dir: str, lang: str = "en") -> Optional[str]:
     """
     Try to download YouTube subtitles using yt-dlp.
     Returns path to the downloaded subtitle file (vtt) if successful, else None.
     """
     # Guard: Only attempt for YouTube URLs
-    if not any(domain in url for domain in ['youtube.com', 'youtu.be']):
+    if 'youtube.com' not in url and 'youtu.be' not in url:
         return None
         
-    import subprocess
-    
     # Clean output dir patterns first to avoid confusion with old files
-    base_pattern = os.path.join(output_dir, "ytsub_temp.*")
-    for f in glob.glob(base_pattern):
-        try: os.remove(f)
-        except: pass
+    _scan_temp_subs(output_dir, remove=True)
         
     output_template = os.path.join(output_dir, "ytsub_temp.%(ext)s")
     
-    # Try manual subs first, then auto-subs
     # Try manual subs first, then auto-subs
     # We use 'srt' format as it's cleaner via yt-dlp conversion
-    cmd = [
-        "yt-dlp",
-        "--skip-download",   # Don't download video
-        "--write-subs",      # Try manual subs
-        "--write-auto-subs", # Fallback to auto subs
-        "--sub-lang", lang,  # Language code
-        "--sub-format", "srt", # Enforce srt
-        "--output", output_template,
-        url
-    ]
+    # Run yt-dlp in-process (already imported by the downloader) instead of spawning the CLI
+    ydl_opts = {
+        'skip_download': True,        # Don't download video
+        'writesubtitles': True,       # Try manual subs
+        'writeautomaticsub': True,    # Fallback to auto subs
+        'subtitleslangs': [lang],     # Language code
+        'subtitlesformat': 'srt',     # Enforce srt
+        'outtmpl': output_template,
+        'quiet': True,
+        'no_warnings': True,
+    }
     
     try:
         logger.info(f"Attempting to download subtitles for {url} ({lang})...")
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.download([url])
         
         # Check if file exists
         # yt-dlp might name it ytsub_temp.en.srt or similar
-        potential_files = glob.glob(os.path.join(output_dir, "ytsub_temp.*.srt"))
-        if potential_files:
-            return potential_files[0]
+        sub_path = _scan_temp_subs(output_dir)
+        if sub_path:
+            return sub_path
             
     except Exception as e:
         logger.warning(f"Failed to download subtitles: {e}")
@@ -73,11 +109,11 @@ def process_video(
     """
     # 0. Prepare Resources
     logger.info("Step 0: Checking resources...")
-    exe_path = ensure_executable(faster_whisper_program)
+    exe_path = _cached_executable(faster_whisper_program)
     
     # Check if model_path is provided, else use default. 
     # Also handle auto-download inside ensure_model
-    final_model_path = ensure_model(model_path if model_path else DEFAULT_MODEL_NAME)
+    final_model_path = _cached_model(model_path if model_path else DEFAULT_MODEL_NAME)
     
     logger.info(f"Using Executable: {exe_path}")
     logger.info(f"Using Model: {final_model_path}")
@@ -96,15 +132,12 @@ def process_video(
                 # We still need a base name for export
                 # Since we didn't download video, we use the video ID or a generic name
                 # Try to extract video ID from URL simple way
-                from urllib.parse import urlparse, parse_qs
-                parsed_url = urlparse(video_url_or_path)
-                video_id = parse_qs(parsed_url.query).get('v', ['video'])[0]
+                m = _YT_ID_RE.search(video_url_or_path)
+                video_id = m.group(1) if m else "video"
                 
                 # Export immediately
                 output_base = os.path.join(output_dir, video_id)
-                asr_data.save(output_base + ".srt")
-                asr_data.save(output_base + ".txt")
-                asr_data.save(output_base + ".json")
+                asr_data.save_all(output_base)
                 
                 # Cleanup temp srt
                 try: os.remove(srt_path)
@@ -149,9 +182,7 @@ def process_video(
     base_name = os.path.splitext(os.path.basename(audio_path))[0]
     output_base = os.path.join(output_dir, base_name)
     
-    asr_data.save(output_base + ".srt")
-    asr_data.save(output_base + ".txt")
-    asr_data.save(output_base + ".json")
+    asr_data.save_all(output_base)
     
     logger.info("Done!")
     return asr_data
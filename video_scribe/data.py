@@ -59,10 +59,36 @@ class ASRData:
             self.to_txt(save_path=save_path)
         elif save_path.endswith(".json"):
              with open(save_path, "w", encoding="utf-8") as f:
-                json.dump(self.to_json(), f, ensure_ascii=False, indent=2)
+                # Serialize to one string and write once; json.dump issues a write per chunk
+                f.write(json.dumps(self.to_json(), ensure_ascii=False, indent=2))
         else:
             raise ValueError(f"Unsupported format: {save_path}")
 
+    def save_all(self, base_path: str):
+        """Write <base>.srt, <base>.txt and <base>.json from a single pass over segments."""
+        base_path = handle_long_path(base_path)
+        Path(base_path).parent.mkdir(parents=True, exist_ok=True)
+
+        srt_lines = []
+        txt_lines = []
+        json_data = {}
+        for n, seg in enumerate(self.segments, 1):
+            text = seg.text
+            srt_lines.append(f"{n}\n{seg.to_srt_ts()}\n{text}\n")
+            txt_lines.append(text)
+            json_data[str(n)] = {
+                "start_time": seg.start_time,
+                "end_time": seg.end_time,
+                "text": text
+            }
+
+        with open(base_path + ".srt", "w", encoding="utf-8") as f:
+            f.write("\n".join(srt_lines))
+        with open(base_path + ".txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(txt_lines))
+        with open(base_path + ".json", "w", encoding="utf-8") as f:
+            f.write(json.dumps(json_data, ensure_ascii=False, indent=2))
+
     def to_txt(self, save_path=None) -> str:
         text = "\n".join([seg.text for seg in self.segments])
         if save_path:
@@ -32,10 +32,16 @@ x_scraper - X/Twitter 用户推文直接爬取模块
     posts = scraper.fetch_user_tweets_as_posts("karpathy", "X_karpathy")
 """
 
-from .models import Tweet, TweetMedia
-from .account_pool import AccountPool
-from .client import XClient
-from .scraper import XScraper
+import importlib
+
+# 按需导入子模块: client 会拉起 curl_cffi，只需 AccountPool 等轻量组件时不必付出这部分开销
+_LAZY_EXPORTS = {
+    "Tweet": "models",
+    "TweetMedia": "models",
+    "AccountPool": "account_pool",
+    "XClient": "client",
+    "XScraper": "scraper",
+}
 
 __all__ = [
     "XScraper",
@@ -44,3 +50,16 @@ __all__ = [
     "Tweet",
     "TweetMedia",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # 缓存，后续访问不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -3,15 +3,71 @@ account_pool.py - X/Twitter 账号池管理
 
 管理多个 auth_token + ct0 凭证组合，支持轮换和冷却机制。
 """
+import os
+import re
 import time
 import logging
+import threading
+from collections import deque
+from functools import lru_cache
 from typing import List, Tuple, Optional, Dict, Any
 from dataclasses import dataclass, field
 
 logger = logging.getLogger("x_scraper.account_pool")
 
+# .env 中关心的凭证行: 行首 KEY (精确匹配，不含后缀) = value；注释行与其他键不会匹配
+_ENV_CREDENTIAL_RE = re.compile(
+    r'^[ \t]*(TWITTER_AUTH_TOKEN|TWITTER_CT0|XCSRF_TOKEN)[ \t]*=(.*)$',
+    re.MULTILINE,
+)
+
+
+@lru_cache(maxsize=32)
+def _parse_config_string(config_str: str) -> Tuple[Tuple[str, str], ...]:
+    """解析 "auth_token1:ct01|auth_token2:ct02"，结果按原始字符串缓存"""
+    credentials = []
+    for pair in config_str.split("|"):
+        pair = pair.strip()
+        if not pair:
+            continue
+        parts = pair.split(":", 1)
+        if len(parts) != 2:
+            logger.warning(f"跳过格式错误的凭证: {pair[:20]}...")
+            continue
+        credentials.append((parts[0], parts[1]))
+    return tuple(credentials)
+
+
+@lru_cache(maxsize=32)
+def _parse_env_file(env_file_path: str, mtime_ns: int, size: int) -> Tuple[str, str]:
+    """
+    读取 .env 中的 (auth_token, ct0)。
+    以 (路径, mtime, 大小) 为缓存键，文件被修改后自动重新解析。
+    """
+    auth_token = ""
+    ct0 = ""
+
+    with open(env_file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    # 按出现顺序处理，后出现的同名键覆盖前者
+    for key, value in _ENV_CREDENTIAL_RE.findall(content):
+        value = value.strip().strip('"').strip("'")
+        if key == "TWITTER_AUTH_TOKEN":
+            auth_token = value
+        else:
+            ct0 = value
+    return auth_token, ct0
+
+
+# get_status 的状态名: _STATUS_NAMES[is_dead][is_cooling]
+_STATUS_NAMES = (("available", "cooling"), ("dead", "dead"))
+
+# 时钟别名: 一次轮换/统计只读取一次当前时间，再传给各账号判断
+_now = time.time
 
-@dataclass
+
+@dataclass(slots=True)
 class AccountState:
     """单个账号的状态"""
     auth_token: str
@@ -24,20 +80,30 @@ class AccountState:
     is_dead: bool = False            # 是否已永久失效 (401/403)
     last_error: str = ""             # 最近一次错误信息
 
+    # 日志/状态展示用的脱敏 token 前缀 (构造时计算一次)
+    auth_token_hint: str = field(init=False, repr=False, compare=False)
+    # 请求用的 Cookie (构造时生成一次，请求时只读复用)
+    cookies: Dict[str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.auth_token_hint = self.auth_token[:4] + "****"
+        self.cookies = {"auth_token": self.auth_token, "ct0": self.ct0}
+
     @property
     def is_available(self) -> bool:
         """是否可用（未失效 且 未在冷却期内）"""
-        if self.is_dead:
-            return False
-        if self.cooldown_until > time.time():
-            return False
-        return True
+        return self._is_available(_now())
 
     @property
     def cooldown_remaining(self) -> float:
         """剩余冷却时间 (秒)"""
-        remaining = self.cooldown_until - time.time()
-        return max(0, remaining)
+        return self._cooldown_remaining(_now())
+
+    def _is_available(self, now: float) -> bool:
+        return not self.is_dead and self.cooldown_until <= now
+
+    def _cooldown_remaining(self, now: float) -> float:
+        return max(0, self.cooldown_until - now)
 
 
 class AccountPool:
@@ -71,7 +137,10 @@ class AccountPool:
                 index=i,
             ))
 
-        self._current_index = 0
+        # 轮换队列：队首为下一个候选账号；已失效账号在轮换时被移出，之后不再扫描
+        self._rotation = deque(self.accounts)
+        # 保护账号状态；mark_* 修改状态后唤醒 wait_for_available 中的等待者
+        self._cv = threading.Condition()
         logger.info(f"账号池初始化完成: {len(self.accounts)} 个凭证")
 
     @classmethod
@@ -88,18 +157,7 @@ class AccountPool:
         Returns:
             AccountPool 实例
         """
-        credentials = []
-        for pair in config_str.split("|"):
-            pair = pair.strip()
-            if not pair:
-                continue
-            parts = pair.split(":", 1)
-            if len(parts) != 2:
-                logger.warning(f"跳过格式错误的凭证: {pair[:20]}...")
-                continue
-            credentials.append((parts[0], parts[1]))
-
-        return cls(credentials)
+        return cls(list(_parse_config_string(config_str)))
 
     @classmethod
     def from_env_file(cls, env_file_path: str) -> 'AccountPool':
@@ -116,22 +174,9 @@ class AccountPool:
         Returns:
             AccountPool 实例
         """
-        auth_token = ""
-        ct0 = ""
-
         try:
-            with open(env_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith('#') or '=' not in line:
-                        continue
-                    key, _, value = line.partition('=')
-                    key = key.strip()
-                    value = value.strip().strip('"').strip("'")
-                    if key == "TWITTER_AUTH_TOKEN":
-                        auth_token = value
-                    elif key in ("TWITTER_CT0", "XCSRF_TOKEN"):
-                        ct0 = value
+            st = os.stat(env_file_path)
+            auth_token, ct0 = _parse_env_file(env_file_path, st.st_mtime_ns, st.st_size)
         except FileNotFoundError:
             raise FileNotFoundError(f"找不到环境文件: {env_file_path}")
 
@@ -150,12 +195,43 @@ class AccountPool:
         Returns:
             可用的 AccountState，或 None
         """
-        total = len(self.accounts)
-        for _ in range(total):
-            account = self.accounts[self._current_index]
-            self._current_index = (self._current_index + 1) % total
+        with self._cv:
+            return self._get_next_locked(_now())
+
+    def get_next_batch(self, k: int) -> List[AccountState]:
+        """
+        一次取出至多 k 个轮换账号 (如每个并发 worker 一个)。
+
+        只加一次锁、读一次时钟。可用账号不足 k 个时，账号会按轮换顺序重复出现；
+        没有可用账号时返回空列表。
+
+        Args:
+            k: 需要的账号数
+
+        Returns:
+            AccountState 列表 (长度 <= k)
+        """
+        accounts = []
+        with self._cv:
+            now = _now()
+            for _ in range(k):
+                account = self._get_next_locked(now)
+                if account is None:
+                    break
+                accounts.append(account)
+        return accounts
+
+    def _get_next_locked(self, now: float) -> Optional[AccountState]:
+        """get_next 的实现，调用方需持有 self._cv"""
+        rotation = self._rotation
+        for _ in range(len(rotation)):
+            account = rotation[0]
+            if account.is_dead:
+                rotation.popleft()
+                continue
+            rotation.rotate(-1)
 
-            if account.is_available:
+            if account.cooldown_until <= now:
                 account.request_count += 1
                 return account
 
@@ -173,8 +249,10 @@ class AccountPool:
         if cooldown_seconds is None:
             cooldown_seconds = self.DEFAULT_COOLDOWN_SECONDS
 
-        account.cooldown_until = time.time() + cooldown_seconds
-        account.last_error = f"Rate limited, cooldown {cooldown_seconds}s"
+        with self._cv:
+            account.cooldown_until = _now() + cooldown_seconds
+            account.last_error = f"Rate limited, cooldown {cooldown_seconds}s"
+            self._cv.notify_all()
         logger.warning(
             f"账号 #{account.index} 被限速，冷却 {cooldown_seconds}s "
             f"(已请求 {account.request_count} 次)"
@@ -188,14 +266,17 @@ class AccountPool:
             account: 失效的账号
             reason: 失效原因
         """
-        account.is_dead = True
-        account.last_error = reason or "Account marked as dead"
+        with self._cv:
+            account.is_dead = True
+            account.last_error = reason or "Account marked as dead"
+            self._cv.notify_all()
         logger.error(f"账号 #{account.index} 已失效: {reason}")
 
     @property
     def available_count(self) -> int:
         """当前可用账号数量"""
-        return sum(1 for a in self.accounts if a.is_available)
+        now = _now()
+        return sum(1 for a in self.accounts if a._is_available(now))
 
     @property
     def total_count(self) -> int:
@@ -205,14 +286,18 @@ class AccountPool:
     def get_status(self) -> List[Dict[str, Any]]:
         """获取所有账号的状态摘要 (用于日志/调试)"""
         result = []
+        now = _now()
         for a in self.accounts:
-            status = "available" if a.is_available else ("dead" if a.is_dead else "cooling")
+            # 以 (是否失效, 是否冷却中) 直接索引状态名，每个账号只做一次时间比较
+            remaining = a.cooldown_until - now
+            cooling = remaining > 0
             result.append({
                 "index": a.index,
-                "status": status,
+                "status": _STATUS_NAMES[a.is_dead][cooling],
                 "request_count": a.request_count,
-                "cooldown_remaining": round(a.cooldown_remaining, 1),
-                "auth_token_hint": a.auth_token[:4] + "****",
+                # 未在冷却中的账号 (大多数) 无需计算 max/round
+                "cooldown_remaining": round(remaining, 1) if cooling else 0,
+                "auth_token_hint": a.auth_token_hint,
             })
         return result
 
@@ -229,30 +314,32 @@ class AccountPool:
         Returns:
             可用的 AccountState，或 None (超时/全部失效)
         """
-        deadline = time.time() + timeout
-
-        while time.time() < deadline:
-            # 尝试获取
-            account = self.get_next()
-            if account is not None:
-                return account
-
-            # 检查是否全部永久失效
-            if all(a.is_dead for a in self.accounts):
-                logger.error("所有账号已永久失效，无法继续")
-                return None
-
-            # 等待最快的冷却结束
-            min_wait = min(
-                (a.cooldown_remaining for a in self.accounts if not a.is_dead and a.cooldown_remaining > 0),
-                default=1.0
-            )
-            wait_time = min(min_wait + 1, deadline - time.time(), 60)
-            if wait_time <= 0:
-                break
-
-            logger.info(f"所有账号冷却中，等待 {wait_time:.0f}s...")
-            time.sleep(wait_time)
+        deadline = _now() + timeout
+
+        with self._cv:
+            while _now() < deadline:
+                # 尝试获取
+                account = self._get_next_locked(_now())
+                if account is not None:
+                    return account
+
+                # 检查是否全部永久失效
+                if all(a.is_dead for a in self.accounts):
+                    logger.error("所有账号已永久失效，无法继续")
+                    return None
+
+                # 等待最快的冷却结束；期间 mark_* 改变状态会提前唤醒
+                now = _now()
+                min_wait = min(
+                    (a.cooldown_until - now for a in self.accounts if not a.is_dead and a.cooldown_until > now),
+                    default=1.0
+                )
+                wait_time = min(min_wait + 1, deadline - now, 60)
+                if wait_time <= 0:
+                    break
+
+                logger.info(f"所有账号冷却中，等待 {wait_time:.0f}s...")
+                self._cv.wait(timeout=wait_time)
 
         logger.error(f"等待可用账号超时 ({timeout}s)")
         return None
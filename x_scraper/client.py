@@ -8,15 +8,20 @@ client.py - X/Twitter GraphQL API 客户端
 - 断路器 (连续失败后暂停请求)
 - 用户 ID 查询与推文时间线获取
 """
-import json
+import os
 import time
 import random
 import logging
-from typing import Optional, Dict, Any, List, Tuple
+import threading
+import weakref
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AbstractSet, Optional, Dict, Any, List, Tuple
 from urllib.parse import quote
 
 from .account_pool import AccountPool, AccountState
-from .parser import TweetParser
+from .parser import TweetParser, dumps_json, loads_json
 from .models import Tweet
 
 logger = logging.getLogger("x_scraper.client")
@@ -36,6 +41,8 @@ WEB_BEARER_TOKEN = (
 QUERY_IDS = {
     "UserByScreenName": "xmU6X_CKVnQ5lSrCbAmJsg",
     "UserTweets": "E3opETHurmVJflFsUBVuUQ",
+    # "UserTweetsAndReplies": 无内置默认值 (需从浏览器请求中提取)，通过 [x_scraper] query_ids 配置；
+    # 未配置时 include_replies=True 仍请求 UserTweets，只能拿到其中的自回复 (推文串)
 }
 
 # GraphQL Features (必须与浏览器发送的完全一致，否则请求会失败)
@@ -75,10 +82,28 @@ DEFAULT_FEATURES = {
     "subscriptions_feature_can_gift_premium": True,
 }
 
+# 请求头中与账号/请求无关的固定部分；x-csrf-token 与 user-agent 为占位，
+# 每次请求覆盖 (覆盖已有键时保持原有顺序，头部顺序与浏览器一致)
+_STATIC_HEADERS = {
+    "authorization": WEB_BEARER_TOKEN,
+    "x-csrf-token": "",
+    "x-twitter-active-user": "yes",
+    "x-twitter-auth-type": "OAuth2Session",
+    "x-twitter-client-language": "en",
+    "content-type": "application/json",
+    "user-agent": "",
+    "accept": "*/*",
+    "accept-language": "en-US,en;q=0.9",
+    "referer": "https://x.com/",
+    "origin": "https://x.com",
+}
+
 # 默认 fieldToggles
 DEFAULT_FIELD_TOGGLES = {
     "withArticlePlainText": False,
 }
+_FIELD_TOGGLES_JSON = dumps_json(DEFAULT_FIELD_TOGGLES)
+_FIELD_TOGGLES_QS = quote(_FIELD_TOGGLES_JSON, safe='')
 
 # ─── P3: User-Agent + TLS 指纹配置 ───
 # 每次请求从同一个 profile 同时选择 UA 和 impersonate，避免两者不一致。
@@ -96,13 +121,62 @@ UA_PROFILES = [
         "impersonate": "chrome131",
     },
 ]
-# 兼容现有测试/调用方
-UA_POOL = [p["user_agent"] for p in UA_PROFILES]
+# 断路器半开试探失败时冷却时间翻倍，最多放大到基础冷却时间的倍数
+CB_MAX_BACKOFF_FACTOR = 8
+
+# AIMD 自适应限速 (请求/秒): 成功时加性增加，被限速时乘性减少，逐步逼近 X 的真实限额
+AIMD_INITIAL_RATE = 1.0
+AIMD_MIN_RATE = 1 / 60
+AIMD_MAX_RATE = 2.0
+AIMD_INCREASE = 0.1
+AIMD_DECREASE_FACTOR = 0.5
+# 令牌桶容量: 空闲后允许连续发出的请求数 (令牌按 AIMD 当前速率补充)
+REQUEST_BURST = 3
+
+# 请求失败重试的基础退避时间 (秒)，按 attempt 指数增长并加随机抖动
+RETRY_BACKOFF_BASE = 2.0
+
+# 用户名 -> user_id 缓存: 最多条目数与有效期 (秒)；用户名可能被改名/回收，需要过期
+USER_ID_CACHE_SIZE = 1000
+USER_ID_CACHE_TTL = 86400
+
+# 429 限速时 retry-after 的默认值与上限 (秒)
+DEFAULT_RETRY_AFTER_SECONDS = 900
+MAX_RETRY_AFTER_SECONDS = 3600
+
+
+def _parse_retry_after(raw: Optional[str]) -> int:
+    """
+    解析 retry-after 头 (秒数或 HTTP-date)，结果限制在 [0, MAX_RETRY_AFTER_SECONDS]。
+    无法解析时返回 DEFAULT_RETRY_AFTER_SECONDS。
+    """
+    if not raw:
+        return DEFAULT_RETRY_AFTER_SECONDS
+    raw = raw.strip()
+    try:
+        seconds = int(raw)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(raw)
+        except (TypeError, ValueError):
+            logger.warning(f"无法解析 retry-after 头: '{raw}'，使用默认 {DEFAULT_RETRY_AFTER_SECONDS}s")
+            return DEFAULT_RETRY_AFTER_SECONDS
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        seconds = int((retry_at - datetime.now(timezone.utc)).total_seconds())
+    return min(max(seconds, 0), MAX_RETRY_AFTER_SECONDS)
 
 
 class XClientError(Exception):
-    """X Client 基础异常"""
-    pass
+    """
+    X Client 基础异常。
+
+    kind 区分错误来源: "server" (5xx/超时/连接错误，计入断路器) 或
+    "client" (400/404、与具体用户相关的 GraphQL 错误，重试无意义，不计入断路器)。
+    """
+    def __init__(self, message: str = "", kind: str = "server"):
+        self.kind = kind
+        super().__init__(message)
 
 
 class RateLimitError(XClientError):
@@ -117,12 +191,33 @@ class AuthError(XClientError):
     pass
 
 
+def _close_sessions(sessions):
+    for session in sessions:
+        try:
+            session.close()
+        except Exception as e:
+            logger.debug(f"关闭 Session 失败: {e}")
+
+
+class _ThreadSessions:
+    """单个线程持有的 Session 表 (impersonate -> Session)；线程结束、thread-local 被释放时关闭其中的 Session"""
+    __slots__ = ("sessions", "__weakref__")
+
+    def __init__(self):
+        self.sessions: Dict[Optional[str], Any] = {}
+
+    def __del__(self):
+        _close_sessions(list(self.sessions.values()))
+
+
 class XClient:
     """
     X/Twitter GraphQL API 客户端。
 
     通过模拟浏览器的 GraphQL 请求获取推文数据。
     使用 curl_cffi 确保 TLS 指纹与真实浏览器一致。
+
+    线程安全: 断路器、AIMD 限速与 user_id 缓存由同一把锁保护，可在多个 worker 线程间共享实例。
     """
 
     GRAPHQL_BASE = "https://x.com/i/api/graphql"
@@ -136,6 +231,9 @@ class XClient:
         circuit_breaker_cooldown: int = 60,
         query_ids: Optional[Dict[str, str]] = None,
         features: Optional[Dict[str, Any]] = None,
+        wait_for_circuit: bool = False,
+        page_size: int = 100,
+        user_id_cache_path: Optional[str] = None,
     ):
         """
         初始化 X 客户端。
@@ -148,67 +246,131 @@ class XClient:
             circuit_breaker_cooldown: 断路器冷却时间 (秒)
             query_ids: 自定义 GraphQL Query IDs (覆盖默认值)
             features: 自定义 GraphQL Features (覆盖默认值)
+            wait_for_circuit: 断路器打开时是否等待冷却结束 (默认立即失败返回 None)
+            page_size: 自动分页时每页请求的推文数 (最大 100)
+            user_id_cache_path: 可选，user_id 缓存的 JSON 文件路径 (跨次运行复用，减少 UserByScreenName 请求)
         """
         self.account_pool = account_pool
         self.timeout = timeout
         self.max_retries = max_retries
+        self.default_page_size = min(page_size, 100)
         self.parser = TweetParser()
 
         # P2: 可配置的 Query IDs 和 Features
         self._query_ids = {**QUERY_IDS, **(query_ids or {})}
-        self._features = {**DEFAULT_FEATURES, **(features or {})}
+        self.set_features(features)
+
+        # 保护断路器/AIMD/缓存/Session 表等可变状态 (可重入: 方法间会互相调用)
+        self._lock = threading.RLock()
 
         # P1: 断路器状态
         self._cb_threshold = circuit_breaker_threshold
         self._cb_cooldown = circuit_breaker_cooldown
         self._cb_consecutive_failures = 0
-        self._cb_open_until = 0.0  # epoch timestamp, 0 = closed
-
-        # 用户名 -> user_id 的缓存
-        self._user_id_cache: Dict[str, str] = {}
+        # monotonic 纳秒截止时间，0 = closed (单调时钟不受系统时间调整影响)
+        self._cb_open_until_ns = 0
+        # 半开状态: 冷却结束后只放行一次试探请求；试探失败则冷却时间翻倍 (有上限)
+        self._cb_half_open = False
+        self._cb_current_cooldown = circuit_breaker_cooldown
+        self._cb_probe_thread: Optional[int] = None
+        # 上次成功以来失败过的账号 (index)；所有账号都失败说明是上游问题，直接触发断路器
+        self._cb_failed_accounts: set = set()
+        self.wait_for_circuit = wait_for_circuit
+
+        # AIMD 自适应限速: 令牌桶按当前速率补充令牌，所有请求 (跨用户/跨线程) 共用一个桶
+        self._aimd_rate = AIMD_INITIAL_RATE
+        self._min_rate = AIMD_MIN_RATE
+        self._max_rate = AIMD_MAX_RATE
+        self._bucket_capacity = REQUEST_BURST
+        self._bucket_tokens = float(REQUEST_BURST)
+        self._bucket_refilled_at = time.monotonic()
+
+        # 用户名 (小写) -> (user_id, 写入时的 monotonic 时间)，按最近使用排序的 LRU
+        self._user_id_cache: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self._user_id_cache_path = user_id_cache_path
+        # 有未写回磁盘的新条目；写文件另用一把锁，不占用 self._lock
+        self._user_id_cache_dirty = False
+        self._user_id_cache_io_lock = threading.Lock()
+        if user_id_cache_path:
+            self._load_user_id_cache()
+
+        # 持久化 Session (复用 TCP/TLS 连接)，按 (线程, impersonate) 分开:
+        # 避免同一连接混用 TLS 指纹；curl_cffi Session 不是线程安全的，且请求后清空的 Cookie 不能被其他线程看到。
+        # 放在 threading.local 中: 线程结束即释放并关闭其 Session，线程 ID 被复用时也不会拿到旧 Session
+        self._local = threading.local()
+        # 各线程的 Session 表 (弱引用)，供 close() 统一关闭仍存活线程的 Session
+        self._session_tables: 'weakref.WeakSet[_ThreadSessions]' = weakref.WeakSet()
 
         # 尝试导入 curl_cffi，如果失败则回退到 requests
-        self._session = None
         self._use_curl_cffi = False
         try:
             from curl_cffi import requests as curl_requests
             self._curl_requests = curl_requests
             self._use_curl_cffi = True
+            # 网络层异常 (超时/连接重置等)，_make_request 中包装为 server 类错误
+            self._transport_errors: Tuple[type, ...] = (curl_requests.RequestsError,)
             logger.info("使用 curl_cffi (TLS 指纹伪装已启用)")
         except ImportError:
             import requests
             self._requests = requests
+            self._transport_errors = (requests.RequestException,)
             logger.warning(
                 "curl_cffi 未安装，回退到 requests (TLS 指纹伪装未启用，可能被风控)。"
                 "安装方法: pip install curl_cffi"
             )
 
+    def set_features(self, features: Optional[Dict[str, Any]] = None):
+        """设置 GraphQL Features (覆盖默认值)，并预先序列化/URL 编码，请求时直接复用"""
+        self._features = {**DEFAULT_FEATURES, **(features or {})}
+        self._features_json = dumps_json(self._features)
+        self._features_qs = quote(self._features_json, safe='')
+
+    def _get_session(self, impersonate: Optional[str]):
+        """获取 (必要时创建) 当前线程与 impersonate 对应的持久化 Session"""
+        table = getattr(self._local, "table", None)
+        if table is None:
+            table = self._local.table = _ThreadSessions()
+            with self._lock:
+                self._session_tables.add(table)
+        sessions = table.sessions
+        key = impersonate if self._use_curl_cffi else None
+        session = sessions.get(key)
+        if session is None:
+            # 只有本线程访问自己的 Session 表，创建无需加锁
+            if self._use_curl_cffi:
+                session = self._curl_requests.Session(impersonate=impersonate)
+            else:
+                session = self._requests.Session()
+            sessions[key] = session
+        return session
+
+    def close(self):
+        """写回 user_id 缓存并关闭所有持久化 Session"""
+        self.flush_user_id_cache()
+        sessions = []
+        with self._lock:
+            for table in list(self._session_tables):
+                sessions.extend(table.sessions.values())
+                table.sessions.clear()
+        _close_sessions(sessions)
+
+    def __enter__(self) -> 'XClient':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def _pick_client_profile(self) -> Dict[str, str]:
         """选择一个 UA/TLS profile。"""
         return random.choice(UA_PROFILES)
 
-    def _build_headers(self, account: AccountState, user_agent: Optional[str] = None) -> Dict[str, str]:
-        """构造请求头 (P3: 每次请求随机选取 UA)"""
-        return {
-            "authorization": WEB_BEARER_TOKEN,
-            "x-csrf-token": account.ct0,
-            "x-twitter-active-user": "yes",
-            "x-twitter-auth-type": "OAuth2Session",
-            "x-twitter-client-language": "en",
-            "content-type": "application/json",
-            "user-agent": user_agent or random.choice(UA_POOL),
-            "accept": "*/*",
-            "accept-language": "en-US,en;q=0.9",
-            "referer": "https://x.com/",
-            "origin": "https://x.com",
-        }
+    def _build_headers(self, account: AccountState, user_agent: str) -> Dict[str, str]:
+        """构造请求头 (P3: UA 由调用方从本次选中的 profile 传入，保证与 TLS 指纹一致)"""
+        return {**_STATIC_HEADERS, "x-csrf-token": account.ct0, "user-agent": user_agent}
 
     def _build_cookies(self, account: AccountState) -> Dict[str, str]:
-        """构造 Cookie"""
-        return {
-            "auth_token": account.auth_token,
-            "ct0": account.ct0,
-        }
+        """构造 Cookie (账号构造时已生成，直接复用)"""
+        return account.cookies
 
     def _make_request(
         self,
@@ -237,28 +399,35 @@ class XClient:
         cookies = self._build_cookies(account)
 
         try:
-            if self._use_curl_cffi:
-                response = self._curl_requests.get(
-                    url,
-                    params=params,
-                    headers=headers,
-                    cookies=cookies,
-                    impersonate=profile["impersonate"],
-                    timeout=self.timeout,
-                )
-            else:
-                response = self._requests.get(
-                    url,
-                    params=params,
-                    headers=headers,
-                    cookies=cookies,
-                    timeout=self.timeout,
-                )
+            session = self._get_session(profile["impersonate"])
+            try:
+                if self._use_curl_cffi:
+                    response = session.get(
+                        url,
+                        params=params or None,
+                        headers=headers,
+                        cookies=cookies,
+                        impersonate=profile["impersonate"],
+                        timeout=self.timeout,
+                    )
+                else:
+                    response = session.get(
+                        url,
+                        params=params or None,
+                        headers=headers,
+                        cookies=cookies,
+                        timeout=self.timeout,
+                    )
+            finally:
+                # Session 跨账号复用: 清空服务端下发的 Cookie，避免把上一个账号的 Cookie 带给下一个
+                session.cookies.clear()
 
             status = response.status_code
 
             if status == 200:
-                data = response.json()
+                # 直接解码原始响应体 (orjson 可用时走快速路径)
+                content = response.content
+                data = loads_json(content) if isinstance(content, (bytes, bytearray)) else response.json()
                 # Task 3: 检测 GraphQL 业务错误 (HTTP 200 但返回 errors)
                 errors = data.get("errors") or []
                 if errors and not data.get("data"):
@@ -281,74 +450,131 @@ class XClient:
                     if any(k in error_text for k in ("unauthorized", "forbidden", "auth")):
                         raise AuthError(f"GraphQL auth error: {error_msgs}")
 
-                    raise XClientError(f"GraphQL error: {error_msgs}")
+                    raise XClientError(f"GraphQL error: {error_msgs}", kind="client")
                 return data
             elif status == 429:
-                # Task 2: 健壮解析 retry-after
-                raw_retry = response.headers.get("retry-after", "")
-                try:
-                    retry_after = int(raw_retry)
-                except (ValueError, TypeError):
-                    logger.warning(f"无法解析 retry-after 头: '{raw_retry}'，使用默认 900s")
-                    retry_after = 900
-                raise RateLimitError(retry_after)
+                # Task 2: 健壮解析 retry-after (秒数或 HTTP-date)
+                raise RateLimitError(_parse_retry_after(response.headers.get("retry-after", "")))
             elif status in (401, 403):
                 raise AuthError(f"HTTP {status}: Token 可能已过期或被封")
             else:
-                raise XClientError(f"HTTP {status}: {response.text[:200]}")
+                raise XClientError(
+                    f"HTTP {status}: {response.text[:200]}",
+                    kind="server" if status >= 500 else "client",
+                )
 
-        except (RateLimitError, AuthError):
+        except XClientError:
+            raise
+        except self._transport_errors as e:
+            raise XClientError(f"请求失败: {e}", kind="server") from e
+        except ValueError as e:
+            # HTTP 200 但响应体不是合法 JSON (如风控/挑战页)
+            raise XClientError(f"响应解析失败: {e}", kind="server") from e
+        except Exception:
+            # 其他异常多为代码缺陷，不包装，记录后原样抛出
+            logger.exception("请求处理出现未预期的异常")
             raise
-        except Exception as e:
-            if "RateLimitError" in str(type(e).__name__) or "AuthError" in str(type(e).__name__):
-                raise
-            raise XClientError(f"请求失败: {e}")
 
     def _check_circuit_breaker(self) -> bool:
         """
         P1: 检查断路器状态。
 
+        不会阻塞: 冷却未结束时立即返回 False；冷却结束后转为半开，只放行一次试探请求，
+        试探结束前其他调用方同样返回 False。
+
         Returns:
-            True = 可以发请求, False = 断路器打开，需要等待
+            True = 可以发请求, False = 断路器打开
         """
-        if self._cb_open_until > 0:
-            remaining = self._cb_open_until - time.time()
-            if remaining > 0:
-                logger.warning(f"⚡ 断路器已打开，等待 {remaining:.0f}s 后重试...")
-                time.sleep(min(remaining, self._cb_cooldown))
-            # 半开状态: 允许一次试探请求
-            self._cb_open_until = 0
-            logger.info("⚡ 断路器半开，尝试恢复...")
-        return True
+        with self._lock:
+            if self._cb_half_open:
+                return False
+            if self._cb_open_until_ns:
+                if self._cb_remaining() > 0:
+                    return False
+                # 半开状态: 允许一次试探请求
+                self._cb_open_until_ns = 0
+                self._cb_half_open = True
+                self._cb_probe_thread = threading.get_ident()
+                logger.info("⚡ 断路器半开，尝试恢复...")
+            return True
+
+    def _release_probe(self):
+        """本线程的试探请求未产生成功/失败结果 (如无可用账号) 时，交还试探机会给下一个调用方"""
+        with self._lock:
+            if self._cb_half_open and self._cb_probe_thread == threading.get_ident():
+                self._cb_half_open = False
+                self._cb_open_until_ns = time.monotonic_ns()
+
+    def _cb_remaining(self) -> float:
+        """断路器剩余冷却时间 (秒)，未打开时为 0"""
+        if not self._cb_open_until_ns:
+            return 0.0
+        return max(0.0, (self._cb_open_until_ns - time.monotonic_ns()) / 1e9)
 
     def _record_success(self):
         """P1: 记录请求成功，重置断路器"""
-        if self._cb_consecutive_failures > 0:
-            logger.info(f"⚡ 断路器恢复 (此前连续失败 {self._cb_consecutive_failures} 次)")
-        self._cb_consecutive_failures = 0
-        self._cb_open_until = 0
-
-    def _record_failure(self) -> bool:
+        with self._lock:
+            if self._cb_consecutive_failures > 0:
+                logger.info(f"⚡ 断路器恢复 (此前连续失败 {self._cb_consecutive_failures} 次)")
+            self._cb_consecutive_failures = 0
+            self._cb_failed_accounts.clear()
+            self._cb_open_until_ns = 0
+            self._cb_half_open = False
+            self._cb_current_cooldown = self._cb_cooldown
+
+    def _record_failure(self, account: Optional[AccountState] = None) -> bool:
         """
         P1: 记录请求失败，判断是否触发断路器。
 
+        Args:
+            account: 失败所用的账号 (非账号自身原因的失败才传入)；
+                     多账号池中所有账号都已失败时不必等到阈值，立即触发断路器
+
         Returns:
             True = 本次调用触发了断路器
         """
-        self._cb_consecutive_failures += 1
-        if self._cb_consecutive_failures >= self._cb_threshold:
-            self._cb_open_until = time.time() + self._cb_cooldown
+        with self._lock:
+            self._cb_consecutive_failures += 1
+            if account is not None:
+                self._cb_failed_accounts.add(account.index)
+            all_accounts_failing = len(self._cb_failed_accounts) >= max(2, self.account_pool.total_count)
+            if self._cb_half_open:
+                # 半开试探失败: 上游仍未恢复，指数退避后再试探
+                self._cb_half_open = False
+                self._cb_current_cooldown = min(
+                    self._cb_current_cooldown * 2,
+                    self._cb_cooldown * CB_MAX_BACKOFF_FACTOR,
+                )
+            elif self._cb_consecutive_failures < self._cb_threshold and not all_accounts_failing:
+                return False
+
+            self._cb_open_until_ns = time.monotonic_ns() + int(self._cb_current_cooldown * 1_000_000_000)
             logger.error(
                 f"⚡ 断路器触发: 连续失败 {self._cb_consecutive_failures} 次，"
-                f"暂停请求 {self._cb_cooldown}s"
+                f"暂停请求 {self._cb_current_cooldown}s"
             )
             return True
-        return False
+
+    def _pace(self):
+        """
+        令牌桶限速: 每个请求消耗一个令牌，令牌按 AIMD 当前速率补充，桶满时最多 REQUEST_BURST 个。
+        令牌不足时在锁内预约 (令牌记为负数)、锁外睡眠到预约时刻，多线程并发时各请求依次错开。
+        """
+        with self._lock:
+            now = time.monotonic()
+            rate = self._aimd_rate
+            tokens = self._bucket_tokens + (now - self._bucket_refilled_at) * rate
+            tokens = min(self._bucket_capacity, tokens) - 1
+            self._bucket_tokens = tokens
+            self._bucket_refilled_at = now
+        if tokens < 0:
+            time.sleep(-tokens / rate)
 
     def _request_with_retry(
         self,
         url: str,
         params: Dict[str, str],
+        wait_for_circuit: Optional[bool] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         带重试、账号轮换和断路器保护的请求。
@@ -356,68 +582,210 @@ class XClient:
         Args:
             url: 请求 URL
             params: 查询参数
+            wait_for_circuit: 断路器打开时是否等待冷却结束，None = 使用实例设置
 
         Returns:
-            JSON 响应 dict，或 None (全部失败)
+            JSON 响应 dict，或 None (全部失败/断路器打开)
         """
-        # P1: 断路器检查
-        self._check_circuit_breaker()
-
-        for attempt in range(self.max_retries):
-            account = self.account_pool.get_next()
-            if account is None:
-                # 尝试等待可用账号
-                account = self.account_pool.wait_for_available(timeout=300)
-                if account is None:
-                    logger.error("无可用账号，请求终止")
-                    return None
-
-            try:
-                result = self._make_request(url, params, account)
-                self._record_success()  # P1: 成功，重置断路器
-                return result
-
-            except RateLimitError as e:
-                self.account_pool.mark_rate_limited(account, e.retry_after)
-                cb_opened = self._record_failure()  # P1
-                logger.warning(f"账号 #{account.index} 被限速 (尝试 {attempt+1}/{self.max_retries})")
-                if cb_opened:
+        # P1: 断路器检查 (打开时默认快速失败)
+        if not self._check_circuit_breaker():
+            if wait_for_circuit is None:
+                wait_for_circuit = self.wait_for_circuit
+            remaining = self._cb_remaining()
+            if not wait_for_circuit:
+                logger.warning(f"⚡ 断路器已打开 (剩余 {remaining:.0f}s)，跳过请求")
+                return None
+            logger.warning(f"⚡ 断路器已打开，等待 {remaining:.0f}s 后重试...")
+            # 冷却结束时可能已有其他线程在试探，继续等待到拿到试探机会或断路器关闭
+            while True:
+                time.sleep(max(remaining, 0.5))
+                if self._check_circuit_breaker():
                     break
+                remaining = self._cb_remaining()
 
-            except AuthError as e:
-                self.account_pool.mark_dead(account, str(e))
-                cb_opened = self._record_failure()  # P1
-                logger.error(f"账号 #{account.index} 认证失败: {e}")
-                if cb_opened:
-                    break
+        rate_limited_accounts = set()
+        try:
+            for attempt in range(self.max_retries):
+                account = self.account_pool.get_next()
+                if account is None:
+                    # 尝试等待可用账号
+                    account = self.account_pool.wait_for_available(timeout=300)
+                    if account is None:
+                        logger.error("无可用账号，请求终止")
+                        return None
 
-            except XClientError as e:
-                cb_opened = self._record_failure()  # P1
-                logger.warning(f"请求失败 (尝试 {attempt+1}/{self.max_retries}): {e}")
-                if cb_opened:
-                    break
-                if attempt < self.max_retries - 1:
-                    wait = (attempt + 1) * 2
-                    time.sleep(wait)
+                try:
+                    self._pace()
+                    result = self._make_request(url, params, account)
+                    self._record_success()  # P1: 成功，重置断路器
+                    with self._lock:
+                        self._aimd_rate = min(self._max_rate, self._aimd_rate + AIMD_INCREASE)
+                    return result
+
+                except RateLimitError as e:
+                    self.account_pool.mark_rate_limited(account, e.retry_after)
+                    with self._lock:
+                        self._aimd_rate = max(self._min_rate, self._aimd_rate * AIMD_DECREASE_FACTOR)
+                    cb_opened = self._record_failure(account)  # P1
+                    logger.warning(f"账号 #{account.index} 被限速 (尝试 {attempt+1}/{self.max_retries})")
+                    if cb_opened:
+                        break
+                    # 不同账号接连被限速，多半是全局 (IP 级) 限流: 换账号重试只会消耗更多账号额度
+                    rate_limited_accounts.add(account.index)
+                    if len(rate_limited_accounts) >= 2:
+                        logger.warning("多个账号接连被限速，疑似全局限流，停止本次重试")
+                        break
+
+                except AuthError as e:
+                    self.account_pool.mark_dead(account, str(e))
+                    cb_opened = self._record_failure()  # P1
+                    logger.error(f"账号 #{account.index} 认证失败: {e}")
+                    if cb_opened:
+                        break
+
+                except XClientError as e:
+                    if e.kind == "client":
+                        # 4xx/业务错误不代表 X 故障: 不计入断路器，重试也不会改变结果
+                        logger.warning(f"请求被拒绝 (客户端错误，不重试): {e}")
+                        return None
+                    cb_opened = self._record_failure(account)  # P1
+                    logger.warning(f"请求失败 (尝试 {attempt+1}/{self.max_retries}): {e}")
+                    if cb_opened:
+                        break
+                    if attempt < self.max_retries - 1:
+                        # 指数退避 + 抖动，避免多个调用方同步重试
+                        wait = RETRY_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+                        time.sleep(wait)
+
+            logger.error(f"请求在 {self.max_retries} 次重试后仍然失败")
+            return None
+        finally:
+            # 半开试探没有得出结果时 (如无可用账号)，交还试探机会
+            self._release_probe()
 
-        logger.error(f"请求在 {self.max_retries} 次重试后仍然失败")
-        return None
+    def _build_graphql_url(self, url: str, variables: Dict[str, Any]) -> str:
+        """
+        拼接完整的 GraphQL 查询 URL。
+        features/fieldToggles 已预先编码，每次请求只需编码 variables。
+        """
+        return (
+            f"{url}?variables={quote(dumps_json(variables), safe='')}"
+            f"&features={self._features_qs}&fieldToggles={_FIELD_TOGGLES_QS}"
+        )
+
+    def _get_cached_user_id(self, cache_key: str) -> Optional[str]:
+        """读取未过期的缓存 user_id，命中时移到 LRU 末尾"""
+        with self._lock:
+            entry = self._user_id_cache.get(cache_key)
+            if entry is None:
+                return None
+            user_id, cached_at = entry
+            if time.monotonic() - cached_at >= USER_ID_CACHE_TTL:
+                del self._user_id_cache[cache_key]
+                return None
+            self._user_id_cache.move_to_end(cache_key)
+            return user_id
+
+    def _cache_user_id(self, cache_key: str, user_id: str):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            cache = self._user_id_cache
+            cache[cache_key] = (user_id, time.monotonic())
+            cache.move_to_end(cache_key)
+            while len(cache) > USER_ID_CACHE_SIZE:
+                cache.popitem(last=False)
+            # 不在此处写文件: 由 flush_user_id_cache 在批量结束/close 时统一写回
+            self._user_id_cache_dirty = True
+
+    def flush_user_id_cache(self):
+        """
+        把新增的 user_id 缓存写回磁盘 (未配置路径或没有新条目时直接返回)。
+
+        self._lock 内只取快照，文件写入在锁外进行，不阻塞其他线程的节流/断路器/Session 查找。
+        """
+        if not self._user_id_cache_path:
+            return
+        # 先取 IO 锁再取快照: 并发 flush 时不会用旧快照覆盖新文件
+        with self._user_id_cache_io_lock:
+            with self._lock:
+                if not self._user_id_cache_dirty:
+                    return
+                self._user_id_cache_dirty = False
+                snapshot = list(self._user_id_cache.items())
+            if not self._save_user_id_cache(snapshot):
+                with self._lock:
+                    self._user_id_cache_dirty = True
+
+    def _load_user_id_cache(self):
+        """从磁盘加载 user_id 缓存 (文件中记录 epoch 时间，换算为 monotonic 后沿用同一 TTL)"""
+        path = self._user_id_cache_path
+        try:
+            with open(path, 'rb') as f:
+                entries = loads_json(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取 user_id 缓存失败 ({path}): {e}")
+            return
+        if not isinstance(entries, dict):
+            logger.warning(f"user_id 缓存格式无效，忽略: {path}")
+            return
+
+        offset = time.monotonic() - time.time()
+        loaded = []
+        for key, value in entries.items():
+            try:
+                user_id, cached_at = value
+                loaded.append((float(cached_at) + offset, key, str(user_id)))
+            except (TypeError, ValueError):
+                continue
+        # 按写入时间排序，最近写入的排在 LRU 末尾
+        for cached_at, key, user_id in sorted(loaded)[-USER_ID_CACHE_SIZE:]:
+            if time.monotonic() - cached_at < USER_ID_CACHE_TTL:
+                self._user_id_cache[key] = (user_id, cached_at)
+        logger.debug(f"从 {path} 加载 {len(self._user_id_cache)} 个 user_id 缓存")
+
+    def _save_user_id_cache(self, snapshot: List[Tuple[str, Tuple[str, float]]]) -> bool:
+        """把 user_id 缓存快照写入磁盘 (先写临时文件再替换，避免中断时留下半个文件)；成功返回 True"""
+        path = self._user_id_cache_path
+        offset = time.time() - time.monotonic()
+        entries = {key: [user_id, cached_at + offset] for key, (user_id, cached_at) in snapshot}
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(dumps_json(entries))
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            logger.warning(f"保存 user_id 缓存失败 ({path}): {e}")
+            return False
 
     # ─── 公开 API ───
 
-    def get_user_id(self, username: str) -> Optional[str]:
+    def get_user_id(self, username: str, user_id_hint: Optional[str] = None) -> Optional[str]:
         """
         获取用户的 rest_id (数字 ID)。
 
         Args:
             username: 用户名 (不含 @)
+            user_id_hint: 调用方已知的 user_id (如上次抓取保存的)，提供时直接采用，不发请求
 
         Returns:
             User ID 字符串，或 None
         """
-        # 检查缓存
-        if username in self._user_id_cache:
-            return self._user_id_cache[username]
+        # 注意: X 用户名可以是纯数字，不能据 username.isdigit() 判断它就是 user_id
+        if user_id_hint:
+            if user_id_hint.isdigit():
+                self._cache_user_id(username.lower(), user_id_hint)
+                return user_id_hint
+            logger.warning(f"忽略非数字的 user_id_hint: {user_id_hint}")
+
+        # 检查缓存 (只缓存成功结果，单次查找)
+        # X 用户名不区分大小写，统一小写作为键，避免 "OpenAI"/"openai" 重复请求
+        cache_key = username.lower()
+        cached = self._get_cached_user_id(cache_key)
+        if cached is not None:
+            return cached
 
         # P2: 使用可配置的 query_ids 和 features
         query_id = self._query_ids["UserByScreenName"]
@@ -428,19 +796,13 @@ class XClient:
             "withSafetyModeUserFields": True,
         }
 
-        params = {
-            "variables": json.dumps(variables, separators=(',', ':')),
-            "features": json.dumps(self._features, separators=(',', ':')),
-            "fieldToggles": json.dumps(DEFAULT_FIELD_TOGGLES, separators=(',', ':')),
-        }
-
-        response = self._request_with_retry(url, params)
+        response = self._request_with_retry(self._build_graphql_url(url, variables), {})
         if response is None:
             return None
 
         user_id = TweetParser.parse_user_id(response)
         if user_id:
-            self._user_id_cache[username] = user_id
+            self._cache_user_id(cache_key, user_id)
             logger.debug(f"用户 @{username} -> ID: {user_id}")
 
         return user_id
@@ -451,6 +813,8 @@ class XClient:
         count: int = 20,
         cursor: Optional[str] = None,
         include_replies: bool = False,
+        skip_ids: Optional[AbstractSet[str]] = None,
+        skipped_ids: Optional[List[str]] = None,
     ) -> Tuple[List[Tweet], Optional[str]]:
         """
         获取指定用户的推文时间线（单页）。
@@ -459,7 +823,10 @@ class XClient:
             user_id: 用户 ID (rest_id)
             count: 每页推文数量 (最大 100)
             cursor: 分页游标 (首次请求传 None)
-            include_replies: 是否包含回复
+            include_replies: 是否包含回复 (服务端返回回复需配置 UserTweetsAndReplies 的 Query ID，
+                             未配置时与默认行为相同，仅不再过滤 UserTweets 中的回复)
+            skip_ids: 已获取过的推文 ID，解析时直接跳过 (不构造 Tweet)
+            skipped_ids: 可选，收集因 skip_ids 被跳过的推文 ID
 
         Returns:
             (tweets, next_cursor):
@@ -467,8 +834,13 @@ class XClient:
             - next_cursor: 下一页游标，None 表示没有更多
         """
         # P2: 使用可配置的 query_ids 和 features
-        query_id = self._query_ids["UserTweets"]
-        url = f"{self.GRAPHQL_BASE}/{query_id}/UserTweets"
+        # UserTweets 对应主页 "帖子" 标签，服务端已排除大部分回复；需要回复时改用
+        # UserTweetsAndReplies (配置了其 Query ID 时)，否则回退到 UserTweets
+        endpoint = "UserTweets"
+        if include_replies and "UserTweetsAndReplies" in self._query_ids:
+            endpoint = "UserTweetsAndReplies"
+        query_id = self._query_ids[endpoint]
+        url = f"{self.GRAPHQL_BASE}/{query_id}/{endpoint}"
 
         variables = {
             "userId": user_id,
@@ -477,24 +849,19 @@ class XClient:
             "withQuickPromoteEligibilityTweetFields": True,
             "withVoice": True,
             "withV2Timeline": True,
+            "withReplies": include_replies,
         }
 
         if cursor:
             variables["cursor"] = cursor
 
-        params = {
-            "variables": json.dumps(variables, separators=(',', ':')),
-            "features": json.dumps(self._features, separators=(',', ':')),
-            "fieldToggles": json.dumps(DEFAULT_FIELD_TOGGLES, separators=(',', ':')),
-        }
-
-        response = self._request_with_retry(url, params)
+        response = self._request_with_retry(self._build_graphql_url(url, variables), {})
         if response is None:
             return [], None
 
-        tweets, next_cursor = self.parser.parse_timeline(response)
+        tweets, next_cursor = self.parser.parse_timeline(response, skip_ids, skipped_ids)
 
-        # 过滤回复 (保留推文串/自回复: 用户回复自己的推文)
+        # 过滤回复 (保留推文串/自回复: 用户回复自己的推文)；兜底服务端仍返回的回复
         if not include_replies:
             tweets = [
                 t for t in tweets
@@ -527,14 +894,12 @@ class XClient:
         Returns:
             Tweet 对象列表 (按时间倒序)
         """
-        from datetime import datetime, timezone
-
         all_tweets = []
         cursor = None
         page = 0
         seen_tweet_ids = set()   # 跨页去重，避免置顶/重叠数据反复进入结果
         seen_cursors = set()     # 防止 next_cursor 循环导致重复翻同一页
-        duplicate_hit_counts: Dict[str, int] = {}
+        duplicate_hit_counts: Counter = Counter()
         empty_add_pages = 0      # 连续 0 新增页计数，用于避免 pinned 等导致长时间不收敛
         max_empty_add_pages = 3
         near_all_old_threshold = 0.9  # 当页过期占比阈值，超过则认为继续翻页收益极低
@@ -547,20 +912,27 @@ class XClient:
             except ValueError:
                 logger.warning(f"无效的日期格式: {since_date}，忽略日期过滤")
 
+        skip_retweets = not include_retweets
+        append_tweet = all_tweets.append
+
         while len(all_tweets) < limit:
             page += 1
-            # 每页上限 20, 不要设太高避免触发异常检测
-            per_page = min(20, limit - len(all_tweets))
+            # 大页减少往返次数，features 等固定负载按推文摊薄
+            per_page = min(self.default_page_size, limit - len(all_tweets))
             request_cursor = cursor
 
+            # 已获取过的推文在解析阶段按 entryId 跳过，只回传 ID 用于重复统计
+            page_skipped_ids: List[str] = []
             tweets, next_cursor = self.get_user_tweets(
                 user_id,
                 count=per_page,
                 cursor=cursor,
                 include_replies=include_replies,
+                skip_ids=seen_tweet_ids,
+                skipped_ids=page_skipped_ids,
             )
 
-            if not tweets:
+            if not tweets and not page_skipped_ids:
                 logger.info(
                     f"[X Scraper][Page {page}] cursor={request_cursor or '<start>'} "
                     "返回 0 条，停止分页"
@@ -571,39 +943,35 @@ class XClient:
             # 重要: 分页终止判断只看日期，不受转推/回复过滤影响
             # 否则一个全是转推的页面会被误判为"整页过旧"而提前终止
             page_has_new_enough = False  # 本页是否有日期范围内的推文 (不论是否被业务过滤)
-            raw_count = len(tweets)
+            raw_count = len(tweets) + len(page_skipped_ids)
             skipped_old = 0
             skipped_retweet = 0
-            skipped_duplicate = 0
+            skipped_duplicate = len(page_skipped_ids)
             added_count = 0
-            duplicate_sample_id = ""
+            duplicate_sample_id = page_skipped_ids[0] if page_skipped_ids else ""
+            duplicate_hit_counts.update(page_skipped_ids)
             for tweet in tweets:
                 # 先做日期判断 (影响分页终止)
-                tweet_in_date_range = True
-                if cutoff_date and tweet.created_at:
-                    if tweet.created_at < cutoff_date:
-                        tweet_in_date_range = False
-                
-                if tweet_in_date_range:
-                    page_has_new_enough = True
-
-                # 再做业务过滤 (只影响是否加入结果，不影响分页终止)
-                if not tweet_in_date_range:
+                if cutoff_date and tweet.created_at and tweet.created_at < cutoff_date:
                     skipped_old += 1
                     continue
-                if not include_retweets and tweet.is_retweet:
+                page_has_new_enough = True
+
+                # 再做业务过滤 (只影响是否加入结果，不影响分页终止)
+                if skip_retweets and tweet.is_retweet:
                     skipped_retweet += 1
                     continue
-                if tweet.id in seen_tweet_ids:
+                tweet_id = tweet.id
+                if tweet_id in seen_tweet_ids:
                     skipped_duplicate += 1
-                    if tweet.id:
-                        duplicate_hit_counts[tweet.id] = duplicate_hit_counts.get(tweet.id, 0) + 1
+                    if tweet_id:
+                        duplicate_hit_counts[tweet_id] += 1
                         if not duplicate_sample_id:
-                            duplicate_sample_id = tweet.id
+                            duplicate_sample_id = tweet_id
                     continue
 
-                seen_tweet_ids.add(tweet.id)
-                all_tweets.append(tweet)
+                seen_tweet_ids.add(tweet_id)
+                append_tweet(tweet)
                 added_count += 1
 
                 if len(all_tweets) >= limit:
@@ -678,11 +1046,7 @@ class XClient:
             time.sleep(delay)
 
         if duplicate_hit_counts:
-            top_dup = sorted(
-                duplicate_hit_counts.items(),
-                key=lambda kv: kv[1],
-                reverse=True,
-            )[:3]
+            top_dup = duplicate_hit_counts.most_common(3)
             top_dup_str = ", ".join(f"{tid}({cnt})" for tid, cnt in top_dup)
             logger.info(f"[X Scraper] 跨页重复命中 Top IDs: {top_dup_str}")
 
@@ -3,13 +3,14 @@ models.py - X/Twitter 推文数据模型
 
 定义 Tweet 和 TweetMedia 数据类，以及与 Pipeline FetcherStage 兼容的序列化方法。
 """
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from html import escape
 
 
-@dataclass
+@dataclass(slots=True)
 class TweetMedia:
     """推文媒体附件（图片/视频/GIF）"""
     type: str = ""             # "photo", "video", "animated_gif"
@@ -21,7 +22,7 @@ class TweetMedia:
     duration_ms: int = 0       # 视频时长 (毫秒)
 
 
-@dataclass
+@dataclass(slots=True)
 class Tweet:
     """X/Twitter 推文数据结构"""
     id: str = ""                           # 推文 ID
@@ -57,7 +58,7 @@ class Tweet:
     lang: str = ""                  # 语言代码
     source: str = ""                # 发布客户端
 
-    # 原始数据 (用于调试)
+    # 原始数据 (用于调试，仅 TweetParser(keep_raw=True) 时填充)
     _raw: Dict[str, Any] = field(default_factory=dict, repr=False)
 
     @property
@@ -68,8 +69,10 @@ class Tweet:
     @property
     def date_str(self) -> str:
         """日期字符串 YYYY-MM-DD"""
-        if self.created_at:
-            return self.created_at.strftime("%Y-%m-%d")
+        d = self.created_at
+        if d:
+            # 直接格式化字段，避免 strftime 的格式串解析开销
+            return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
         return ""
 
     def _build_content_html(self) -> str:
@@ -77,20 +80,20 @@ class Tweet:
         构建与 RSSHub 输出格式类似的 HTML 内容。
         用于兼容 content_enricher 阶段的链接提取逻辑。
         """
-        parts = []
-
         # 推文正文
         text = escape(self.text) if self.text else ""
         # 将 URL 转换为 <a> 标签，便于 LinkExtractor 提取
+        trailing = []
         for url in self.urls:
             escaped_url = escape(url)
             if escaped_url in text:
                 text = text.replace(escaped_url, f'<a href="{escaped_url}">{escaped_url}</a>')
             else:
                 # URL 可能被 t.co 缩短，追加到末尾
-                parts.append(f'<a href="{escaped_url}">{escaped_url}</a>')
+                trailing.append(f'<a href="{escaped_url}">{escaped_url}</a>')
 
-        parts.insert(0, f"<p>{text}</p>")
+        parts = [f"<p>{text}</p>"]
+        parts.extend(trailing)
 
         # 媒体附件
         for m in self.media:
@@ -102,10 +105,11 @@ class Tweet:
         # 引用推文
         if self.quoted_tweet:
             qt = self.quoted_tweet
+            qt_link = escape(qt.permalink)
             parts.append(
                 f'<blockquote>'
                 f'<p><b>@{escape(qt.username)}</b>: {escape(qt.text[:200])}</p>'
-                f'<a href="{escape(qt.permalink)}">{escape(qt.permalink)}</a>'
+                f'<a href="{qt_link}">{qt_link}</a>'
                 f'</blockquote>'
             )
 
@@ -115,8 +119,9 @@ class Tweet:
         """
         转换为 Pipeline FetcherStage 兼容的 post 字典。
 
-        此格式与 source_fetcher._fetch_recent_posts() 的输出完全一致，
-        可以直接放入 fetch_queue 供后续 Pipeline 阶段消费。
+        键与 source_fetcher._fetch_recent_posts() 的输出相同，可以直接放入 fetch_queue
+        供后续 Pipeline 阶段消费。唯一差别: extra_urls 是只读 tuple (预填充的推文外链，
+        与 Tweet.urls 不共享可变列表)，而 RSS 来源为空 list；下游只读取或整体替换该字段。
         """
         # 标题: 取推文前100字符
         title = self.text[:100] if self.text else "(No text)"
@@ -130,10 +135,12 @@ class Tweet:
             "rss_url": "",  # 非 RSS 来源
             "source_type": "X",
             "source_name": source_name,
+            # 同一来源的所有帖子共享同一个小写字符串对象
+            "source_name_lc": sys.intern(source_name.lower()),
             "content": self._build_content_html(),
             # 预填充外链，EnricherStage 会进一步处理
             "extra_content": "",
-            "extra_urls": list(self.urls),
+            "extra_urls": tuple(self.urls),
         }
 
     def __str__(self) -> str:
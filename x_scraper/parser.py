@@ -3,16 +3,91 @@ parser.py - X/Twitter GraphQL 响应解析器
 
 将 UserTweets GraphQL endpoint 返回的复杂嵌套 JSON 解析为 Tweet 对象。
 """
+import json
 import logging
-from datetime import datetime, timezone
-from typing import List, Optional, Tuple
+import re
+import sys
+from datetime import datetime
+from typing import AbstractSet, Any, List, Optional, Tuple, Union
 
 from .models import Tweet, TweetMedia
 
+# orjson 为可选加速依赖 (SIMD 解码，比标准库 json 快数倍)，未安装时回退到 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger("x_scraper.parser")
 
 # X (Twitter) 的日期格式: "Mon Feb 10 12:34:56 +0000 2026"
 TWITTER_DATE_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+# source 字段: '<a href="..." rel="nofollow">Twitter Web App</a>'
+_SOURCE_RE = re.compile(r'>(.+?)</a>')
+# 缺失字段的共享默认值 (只读，不可修改)，避免 .get(key, {}) 每次新建空 dict
+_EMPTY: dict = {}
+_MONTHS = {
+    "Jan": "01", "Feb": "02", "Mar": "03", "Apr": "04", "May": "05", "Jun": "06",
+    "Jul": "07", "Aug": "08", "Sep": "09", "Oct": "10", "Nov": "11", "Dec": "12",
+}
+_fromisoformat = datetime.fromisoformat
+
+
+def _parse_twitter_date(date_str: str) -> datetime:
+    """
+    按固定位置把 Twitter 日期重排为 ISO 8601，交给 C 实现的 fromisoformat 解析
+    (比 strptime 快一个数量级，也快于逐字段 int() 后构造 datetime)。
+
+    X 返回的 created_at 总是 UTC ("+0000")；其他偏移或非标准长度交给 strptime 处理。
+    """
+    if len(date_str) == 30 and date_str[20:25] == "+0000":
+        try:
+            return _fromisoformat(
+                f"{date_str[26:30]}-{_MONTHS[date_str[4:7]]}-{date_str[8:10]}T{date_str[11:19]}+00:00"
+            )
+        except (KeyError, ValueError):
+            pass
+    return datetime.strptime(date_str, TWITTER_DATE_FORMAT)
+
+
+def _is_self_status(url: str, tweet_id: str) -> bool:
+    """url 是否为推文自身的 x.com/twitter.com status 链接 (按最后一个 /status/ 后的 ID 比较，不分配中间列表)"""
+    i = url.rfind("/status/")
+    if i < 0 or not tweet_id or ("x.com" not in url and "twitter.com" not in url):
+        return False
+    start = i + 8
+    if not url.startswith(tweet_id, start):
+        return False
+    end = start + len(tweet_id)
+    # ID 必须完整匹配: 其后不能紧跟其他数字 (如 .../status/1234 与 ID 123)
+    return end == len(url) or not url[end].isdigit()
+
+
+def _entry_tweet_id(entry_id: str) -> str:
+    """从 entryId ("tweet-<id>" / "profile-conversation-...-tweet-<id>") 中取出推文 ID，没有则返回 """""
+    _, sep, tweet_id = entry_id.rpartition("tweet-")
+    return tweet_id if sep else ""
+
+
+def loads_json(raw: Union[bytes, bytearray, str, Any]) -> Any:
+    """
+    解码 GraphQL 响应体。
+
+    bytes/str 使用 orjson (可用时) 或标准库 json 解码；
+    已解码的对象 (dict 等) 原样返回。
+    """
+    if isinstance(raw, (bytes, bytearray, str)):
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
+    return raw
+
+
+def dumps_json(obj: Any) -> str:
+    """紧凑序列化 (无空格)，用于 GraphQL 查询参数；orjson 可用时走快速路径"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'))
 
 
 class TweetParser:
@@ -23,38 +98,53 @@ class TweetParser:
     将深层嵌套的 JSON 结构解析为扁平的 Tweet 对象列表。
     """
 
+    def __init__(self, keep_raw: bool = False):
+        """
+        Args:
+            keep_raw: 是否在 Tweet._raw 中保留原始 result (调试用)。
+                      保留会让每条推文持有整段响应子树，长时间抓取时内存随之增长。
+        """
+        self.keep_raw = keep_raw
+
     # ─── UserByScreenName 解析 ───
 
     @staticmethod
-    def parse_user_id(response_json: dict) -> Optional[str]:
+    def parse_user_id(response_json: Union[dict, bytes]) -> Optional[str]:
         """
         从 UserByScreenName 响应中提取 user_id (rest_id)。
 
         Args:
-            response_json: GraphQL 响应 JSON
+            response_json: GraphQL 响应 JSON (dict 或原始响应体 bytes)
 
         Returns:
             用户 ID 字符串，或 None
         """
         try:
-            user_result = response_json["data"]["user"]["result"]
+            user_result = loads_json(response_json)["data"]["user"]["result"]
             # 处理可能的 __typename 差异
             if user_result.get("__typename") == "UserUnavailable":
                 logger.warning("用户不可用 (可能已被封禁或设为私密)")
                 return None
             return user_result["rest_id"]
-        except (KeyError, TypeError) as e:
+        except (KeyError, TypeError, ValueError) as e:
             logger.error(f"解析 user_id 失败: {e}")
             return None
 
     # ─── UserTweets 解析 ───
 
-    def parse_timeline(self, response_json: dict) -> Tuple[List[Tweet], Optional[str]]:
+    def parse_timeline(
+        self,
+        response_json: Union[dict, bytes],
+        skip_ids: Optional[AbstractSet[str]] = None,
+        skipped_ids: Optional[List[str]] = None,
+    ) -> Tuple[List[Tweet], Optional[str]]:
         """
         解析 UserTweets GraphQL 响应。
 
         Args:
-            response_json: GraphQL 响应 JSON
+            response_json: GraphQL 响应 JSON (dict 或原始响应体 bytes)
+            skip_ids: 已获取过的推文 ID；entryId 命中的条目直接跳过，不构造 Tweet
+            skipped_ids: 可选，收集因 skip_ids 被跳过的推文 ID (供调用方统计重复)
 
         Returns:
             (tweets, next_cursor):
@@ -66,27 +156,29 @@ class TweetParser:
         seen_ids = set()  # Task 4: 去重 (置顶推文可能与时间线重复)
 
         try:
+            response_json = loads_json(response_json)
             # 通用路径：data.user.result.timeline_v2.timeline.instructions
-            instructions = (
-                response_json
-                .get("data", {})
-                .get("user", {})
-                .get("result", {})
-                .get("timeline_v2", {})
-                .get("timeline", {})
-                .get("instructions", [])
-            )
+            # (必有字段直接下标访问，缺失时走异常分支，正常路径不创建临时空 dict)
+            try:
+                instructions = response_json["data"]["user"]["result"]["timeline_v2"]["timeline"]["instructions"]
+            except (KeyError, TypeError):
+                instructions = []
 
             for instruction in instructions:
                 inst_type = instruction.get("type", "")
 
                 if inst_type == "TimelineAddEntries":
-                    entries = instruction.get("entries", [])
+                    entries = instruction.get("entries") or ()
                     for entry in entries:
                         entry_id = entry.get("entryId", "")
 
                         # 推文条目
                         if entry_id.startswith("tweet-"):
+                            if self._skip_entry(entry_id, skip_ids, skipped_ids):
+                                continue
+                            # 本页已出现过 (如置顶推文) 则不再解析
+                            if self._peek_tweet_id((entry.get("content") or _EMPTY).get("itemContent")) in seen_ids:
+                                continue
                             tweet = self._parse_tweet_entry(entry)
                             if tweet and tweet.id not in seen_ids:
                                 seen_ids.add(tweet.id)
@@ -94,16 +186,13 @@ class TweetParser:
 
                         # 分页游标
                         elif entry_id.startswith("cursor-bottom-"):
-                            cursor_value = (
-                                entry.get("content", {})
-                                .get("value", "")
-                            )
+                            cursor_value = (entry.get("content") or _EMPTY).get("value", "")
                             if cursor_value:
                                 next_cursor = cursor_value
 
                         # 置顶推文模块 (moduleItems)
                         elif entry_id.startswith("profile-conversation-") or entry_id.startswith("homeConversation-"):
-                            module_tweets = self._parse_module_entry(entry)
+                            module_tweets = self._parse_module_entry(entry, skip_ids, skipped_ids, seen_ids)
                             for t in module_tweets:
                                 if t.id not in seen_ids:
                                     seen_ids.add(t.id)
@@ -111,7 +200,11 @@ class TweetParser:
 
                 elif inst_type == "TimelinePinEntry":
                     # 置顶推文
-                    entry = instruction.get("entry", {})
+                    entry = instruction.get("entry") or _EMPTY
+                    if self._skip_entry(entry.get("entryId", ""), skip_ids, skipped_ids):
+                        continue
+                    if self._peek_tweet_id((entry.get("content") or _EMPTY).get("itemContent")) in seen_ids:
+                        continue
                     tweet = self._parse_tweet_entry(entry)
                     if tweet and tweet.id not in seen_ids:
                         seen_ids.add(tweet.id)
@@ -122,6 +215,37 @@ class TweetParser:
 
         return tweets, next_cursor
 
+    @staticmethod
+    def _skip_entry(
+        entry_id: str,
+        skip_ids: Optional[AbstractSet[str]],
+        skipped_ids: Optional[List[str]],
+    ) -> bool:
+        """entryId 中的推文 ID 已在 skip_ids 中时返回 True (并记录到 skipped_ids)"""
+        if not skip_ids:
+            return False
+        tweet_id = _entry_tweet_id(entry_id)
+        if tweet_id and tweet_id in skip_ids:
+            if skipped_ids is not None:
+                skipped_ids.append(tweet_id)
+            return True
+        return False
+
+    @staticmethod
+    def _peek_tweet_id(item_content: Optional[dict]) -> Optional[str]:
+        """
+        不构造 Tweet，直接读取 itemContent 中推文的 ID (与解析后的 tweet.id 一致)。
+
+        结构不完整时返回 None，交给完整解析处理。
+        """
+        try:
+            result = item_content["tweet_results"]["result"]
+            if result.get("__typename") == "TweetWithVisibilityResults":
+                result = result["tweet"]
+            return result["legacy"].get("id_str") or result.get("rest_id", "")
+        except (KeyError, TypeError, AttributeError):
+            return None
+
     def _parse_tweet_entry(self, entry: dict) -> Optional[Tweet]:
         """
         解析单个 timeline entry 为 Tweet 对象。
@@ -133,15 +257,19 @@ class TweetParser:
             Tweet 对象，解析失败返回 None
         """
         try:
-            content = entry.get("content", {})
-            item_content = content.get("itemContent", {})
+            try:
+                item_content = entry["content"]["itemContent"]
+            except (KeyError, TypeError):
+                return None
 
             # 跳过 promoted content
             if item_content.get("promotedMetadata"):
                 return None
 
-            tweet_results = item_content.get("tweet_results", {})
-            result = tweet_results.get("result", {})
+            try:
+                result = item_content["tweet_results"]["result"]
+            except (KeyError, TypeError):
+                return None
 
             return self._parse_tweet_result(result)
 
@@ -150,18 +278,27 @@ class TweetParser:
             logger.debug(f"跳过无法解析的 entry [{entry_id}]: {e}")
             return None
 
-    def _parse_module_entry(self, entry: dict) -> List[Tweet]:
-        """解析 module 类型的 entry（可能包含多个推文，如对话线程）"""
+    def _parse_module_entry(
+        self,
+        entry: dict,
+        skip_ids: Optional[AbstractSet[str]] = None,
+        skipped_ids: Optional[List[str]] = None,
+        seen_ids: AbstractSet[str] = frozenset(),
+    ) -> List[Tweet]:
+        """解析 module 类型的 entry（可能包含多个推文，如对话线程）；seen_ids 中已有的推文不再解析"""
         tweets = []
         try:
-            items = (
-                entry.get("content", {})
-                .get("items", [])
-            )
+            items = (entry.get("content") or _EMPTY).get("items") or ()
             for item in items:
-                item_content = item.get("item", {}).get("itemContent", {})
-                tweet_results = item_content.get("tweet_results", {})
-                result = tweet_results.get("result", {})
+                if self._skip_entry(item.get("entryId", ""), skip_ids, skipped_ids):
+                    continue
+                try:
+                    item_content = item["item"]["itemContent"]
+                    result = item_content["tweet_results"]["result"]
+                except (KeyError, TypeError):
+                    continue
+                if seen_ids and self._peek_tweet_id(item_content) in seen_ids:
+                    continue
                 tweet = self._parse_tweet_result(result)
                 if tweet:
                     tweets.append(tweet)
@@ -179,12 +316,32 @@ class TweetParser:
         - 转推 (Retweet)
         - 引用推文 (Quote Tweet)
 
+        转推/引用的子推文用显式工作栈逐个展开，不递归调用自身。
+
         Args:
             result: tweet_results.result dict
 
         Returns:
             Tweet 对象，或 None
         """
+        # 待解析的子推文: (父 Tweet, 子 result, 挂回父推文的字段名)
+        stack: List[Tuple[Tweet, dict, str]] = []
+        tweet = self._parse_tweet_core(result, stack)
+        while stack:
+            parent, child_result, attr = stack.pop()
+            setattr(parent, attr, self._parse_tweet_core(child_result, stack))
+        return tweet
+
+    def _parse_tweet_core(
+        self,
+        result: dict,
+        stack: List[Tuple[Tweet, dict, str]],
+    ) -> Optional[Tweet]:
+        """
+        解析单个推文本身 (不含子推文)。
+
+        转推/引用的子 result 不在此解析，而是以 (tweet, 子 result, 字段名) 压入 stack。
+        """
         if not result:
             return None
 
@@ -192,50 +349,53 @@ class TweetParser:
 
         # TweetWithVisibilityResults 需要解包
         if typename == "TweetWithVisibilityResults":
-            result = result.get("tweet", {})
+            result = result.get("tweet") or _EMPTY
 
         # 竞选标签或 TweetTombstone
         if typename in ("TweetTombstone", "TweetUnavailable"):
             return None
 
         try:
-            legacy = result.get("legacy", {})
+            legacy = result.get("legacy")
             if not legacy:
                 return None
+            legacy_get = legacy.get
 
             # ─── 基本信息 ───
             tweet = Tweet(
-                id=legacy.get("id_str", result.get("rest_id", "")),
+                id=legacy_get("id_str") or result.get("rest_id", ""),
                 text=self._extract_full_text(result, legacy),
-                created_at=self._parse_date(legacy.get("created_at", "")),
-                lang=legacy.get("lang", ""),
-                source=self._clean_source(result.get("source", "")),
-                conversation_id=legacy.get("conversation_id_str"),
-                in_reply_to_id=legacy.get("in_reply_to_status_id_str"),
-                in_reply_to_username=legacy.get("in_reply_to_screen_name"),
-                _raw=result,
+                created_at=self._parse_date(legacy_get("created_at", "")),
+                # lang / source 取值很少 (如 "en"、"Twitter Web App")，驻留后各推文共享
+                # (字段可能是显式 null，用 or "" 兜底，sys.intern 只接受 str)
+                lang=sys.intern(legacy_get("lang") or ""),
+                source=sys.intern(self._clean_source(result.get("source") or "")),
+                conversation_id=legacy_get("conversation_id_str"),
+                in_reply_to_id=legacy_get("in_reply_to_status_id_str"),
+                in_reply_to_username=legacy_get("in_reply_to_screen_name"),
+                _raw=result if self.keep_raw else {},
             )
 
             # ─── 用户信息 ───
-            user_result = (
-                result.get("core", {})
-                .get("user_results", {})
-                .get("result", {})
-            )
-            user_legacy = user_result.get("legacy", {})
+            try:
+                user_result = result["core"]["user_results"]["result"]
+            except (KeyError, TypeError):
+                user_result = _EMPTY
+            user_legacy = user_result.get("legacy") or _EMPTY
             tweet.user_id = user_result.get("rest_id", "")
-            tweet.username = user_legacy.get("screen_name", "")
-            tweet.display_name = user_legacy.get("name", "")
+            # 同一用户的推文大量重复这两个字段，驻留后共享同一字符串对象 (显式 null 取空字符串)
+            tweet.username = sys.intern(user_legacy.get("screen_name") or "")
+            tweet.display_name = sys.intern(user_legacy.get("name") or "")
 
             # ─── 互动指标 ───
-            tweet.reply_count = legacy.get("reply_count", 0)
-            tweet.retweet_count = legacy.get("retweet_count", 0)
-            tweet.like_count = legacy.get("favorite_count", 0)
-            tweet.quote_count = legacy.get("quote_count", 0)
-            tweet.bookmark_count = legacy.get("bookmark_count", 0)
+            tweet.reply_count = legacy_get("reply_count", 0)
+            tweet.retweet_count = legacy_get("retweet_count", 0)
+            tweet.like_count = legacy_get("favorite_count", 0)
+            tweet.quote_count = legacy_get("quote_count", 0)
+            tweet.bookmark_count = legacy_get("bookmark_count", 0)
             # view_count 在 views 字段中
-            views = result.get("views", {})
-            tweet.view_count = int(views.get("count", 0)) if views.get("count") else 0
+            view_count = (result.get("views") or _EMPTY).get("count")
+            tweet.view_count = int(view_count) if view_count else 0
 
             # ─── 外链提取 ───
             tweet.urls = self._extract_urls(legacy)
@@ -244,16 +404,17 @@ class TweetParser:
             tweet.media = self._extract_media(legacy)
 
             # ─── 转推检测 ───
-            retweeted_status = legacy.get("retweeted_status_result", {}).get("result")
+            retweeted_status = (legacy_get("retweeted_status_result") or _EMPTY).get("result")
+            # ─── 引用推文 ───
+            quoted_status = (result.get("quoted_status_result") or _EMPTY).get("result")
+
+            # 本推文解析完成后再入栈，失败的推文不会留下待解析的子推文
             if retweeted_status:
                 tweet.is_retweet = True
-                tweet.retweeted_tweet = self._parse_tweet_result(retweeted_status)
-
-            # ─── 引用推文 ───
-            quoted_status = result.get("quoted_status_result", {}).get("result")
+                stack.append((tweet, retweeted_status, "retweeted_tweet"))
             if quoted_status:
                 tweet.is_quote = True
-                tweet.quoted_tweet = self._parse_tweet_result(quoted_status)
+                stack.append((tweet, quoted_status, "quoted_tweet"))
 
             return tweet
 
@@ -271,11 +432,9 @@ class TweetParser:
         优先使用 note_tweet（长推文），否则回退到 legacy.full_text。
         """
         # 检查是否有 note_tweet (长推文 / Twitter Blue)
-        note_tweet = (
-            result.get("note_tweet", {})
-            .get("note_tweet_results", {})
-            .get("result", {})
-        )
+        note_tweet = result.get("note_tweet") or _EMPTY
+        note_tweet = note_tweet.get("note_tweet_results") or _EMPTY
+        note_tweet = note_tweet.get("result") or _EMPTY
         if note_tweet:
             note_text = note_tweet.get("text", "")
             if note_text:
@@ -288,7 +447,7 @@ class TweetParser:
         if not date_str:
             return None
         try:
-            return datetime.strptime(date_str, TWITTER_DATE_FORMAT)
+            return _parse_twitter_date(date_str)
         except ValueError:
             logger.debug(f"无法解析日期: {date_str}")
             return None
@@ -298,8 +457,7 @@ class TweetParser:
         if not source_html:
             return ""
         # 如 '<a href="..." rel="nofollow">Twitter Web App</a>'
-        import re
-        match = re.search(r'>(.+?)</a>', source_html)
+        match = _SOURCE_RE.search(source_html)
         return match.group(1) if match else source_html
 
     def _extract_urls(self, legacy: dict) -> List[str]:
@@ -311,30 +469,26 @@ class TweetParser:
         - 媒体链接
         """
         urls = []
-        entities = legacy.get("entities", {})
+        entities = legacy.get("entities") or _EMPTY
+        tweet_id = legacy.get("id_str", "")
 
-        for url_entity in entities.get("urls", []):
+        for url_entity in entities.get("urls") or ():
             expanded = url_entity.get("expanded_url", "")
-            if expanded:
-                # 过滤掉推文自身引用 (x.com/.../status/...)
-                if "/status/" in expanded and ("x.com" in expanded or "twitter.com" in expanded):
-                    # 保留引用推文的链接
-                    if expanded.split("/status/")[-1].split("?")[0] != legacy.get("id_str", ""):
-                        urls.append(expanded)
-                else:
-                    urls.append(expanded)
+            # 过滤掉推文自身引用 (x.com/.../status/<自身 ID>)，保留引用其他推文的链接
+            if expanded and not _is_self_status(expanded, tweet_id):
+                urls.append(expanded)
 
         return urls
 
     def _extract_media(self, legacy: dict) -> List[TweetMedia]:
         """提取推文的媒体附件"""
         media_list = []
-        extended_entities = legacy.get("extended_entities", {})
-        media_items = extended_entities.get("media", [])
+        extended_entities = legacy.get("extended_entities") or _EMPTY
+        media_items = extended_entities.get("media") or ()
 
         for item in media_items:
             media = TweetMedia(
-                type=item.get("type", ""),
+                type=sys.intern(item.get("type") or ""),
                 alt_text=item.get("ext_alt_text", ""),
             )
 
@@ -342,19 +496,25 @@ class TweetParser:
                 media.url = item.get("media_url_https", "")
                 media.preview_url = media.url
             elif media.type in ("video", "animated_gif"):
-                # 获取最高质量的视频 URL
-                variants = item.get("video_info", {}).get("variants", [])
-                mp4_variants = [v for v in variants if v.get("content_type") == "video/mp4"]
-                if mp4_variants:
-                    best = max(mp4_variants, key=lambda v: v.get("bitrate", 0))
+                # 获取最高质量的视频 URL (单次遍历 mp4 变体，码率相同时取先出现的)
+                video_info = item.get("video_info") or _EMPTY
+                best = None
+                best_bitrate = -1
+                for v in video_info.get("variants") or ():
+                    if v.get("content_type") != "video/mp4":
+                        continue
+                    bitrate = v.get("bitrate") or 0
+                    if bitrate > best_bitrate:
+                        best_bitrate, best = bitrate, v
+                if best is not None:
                     media.url = best.get("url", "")
                 media.preview_url = item.get("media_url_https", "")
                 # 视频时长
-                duration = item.get("video_info", {}).get("duration_millis", 0)
+                duration = video_info.get("duration_millis", 0)
                 media.duration_ms = duration
 
             # 尺寸
-            sizes = item.get("original_info", {})
+            sizes = item.get("original_info") or _EMPTY
             media.width = sizes.get("width", 0)
             media.height = sizes.get("height", 0)
 
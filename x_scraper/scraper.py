@@ -9,20 +9,43 @@ scraper.py - X/Twitter 用户推文爬取编排器
 import os
 import sys
 import json
+import argparse
+import functools
 import time
 import random
 import logging
 import configparser
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional, Tuple, Any, Callable
+from typing import List, Dict, Optional, Tuple, Any, Callable, Iterator
 
 from .client import XClient
 from .account_pool import AccountPool
 from .models import Tweet
+from .parser import loads_json
+
+# orjson 为可选加速依赖，未安装时回退到 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger("x_scraper.scraper")
 
 
+def _dump_posts(posts: List[dict], pretty: bool = False) -> bytes:
+    """
+    序列化输出文件内容 (UTF-8)；orjson 可用时走快速路径。
+
+    默认紧凑输出 (无缩进，体积约为缩进版的一半)；pretty=True 时缩进 2，便于人工查看。
+    """
+    if orjson is not None:
+        return orjson.dumps(posts, option=orjson.OPT_INDENT_2) if pretty else orjson.dumps(posts)
+    if pretty:
+        return json.dumps(posts, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(posts, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
 class XScraper:
     """
     X 用户推文爬取器 (High-level API)
@@ -52,6 +75,9 @@ class XScraper:
         circuit_breaker_cooldown: int = 60,
         query_ids: Optional[Dict[str, str]] = None,
         features: Optional[Dict[str, Any]] = None,
+        page_size: int = 100,
+        user_id_cache_path: Optional[str] = None,
+        max_workers: int = 1,
     ):
         """
         初始化 X 爬取器。
@@ -69,6 +95,9 @@ class XScraper:
             circuit_breaker_cooldown: 断路器冷却时间 (秒)
             query_ids: 自定义 GraphQL Query IDs
             features: 自定义 GraphQL Features
+            page_size: 每页请求的推文数 (最大 100)
+            user_id_cache_path: 可选，user_id 缓存文件路径 (跨次运行复用)
+            max_workers: 批量抓取时并发抓取的用户数 (默认 1 即串行；实际不超过账号数)
         """
         self.account_pool = account_pool
         self.max_tweets_per_user = max_tweets_per_user
@@ -76,6 +105,7 @@ class XScraper:
         self.user_switch_delay = user_switch_delay
         self.include_retweets = include_retweets
         self.include_replies = include_replies
+        self.max_workers = max(1, max_workers)
 
         self.client = XClient(
             account_pool=account_pool,
@@ -85,6 +115,8 @@ class XScraper:
             circuit_breaker_cooldown=circuit_breaker_cooldown,
             query_ids=query_ids,
             features=features,
+            page_size=page_size,
+            user_id_cache_path=user_id_cache_path,
         )
 
     @classmethod
@@ -102,8 +134,13 @@ class XScraper:
         Returns:
             XScraper 实例
         """
+        # 一次性取出整节 (含 DEFAULT，值已插值)，后续读取只查 dict，不再逐项走 configparser
+        section = 'x_scraper' if config.has_section('x_scraper') else config.default_section
+        sec = dict(config.items(section))
+        get = functools.partial(_config_value, sec)
+
         # ─── 加载账号凭证 ───
-        auth_str = config.get('x_scraper', 'auth_credentials', fallback='').strip()
+        auth_str = sec.get('auth_credentials', '').strip()
 
         if auth_str:
             pool = AccountPool.from_config_string(auth_str)
@@ -133,41 +170,44 @@ class XScraper:
         # P2: 加载可配置的 Query IDs 和 Features (覆盖代码中的默认值)
         query_ids = None
         features = None
-        query_ids_str = config.get('x_scraper', 'query_ids', fallback='').strip()
-        features_str = config.get('x_scraper', 'features', fallback='').strip()
+        query_ids_str = sec.get('query_ids', '').strip()
+        features_str = sec.get('features', '').strip()
         if query_ids_str:
             try:
-                query_ids = json.loads(query_ids_str)
+                query_ids = loads_json(query_ids_str)
                 logger.info(f"从配置加载自定义 Query IDs: {list(query_ids.keys())}")
             except json.JSONDecodeError as e:
                 logger.warning(f"解析 query_ids 配置失败: {e}，使用默认值")
         if features_str:
             try:
-                features = json.loads(features_str)
+                features = loads_json(features_str)
                 logger.info(f"从配置加载自定义 Features ({len(features)} 个)")
             except json.JSONDecodeError as e:
                 logger.warning(f"解析 features 配置失败: {e}，使用默认值")
 
         return cls(
             account_pool=pool,
-            max_tweets_per_user=config.getint('x_scraper', 'max_tweets_per_user', fallback=20),
+            max_tweets_per_user=get('max_tweets_per_user', int, 20),
             request_delay=(
-                config.getfloat('x_scraper', 'request_delay_min', fallback=15.0),
-                config.getfloat('x_scraper', 'request_delay_max', fallback=25.0),
+                get('request_delay_min', float, 15.0),
+                get('request_delay_max', float, 25.0),
             ),
             user_switch_delay=(
-                config.getfloat('x_scraper', 'user_switch_delay_min', fallback=30.0),
-                config.getfloat('x_scraper', 'user_switch_delay_max', fallback=60.0),
+                get('user_switch_delay_min', float, 30.0),
+                get('user_switch_delay_max', float, 60.0),
             ),
-            request_timeout=config.getint('x_scraper', 'request_timeout', fallback=30),
-            max_retries=config.getint('x_scraper', 'max_retries', fallback=3),
-            include_retweets=config.getboolean('x_scraper', 'include_retweets', fallback=False),
-            include_replies=config.getboolean('x_scraper', 'include_replies', fallback=False),
+            request_timeout=get('request_timeout', int, 30),
+            max_retries=get('max_retries', int, 3),
+            include_retweets=get('include_retweets', _config_bool, False),
+            include_replies=get('include_replies', _config_bool, False),
             # P1 & P2: 新增参数
-            circuit_breaker_threshold=config.getint('x_scraper', 'circuit_breaker_threshold', fallback=5),
-            circuit_breaker_cooldown=config.getint('x_scraper', 'circuit_breaker_cooldown', fallback=60),
+            circuit_breaker_threshold=get('circuit_breaker_threshold', int, 5),
+            circuit_breaker_cooldown=get('circuit_breaker_cooldown', int, 60),
             query_ids=query_ids,
             features=features,
+            page_size=get('page_size', int, 100),
+            user_id_cache_path=sec.get('user_id_cache_path', '').strip() or None,
+            max_workers=get('max_workers', int, 1),
         )
 
     # ─── 核心 API ───
@@ -261,47 +301,132 @@ class XScraper:
             {source_name: [post_dict, ...]} 字典
         """
         results = {}
-        total = len(x_accounts)
-        logger.info(f"━━━ X Scraper: 开始批量抓取 {total} 个用户 ━━━")
+        for source_name, posts in self.iter_all_configured_users(x_accounts, days_lookback):
+            results[source_name] = posts
+            if on_user_done:
+                try:
+                    on_user_done(source_name, posts)
+                except Exception as e:
+                    logger.error(f"处理 {source_name} 的抓取结果失败: {e}")
+        return results
 
-        for i, (source_name, username) in enumerate(x_accounts.items(), 1):
-            logger.info(f"[{i}/{total}] 处理 {source_name} (@{username})...")
+    def iter_all_configured_users(
+        self,
+        x_accounts: Dict[str, str],
+        days_lookback: int = 7,
+    ) -> Iterator[Tuple[str, List[dict]]]:
+        """
+        逐个抓取配置中的 X 用户，每抓完一个即产出 (source_name, posts)。
 
-            try:
-                posts = self.fetch_user_tweets_as_posts(
-                    username=username,
-                    source_name=source_name,
-                    days_lookback=days_lookback,
-                )
-                results[source_name] = posts
-                if on_user_done:
-                    on_user_done(source_name, posts)
+        调用方可边抓边保存，不必在内存中累积全部结果；抓取失败的用户产出空列表。
+        max_workers > 1 且有多个账号时并发抓取，按完成顺序产出，且不再插入用户切换延迟
+        (账号轮换与 XClient 的请求节流仍然生效)。
 
-            except Exception as e:
-                logger.error(f"抓取 @{username} 失败: {e}")
-                results[source_name] = []
-                if on_user_done:
-                    on_user_done(source_name, [])
+        Args:
+            x_accounts: {source_name: username} 字典 (来自 config.ini [x_accounts])
+            days_lookback: 回溯天数
 
-            # 用户间延迟 (最后一个用户不需要)
-            if i < total:
-                delay = random.uniform(*self.user_switch_delay)
-                logger.info(f"⏳ 用户切换延迟 {delay:.1f}s...")
-                time.sleep(delay)
+        Yields:
+            (source_name, [post_dict, ...])
+        """
+        total = len(x_accounts)
+        total_posts = 0
+        success_count = 0
+        # 并发数不超过账号数: 限速按 token 计，多于账号数的并发只会互相抢同一账号
+        workers = min(self.max_workers, self.account_pool.total_count, total)
+        logger.info(f"━━━ X Scraper: 开始批量抓取 {total} 个用户 (并发 {max(workers, 1)}) ━━━")
+
+        if workers > 1:
+            results = self._iter_users_concurrent(x_accounts, days_lookback, workers)
+        else:
+            results = self._iter_users_serial(x_accounts, days_lookback)
+
+        try:
+            for source_name, posts in results:
+                total_posts += len(posts)
+                success_count += bool(posts)
+                yield source_name, posts
+        finally:
+            # 整批抓完 (或调用方提前结束) 后一次性写回新解析的 user_id
+            self.client.flush_user_id_cache()
 
         # 统计
-        total_posts = sum(len(v) for v in results.values())
-        success_count = sum(1 for v in results.values() if v)
         logger.info(
             f"━━━ X Scraper 完成: {success_count}/{total} 个用户成功, "
             f"共 {total_posts} 条推文 ━━━"
         )
 
-        return results
+    def _fetch_configured_user(self, source_name: str, username: str, days_lookback: int) -> List[dict]:
+        """抓取单个配置用户的 posts；失败时记录日志并返回空列表"""
+        try:
+            return self.fetch_user_tweets_as_posts(
+                username=username,
+                source_name=source_name,
+                days_lookback=days_lookback,
+            )
+        except Exception as e:
+            logger.error(f"抓取 @{username} 失败: {e}")
+            return []
+
+    def _iter_users_serial(
+        self,
+        x_accounts: Dict[str, str],
+        days_lookback: int,
+    ) -> Iterator[Tuple[str, List[dict]]]:
+        """按配置顺序逐个抓取，用户之间插入随机切换延迟"""
+        total = len(x_accounts)
+        for i, (source_name, username) in enumerate(x_accounts.items(), 1):
+            logger.info(f"[{i}/{total}] 处理 {source_name} (@{username})...")
+            yield source_name, self._fetch_configured_user(source_name, username, days_lookback)
+
+            # 用户间延迟 (最后一个用户不需要)
+            if i < total:
+                delay = random.uniform(*self.user_switch_delay)
+                logger.info(f"⏳ 用户切换延迟 {delay:.1f}s...")
+                time.sleep(delay)
+
+    def _iter_users_concurrent(
+        self,
+        x_accounts: Dict[str, str],
+        days_lookback: int,
+        workers: int,
+    ) -> Iterator[Tuple[str, List[dict]]]:
+        """用线程池并发抓取，按完成顺序产出"""
+        total = len(x_accounts)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="x_scraper")
+        try:
+            futures = {
+                executor.submit(self._fetch_configured_user, source_name, username, days_lookback): source_name
+                for source_name, username in x_accounts.items()
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                source_name = futures[future]
+                logger.info(f"[{i}/{total}] 完成 {source_name}")
+                yield source_name, future.result()
+        finally:
+            # 调用方提前结束迭代时，取消尚未开始的抓取
+            executor.shutdown(wait=True, cancel_futures=True)
 
 
 # ─── 辅助函数 ───
 
+def _config_value(values: Dict[str, str], key: str, cast: Callable[[str], Any], default: Any) -> Any:
+    """读取配置项并转换类型；缺失时返回 default (同 SectionProxy.getint 等的 fallback 语义)"""
+    value = values.get(key)
+    if value is None:
+        return default
+    return cast(value)
+
+
+def _config_bool(value: str) -> bool:
+    """按 configparser 的规则解析布尔值 (true/false、yes/no、on/off、1/0)"""
+    try:
+        return configparser.ConfigParser.BOOLEAN_STATES[value.lower()]
+    except KeyError:
+        raise ValueError(f"Not a boolean: {value}")
+
+
+@functools.lru_cache(maxsize=1)
 def _find_project_root() -> str:
     """查找项目根目录 (包含 config.ini 的目录)"""
     # 从当前文件向上查找
@@ -337,13 +462,17 @@ def _load_x_accounts(config: configparser.ConfigParser) -> Dict[str, str]:
 
 # ─── CLI 入口 ───
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """
     独立运行入口。
 
     读取 config.ini 中的 [x_accounts] 和 [x_scraper] 配置，
     抓取所有用户的推文并保存到 data/ 目录。
     """
+    arg_parser = argparse.ArgumentParser(description="X/Twitter 用户推文爬取")
+    arg_parser.add_argument("--pretty", action="store_true", help="输出缩进 2 的 JSON (默认紧凑输出)")
+    args = arg_parser.parse_args(argv)
+
     # 设置日志
     logging.basicConfig(
         level=logging.INFO,
@@ -376,19 +505,16 @@ def main():
     output_dir = os.path.join(project_root, 'data', f'x_scraper_{batch_ts}')
     os.makedirs(output_dir, exist_ok=True)
 
-    def save_user(source_name: str, posts: List[dict]) -> None:
+    # 执行抓取，每抓完一个用户立即保存，不在内存中累积结果
+    total_posts = 0
+    for source_name, posts in scraper.iter_all_configured_users(x_accounts, days_lookback=days_lookback):
         if posts:
             filepath = os.path.join(output_dir, f"{source_name}.json")
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(posts, f, ensure_ascii=False, indent=2)
+            with open(filepath, 'wb') as f:
+                f.write(_dump_posts(posts, pretty=args.pretty))
+            total_posts += len(posts)
             logger.info(f"已保存: {source_name}.json ({len(posts)} 条)")
 
-    # 执行抓取，每抓完一个用户立即保存
-    results = scraper.fetch_all_configured_users(
-        x_accounts, days_lookback=days_lookback, on_user_done=save_user
-    )
-
-    total_posts = sum(len(v) for v in results.values())
     logger.info(f"结果已保存到: {output_dir} (共 {total_posts} 条推文)")
 
 